@@ -1,29 +1,42 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
+import functools
+import os
+import tempfile
 from datetime import date
+import db_async
 from db_utils import ( 
-    get_snowpark_session, buscar_ids_nomes, buscar_registro_por_id, deletar_registro_por_id,
+    get_snowpark_session, iniciar_aquecimento, carregar_listas_da_pagina, metricas_pool, iniciar_coleta, coleta_parcial,
+    buscar_ids_nomes, buscar_registro_por_id, deletar_registro_por_id,
+
+    # LEITURA PAGINADA E SELETORES COM BUSCA
+    ler_pagina, prefetch_pagina, buscar_opcoes, buscar_opcao_por_id, executar_em_paralelo,
+
+    # EXPORTAÇÃO E DESCARGA EM STAGE
+    exportar, FORMATOS_EXPORTACAO,
+    iniciar_descarga, listar_descargas, arquivos_da_descarga, FORMATOS_DESCARGA,
     
     # CRUD PESSOAS
-    criar_pessoa, ler_pessoas, atualizar_pessoa,
+    criar_pessoa, criar_pessoas_em_lote, atualizar_pessoa,
     
     # CRUD EVENTOS
-    criar_evento, ler_eventos, atualizar_evento,
+    criar_evento, atualizar_evento,
     
     # CRUD PALESTRAS
-    criar_palestra, ler_palestras, atualizar_palestra,
+    criar_palestra, atualizar_palestra,
     
     # CRUD INSCRICOES
-    criar_inscricao, ler_inscricoes, deletar_inscricao,
+    criar_inscricao, criar_inscricoes_em_lote, deletar_inscricao,
     
     # CRUD PAGAMENTOS
-    criar_pagamento, ler_pagamentos, atualizar_pagamento,
+    criar_pagamento, criar_pagamentos_em_lote, atualizar_pagamento,
     
     # CRUD TIPOS_PAGAMENTO
-    criar_tipo_pagamento, ler_tipos_pagamento, atualizar_tipo_pagamento,
+    criar_tipo_pagamento, atualizar_tipo_pagamento,
     
     # CRUD FEEDBACK
-    upsert_feedback, ler_feedback, atualizar_feedback,
+    upsert_feedback, atualizar_feedback,
     
     # CONSULTAS (FASE 3/4)
     consulta_participantes_palestra,
@@ -39,456 +52,655 @@ from db_utils import (
 
 st.set_page_config(layout="wide", page_title="Plataforma bora.ai")
 
-# Conecta e armazena a sessão Snowpark
+# Conecta ao pool de sessões Snowpark compartilhado pelo processo
 snowpark_session = get_snowpark_session()
 
+# Tipos de pagamento, eventos e pessoas por papel: carregados uma vez por processo (na primeira
+# execução) e, enquanto houver renderizações, renovados em segundo plano
+iniciar_aquecimento(snowpark_session)
+
 # --- FUNÇÕES DE INTERFACE (MANUTENÇÃO) ---
 
+def fragmento(funcao):
+    # Trecho da página que reexecuta sozinho (st.fragment): mexer num widget dele não refaz as
+    # consultas do resto da página. Cada execução mostra quantas consultas fez ao banco.
+    @st.fragment
+    @functools.wraps(funcao)
+    def executar(*args, **kwargs):
+        # Aviso de uma escrita deste trecho (concluir_escrita reexecutou só ele)
+        aviso = st.session_state.pop("aviso_escrita", None)
+        if aviso:
+            st.success(aviso)
+        with coleta_parcial(st.session_state.page) as coleta:
+            funcao(*args, **kwargs)
+        st.caption(f"🔎 Consultas ao banco nesta interação: {len(coleta)}")
+    return executar
+
+def concluir_escrita(mensagem):
+    # A escrita já corrigiu a cópia em memória da tabela (ou a visão em cache): a nova renderização
+    # não relê a tabela inteira. Dentro de um fragmento, reexecuta só ele; o resto da página (ex.:
+    # o visualizador) mostra a escrita na próxima interação com ele ou no botão Atualizar.
+    # A mensagem é guardada porque o st.rerun() descarta o que já foi desenhado.
+    st.session_state["aviso_escrita"] = mensagem
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # Fora de um fragmento, ou num fragmento rodando na execução completa do app
+        st.rerun()
+
+def opcoes_com_busca(rotulo, seletor, chave, atual=None, **filtros):
+    # Caixa de busca por prefixo + opções limitadas; deve ficar fora de st.form para reagir à digitação
+    texto = st.text_input(f"🔎 Buscar {rotulo}", key=f"{chave}_busca", placeholder="Digite o início do nome")
+    opcoes = buscar_opcoes(snowpark_session, seletor, texto, **filtros)
+    if atual is not None and atual not in opcoes.values():
+        opcoes = {**buscar_opcao_por_id(snowpark_session, seletor, atual), **opcoes}
+    return opcoes
+
+def faltam_cadastros(*buscas):
+    # Listas de pré-requisito da página buscadas juntas (db_async): espera só a mais lenta
+    return not all(db_async.executar(*buscas))
+
+def selecao_incompleta(*selecoes):
+    # Com a busca, um seletor pode ficar sem opções; evita KeyError no envio do formulário
+    if any(selecao is None for selecao in selecoes):
+        st.error("Nenhuma opção selecionada: ajuste a busca.")
+        return True
+    return False
+
+def indice_da_opcao(opcoes, atual):
+    ids = list(opcoes.values())
+    return ids.index(atual) if atual in ids else 0
+
+@fragmento
+def visualizar_paginado(visao, chave, descarga=None):
+    st.subheader("Dados Atuais")
+
+    # Ordenação e filtro vêm do estado dos widgets (renderizados abaixo, após a leitura)
+    ordenar_por = st.session_state.get(f"{chave}_ordem") or None
+    decrescente = st.session_state.get(f"{chave}_desc", False)
+    filtro_coluna = st.session_state.get(f"{chave}_filtro_col")
+    filtro_texto = st.session_state.get(f"{chave}_filtro_txt", "")
+    opcoes = {
+        "ordenar_por": ordenar_por,
+        "decrescente": decrescente,
+        "filtro": (filtro_coluna, filtro_texto) if filtro_coluna and filtro_texto else None,
+    }
+
+    # Mudou ordenação/filtro: volta para a primeira página
+    assinatura = tuple(opcoes.values())
+    if st.session_state.get(f"{chave}_assinatura") != assinatura:
+        st.session_state[f"{chave}_assinatura"] = assinatura
+        st.session_state[f"{chave}_cursores"] = [None]
+    cursores = st.session_state[f"{chave}_cursores"]
+
+    df_pagina, proximo = ler_pagina(snowpark_session, visao, apos=cursores[-1], **opcoes)
+    if proximo is not None:
+        prefetch_pagina(snowpark_session, visao, proximo, **opcoes)
+
+    colunas = [""] + list(df_pagina.columns)
+    col_ordem, col_desc, col_filtro, col_texto = st.columns(4)
+    col_ordem.selectbox("Ordenar por", colunas, key=f"{chave}_ordem")
+    col_desc.checkbox("Decrescente", key=f"{chave}_desc")
+    col_filtro.selectbox("Filtrar coluna", colunas, key=f"{chave}_filtro_col")
+    col_texto.text_input("Contém", key=f"{chave}_filtro_txt")
+
+    if df_pagina.empty:
+        st.info("Nenhum registro encontrado.")
+    else:
+        st.dataframe(df_pagina, use_container_width=True)
+
+    col_ant, col_pag, col_atualizar, col_prox = st.columns([1, 1, 1, 1])
+    col_ant.button("⬅️ Anterior", key=f"{chave}_ant", disabled=len(cursores) == 1, on_click=cursores.pop)
+    col_pag.caption(f"Página {len(cursores)}")
+    col_atualizar.button("🔄 Atualizar", key=f"{chave}_atualizar")
+    col_prox.button("Próxima ➡️", key=f"{chave}_prox", disabled=proximo is None, on_click=cursores.append, args=(proximo,))
+
+    if descarga:
+        painel_descarga(descarga)
+
+def importar_csv_em_lote(chave, colunas, funcao_lote):
+    with st.expander("Importar CSV em lote"):
+        st.caption(f"Colunas esperadas: {', '.join(colunas)}")
+        arquivo = st.file_uploader("Arquivo CSV", type="csv", key=f"{chave}_csv")
+        if arquivo is not None and st.button("Importar", key=f"{chave}_csv_btn"):
+            try:
+                relatorio = funcao_lote(snowpark_session, pd.read_csv(arquivo))
+            except ValueError as e:
+                st.error(f"Arquivo inválido: {e}")
+                return
+            inseridas = sum(lote["inseridas"] for lote in relatorio)
+            falhas = [lote for lote in relatorio if lote["erro"]]
+            if falhas:
+                st.warning(f"{inseridas} linhas importadas; {len(falhas)} lote(s) com erro.")
+            else:
+                st.success(f"{inseridas} linhas importadas com sucesso!")
+            st.dataframe(pd.DataFrame(relatorio), use_container_width=True)
+
+def gerar_exportacao(nome, formato, args):
+    # Callback do botão: grava a exportação num arquivo temporário, lote a lote
+    anterior = st.session_state.pop(f"exp_{nome}_arquivo", None)
+    if anterior and os.path.exists(anterior["caminho"]):
+        os.remove(anterior["caminho"])
+    try:
+        with tempfile.NamedTemporaryFile(suffix=f".{formato}", delete=False) as arquivo:
+            linhas = exportar(snowpark_session, nome, arquivo, formato, args)
+    except Exception as e:
+        st.error(f"Erro ao exportar: {e}")
+        return
+    st.session_state[f"exp_{nome}_arquivo"] = {"caminho": arquivo.name, "formato": formato, "linhas": linhas}
+
+def botao_exportar(nome, args=()):
+    # O arquivo só é gerado no clique (e não a cada renderização); depois aparece o download
+    col_formato, col_gerar, col_baixar = st.columns([1, 1, 2])
+    formato = col_formato.selectbox("Formato", list(FORMATOS_EXPORTACAO), key=f"exp_{nome}_fmt", label_visibility="collapsed")
+    col_gerar.button("📤 Gerar arquivo", key=f"exp_{nome}_btn", on_click=gerar_exportacao, args=(nome, formato, args))
+    arquivo = st.session_state.get(f"exp_{nome}_arquivo")
+    if arquivo and arquivo["formato"] == formato and os.path.exists(arquivo["caminho"]):
+        with open(arquivo["caminho"], "rb") as f:
+            col_baixar.download_button(
+                f"⬇️ Baixar ({arquivo['linhas']} linhas)", f, file_name=f"{nome}.{formato}",
+                mime=FORMATOS_EXPORTACAO[formato], key=f"exp_{nome}_dl",
+            )
+
+def disparar_descarga(nome, formato):
+    # Callback do botão: o COPY INTO continua no warehouse; aqui só guardamos o caminho no stage
+    try:
+        iniciar_descarga(snowpark_session, nome, formato)
+    except Exception as e:
+        st.error(f"Erro ao iniciar a descarga: {e}")
+
+def painel_descarga(nome):
+    # Extrações grandes: COPY INTO direto para o stage, sem passar pelo servidor do app
+    with st.expander("🚚 Descarga completa em stage (COPY INTO)"):
+        col_formato, col_iniciar, col_atualizar = st.columns([1, 1, 1])
+        formato = col_formato.selectbox("Formato", list(FORMATOS_DESCARGA), key=f"desc_{nome}_fmt", label_visibility="collapsed")
+        col_iniciar.button("🚚 Iniciar descarga", key=f"desc_{nome}_btn", on_click=disparar_descarga, args=(nome, formato))
+        col_atualizar.button("🔄 Atualizar status", key=f"desc_{nome}_atualizar")
+
+        descargas = listar_descargas(nome)
+        if not descargas:
+            st.caption("Nenhuma descarga iniciada neste servidor.")
+            return
+        st.dataframe(pd.DataFrame(descargas), use_container_width=True)
+
+        # O LIST só roda quando pedido, para não gastar uma consulta a cada renderização
+        concluidas = [d["caminho"] for d in descargas if d["status"] == "concluida"]
+        if concluidas:
+            caminho = st.selectbox("Descarga concluída", concluidas, key=f"desc_{nome}_sel")
+            if st.button("📂 Listar arquivos", key=f"desc_{nome}_listar"):
+                st.dataframe(pd.DataFrame(arquivos_da_descarga(snowpark_session, caminho), columns=["ARQUIVO", "BYTES"]), use_container_width=True)
+            st.caption(f"Para baixar: `python exportar.py --baixar {caminho} --pasta <destino>`")
+
+@fragmento
+def painel_cadastro_pessoas():
+    st.subheader("Cadastrar Novo Usuário")
+    with st.form("form_pessoa_create"):
+        nome = st.text_input("Nome")
+        email = st.text_input("Email", key="p_email_c")
+        telefone = st.text_input("Telefone")
+        tipo = st.selectbox("Tipo de Pessoa", ['Participante', 'Organizador', 'Palestrante'])
+        
+        submit_button = st.form_submit_button("Cadastrar")
+
+        if submit_button:
+            resultado = criar_pessoa(snowpark_session, nome, email, telefone, tipo)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Usuário cadastrado com sucesso!")
+            else:
+                st.error(f"Erro ao cadastrar: {resultado}")
+
+    importar_csv_em_lote("p", ["nome", "email", "telefone", "tipo_pessoa"], criar_pessoas_em_lote)
+
+@fragmento
+def painel_atualizacao_pessoas():
+    st.subheader("Atualizar / Excluir Usuário")
+    nomes_id_map = opcoes_com_busca("Usuário", 'PESSOAS', "p_select")
+    if not nomes_id_map:
+        st.info("Nenhum usuário encontrado.")
+
+    selecao = st.selectbox("Selecione o Usuário para Alterar/Excluir", list(nomes_id_map.keys()), key="p_select")
+    
+    if selecao:
+        pessoa_id = nomes_id_map[selecao]
+        dados = buscar_registro_por_id(snowpark_session, 'PESSOAS', pessoa_id)
+
+        if dados:
+            upd_nome = st.text_input("Novo Nome", value=dados[1], key="p_nome_upd")
+            upd_email = st.text_input("Novo Email", value=dados[2], key="p_email_upd")
+            upd_telefone = st.text_input("Novo Telefone", value=dados[3] if dados[3] else "", key="p_tel_upd")
+            upd_tipo = st.selectbox("Novo Tipo", ['Participante', 'Organizador', 'Palestrante'], index=['Participante', 'Organizador', 'Palestrante'].index(dados[4]), key="p_tipo_upd")
+
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Usuário", key="p_upd_btn"):
+                    resultado = atualizar_pessoa(snowpark_session, pessoa_id, upd_nome, upd_email, upd_telefone, upd_tipo)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Usuário atualizado com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Usuário", key="p_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'PESSOAS', pessoa_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Usuário excluído com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir: {resultado}")
+
 def mostrar_crud_pessoas():
     st.header("1. 👥 Cadastro e Manutenção de Usuários")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Cadastrar Novo Usuário")
-        with st.form("form_pessoa_create"):
-            nome = st.text_input("Nome")
-            email = st.text_input("Email", key="p_email_c")
-            telefone = st.text_input("Telefone")
-            tipo = st.selectbox("Tipo de Pessoa", ['Participante', 'Organizador', 'Palestrante'])
-            
-            submit_button = st.form_submit_button("Cadastrar")
-
-            if submit_button:
-                resultado = criar_pessoa(snowpark_session, nome, email, telefone, tipo)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Usuário cadastrado com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao cadastrar: {resultado}")
+        painel_cadastro_pessoas()
 
     with col2:
-        st.subheader("Atualizar / Excluir Usuário")
-        _, dados = ler_pessoas(snowpark_session)
-        if not dados:
-            st.info("Nenhum usuário encontrado.")
-            return
+        painel_atualizacao_pessoas()
 
-        df = pd.DataFrame(dados, columns=["ID", "NOME", "EMAIL", "TELEFONE", "TIPO_PESSOA"])
-        
-        nomes_id_map = {f"{row['NOME']} ({row['ID']})": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione o Usuário para Alterar/Excluir", list(nomes_id_map.keys()), key="p_select")
+    visualizar_paginado('PESSOAS', "p_view", descarga='pessoas')
+
+@fragmento
+def painel_cadastro_eventos(tipos_organizador):
+    st.subheader("Cadastrar Novo Evento")
+    organizadores_map = opcoes_com_busca("Organizador", 'PESSOAS', "e_org_c", tipos_pessoa=tipos_organizador)
+    organizadores_list = list(organizadores_map.keys())
+    with st.form("form_evento_create"):
+        nome = st.text_input("Nome do Evento")
+        data_inicio = st.date_input("Data de Início", value=date.today())
+        data_fim = st.date_input("Data de Fim", value=date.today())
+        local = st.text_input("Local")
+        nome_organizador = st.selectbox("Organizador Responsável", organizadores_list)
         
-        if selecao:
-            pessoa_id = nomes_id_map[selecao]
-            dados = buscar_registro_por_id(snowpark_session, 'PESSOAS', pessoa_id)
-
-            if dados:
-                upd_nome = st.text_input("Novo Nome", value=dados[1], key="p_nome_upd")
-                upd_email = st.text_input("Novo Email", value=dados[2], key="p_email_upd")
-                upd_telefone = st.text_input("Novo Telefone", value=dados[3] if dados[3] else "", key="p_tel_upd")
-                upd_tipo = st.selectbox("Novo Tipo", ['Participante', 'Organizador', 'Palestrante'], index=['Participante', 'Organizador', 'Palestrante'].index(dados[4]), key="p_tipo_upd")
-
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Usuário", key="p_upd_btn"):
-                        resultado = atualizar_pessoa(snowpark_session, pessoa_id, upd_nome, upd_email, upd_telefone, upd_tipo)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Usuário atualizado com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Usuário", key="p_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'PESSOAS', pessoa_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Usuário excluído com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir: {resultado}")
+        submit_button = st.form_submit_button("Cadastrar")
+
+        if submit_button and not selecao_incompleta(nome_organizador):
+            organizador_id = organizadores_map[nome_organizador]
+            resultado = criar_evento(snowpark_session, nome, str(data_inicio), str(data_fim), local, organizador_id)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Evento cadastrado com sucesso!")
+            else:
+                st.error(f"Erro ao cadastrar: {resultado}")
+
+@fragmento
+def painel_atualizacao_eventos(tipos_organizador):
+    st.subheader("Atualizar / Excluir Evento")
+    eventos_map = opcoes_com_busca("Evento", 'EVENTOS', "e_select")
+    if not eventos_map:
+        st.info("Nenhum evento encontrado.")
+
+    selecao = st.selectbox("Selecione o Evento para Alterar/Excluir", list(eventos_map.keys()), key="e_select")
     
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_pessoas(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=colunas)
-        st.dataframe(df_read, use_container_width=True)
+    if selecao:
+        evento_id = eventos_map[selecao]
+        dados = buscar_registro_por_id(snowpark_session, 'EVENTOS', evento_id)
+
+        if dados:
+            upd_nome = st.text_input("Novo Nome", value=dados[1], key="e_nome_upd")
+            upd_data_inicio = st.date_input("Nova Data de Início", value=pd.to_datetime(dados[2]), key="e_data_i_upd")
+            upd_data_fim = st.date_input("Nova Data de Fim", value=pd.to_datetime(dados[3]) if dados[3] else upd_data_inicio, key="e_data_f_upd")
+            upd_local = st.text_input("Novo Local", value=dados[4] if dados[4] else "", key="e_local_upd")
+            
+            upd_organizadores_map = opcoes_com_busca("Organizador", 'PESSOAS', "e_org_upd", atual=dados[5], tipos_pessoa=tipos_organizador)
+            upd_nome_organizador = st.selectbox("Novo Organizador", list(upd_organizadores_map.keys()), index=indice_da_opcao(upd_organizadores_map, dados[5]), key="e_org_upd")
+            upd_organizador_id = upd_organizadores_map[upd_nome_organizador]
+
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Evento", key="e_upd_btn"):
+                    resultado = atualizar_evento(snowpark_session, evento_id, upd_nome, str(upd_data_inicio), str(upd_data_fim), upd_local, upd_organizador_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Evento atualizado com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Evento", key="e_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'EVENTOS', evento_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Evento excluído com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir: {resultado}")
 
 def mostrar_crud_eventos():
     st.header("2. 📋 Manutenção de Eventos")
 
-    _, dados_organizadores = buscar_ids_nomes(snowpark_session, 'PESSOAS', nome_coluna='NOME')
-    organizadores_map = {nome: id for id, nome in dados_organizadores if 'ORGANIZADOR' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper() or 'PALESTRANTE' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper()}
-    organizadores_list = list(organizadores_map.keys())
-
-    if not organizadores_list:
+    tipos_organizador = ('Organizador', 'Palestrante')
+    if not buscar_opcoes(snowpark_session, 'PESSOAS', tipos_pessoa=tipos_organizador):
         st.warning("⚠️ Cadastre pelo menos um 'Organizador' ou 'Palestrante' na seção 'Usuários' para criar eventos.")
         return
 
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Cadastrar Novo Evento")
-        with st.form("form_evento_create"):
-            nome = st.text_input("Nome do Evento")
-            data_inicio = st.date_input("Data de Início", value=date.today())
-            data_fim = st.date_input("Data de Fim", value=date.today())
-            local = st.text_input("Local")
-            nome_organizador = st.selectbox("Organizador Responsável", organizadores_list)
-            
-            submit_button = st.form_submit_button("Cadastrar")
-
-            if submit_button:
-                organizador_id = organizadores_map[nome_organizador]
-                resultado = criar_evento(snowpark_session, nome, str(data_inicio), str(data_fim), local, organizador_id)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Evento cadastrado com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao cadastrar: {resultado}")
+        painel_cadastro_eventos(tipos_organizador)
 
     with col2:
-        st.subheader("Atualizar / Excluir Evento")
-        colunas, dados = ler_eventos(snowpark_session)
-        if not dados:
-            st.info("Nenhum evento encontrado.")
-            return
+        painel_atualizacao_eventos(tipos_organizador)
 
-        df = pd.DataFrame(dados, columns=colunas)
-        
-        eventos_map = {f"{row['NOME_EVENTO']} ({row['ID']})": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione o Evento para Alterar/Excluir", list(eventos_map.keys()), key="e_select")
-        
-        if selecao:
-            evento_id = eventos_map[selecao]
-            dados = buscar_registro_por_id(snowpark_session, 'EVENTOS', evento_id)
-
-            if dados:
-                upd_nome = st.text_input("Novo Nome", value=dados[1], key="e_nome_upd")
-                upd_data_inicio = st.date_input("Nova Data de Início", value=pd.to_datetime(dados[2]), key="e_data_i_upd")
-                upd_data_fim = st.date_input("Nova Data de Fim", value=pd.to_datetime(dados[3]) if dados[3] else upd_data_inicio, key="e_data_f_upd")
-                upd_local = st.text_input("Novo Local", value=dados[4] if dados[4] else "", key="e_local_upd")
-                
-                organizador_atual_nome = [nome for nome, id in organizadores_map.items() if id == dados[5]][0]
-                upd_nome_organizador = st.selectbox("Novo Organizador", organizadores_list, index=organizadores_list.index(organizador_atual_nome), key="e_org_upd")
-                upd_organizador_id = organizadores_map[upd_nome_organizador]
-
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Evento", key="e_upd_btn"):
-                        resultado = atualizar_evento(snowpark_session, evento_id, upd_nome, str(upd_data_inicio), str(upd_data_fim), upd_local, upd_organizador_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Evento atualizado com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Evento", key="e_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'EVENTOS', evento_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Evento excluído com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir: {resultado}")
-
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_eventos(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+    visualizar_paginado('EVENTOS', "e_view", descarga='eventos')
 
 
-def mostrar_crud_palestras():
-    st.header("3. 🎤 Cadastro de Palestras")
-
-    # Obter Eventos e Palestrantes
-    _, dados_eventos = buscar_ids_nomes(snowpark_session, 'EVENTOS')
-    _, dados_palestrantes = buscar_ids_nomes(snowpark_session, 'PESSOAS', nome_coluna='NOME')
-    
-    eventos_map = {nome: id for id, nome in dados_eventos}
+@fragmento
+def painel_cadastro_palestras(tipos_palestrante):
+    st.subheader("Cadastrar Nova Palestra")
+    eventos_map = opcoes_com_busca("Evento", 'EVENTOS', "p_evento_c")
     eventos_list = list(eventos_map.keys())
-
-    # Filtra apenas quem é 'Palestrante' ou 'Organizador' para dar palestras
-    palestrantes_map = {nome: id for id, nome in dados_palestrantes if 'PALESTRANTE' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper() or 'ORGANIZADOR' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper()}
+    palestrantes_map = opcoes_com_busca("Palestrante", 'PESSOAS', "p_palestrante_c", tipos_pessoa=tipos_palestrante)
     palestrantes_list = list(palestrantes_map.keys())
+    with st.form("form_palestra_create"):
+        titulo = st.text_input("Título")
+        descricao = st.text_area("Descrição")
+        data = st.date_input("Data", value=date.today())
+        hora = st.time_input("Hora", value=pd.to_datetime('10:00:00').time())
+        sala = st.text_input("Sala")
+        nome_evento = st.selectbox("Evento", eventos_list, key="p_evento_c")
+        nome_palestrante = st.selectbox("Palestrante", palestrantes_list, key="p_palestrante_c")
+        
+        submit_button = st.form_submit_button("Cadastrar")
 
+        if submit_button and not selecao_incompleta(nome_evento, nome_palestrante):
+            evento_id = eventos_map[nome_evento]
+            palestrante_id = palestrantes_map[nome_palestrante]
+            hora_str = hora.strftime('%H:%M:%S') 
+            
+            resultado = criar_palestra(snowpark_session, titulo, descricao, str(data), hora_str, sala, evento_id, palestrante_id)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Palestra cadastrada com sucesso!")
+            else:
+                st.error(f"Erro ao cadastrar: {resultado}")
+
+@fragmento
+def painel_atualizacao_palestras(tipos_palestrante):
+    st.subheader("Atualizar / Excluir Palestra")
+    palestras_map = opcoes_com_busca("Palestra", 'PALESTRAS', "p_select")
+    if not palestras_map:
+        st.info("Nenhuma palestra encontrada.")
+
+    selecao = st.selectbox("Selecione a Palestra para Alterar/Excluir", list(palestras_map.keys()), key="p_select")
+    
+    if selecao:
+        update_id = palestras_map[selecao]
+        dados = buscar_registro_por_id(snowpark_session, 'PALESTRAS', update_id)
+
+        if dados:
+            upd_titulo = st.text_input("Novo Título", value=dados[1], key="p_titulo_upd")
+            upd_descricao = st.text_area("Nova Descrição", value=dados[2] if dados[2] else "", key="p_desc_upd")
+            upd_data = st.date_input("Nova Data", value=pd.to_datetime(dados[3]), key="p_data_upd")
+            upd_hora = st.time_input("Nova Hora", value=pd.to_datetime(str(dados[4])).time(), key="p_hora_upd")
+            upd_sala = st.text_input("Nova Sala", value=dados[5] if dados[5] else "", key="p_sala_upd")
+
+            upd_eventos_map = opcoes_com_busca("Evento", 'EVENTOS', "p_evento_upd", atual=dados[6])
+            upd_nome_evento = st.selectbox("Novo Evento", list(upd_eventos_map.keys()), index=indice_da_opcao(upd_eventos_map, dados[6]), key="p_evento_upd")
+            upd_evento_id = upd_eventos_map[upd_nome_evento]
+
+            upd_palestrantes_map = opcoes_com_busca("Palestrante", 'PESSOAS', "p_palestrante_upd", atual=dados[7], tipos_pessoa=tipos_palestrante)
+            upd_nome_palestrante = st.selectbox("Novo Palestrante", list(upd_palestrantes_map.keys()), index=indice_da_opcao(upd_palestrantes_map, dados[7]), key="p_palestrante_upd")
+            upd_palestrante_id = upd_palestrantes_map[upd_nome_palestrante]
+
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Palestra", key="p_upd_btn"):
+                    upd_hora_str = upd_hora.strftime('%H:%M:%S')
+                    resultado = atualizar_palestra(snowpark_session, update_id, upd_titulo, upd_descricao, str(upd_data), upd_hora_str, upd_sala, upd_evento_id, upd_palestrante_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Palestra atualizada com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Palestra", key="p_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'PALESTRAS', update_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Palestra excluída com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir: {resultado}")
 
-    if not eventos_list or not palestrantes_list:
+def mostrar_crud_palestras():
+    st.header("3. 🎤 Cadastro de Palestras")
+
+    # Apenas quem é 'Palestrante' ou 'Organizador' pode dar palestras
+    tipos_palestrante = ('Palestrante', 'Organizador')
+    if faltam_cadastros(db_async.buscar_opcoes(snowpark_session, 'EVENTOS'),
+                        db_async.buscar_opcoes(snowpark_session, 'PESSOAS', tipos_pessoa=tipos_palestrante)):
         st.warning("⚠️ Cadastre pelo menos um 'Evento' e um 'Palestrante' na seção 'Usuários' para criar palestras.")
         return
 
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Cadastrar Nova Palestra")
-        with st.form("form_palestra_create"):
-            titulo = st.text_input("Título")
-            descricao = st.text_area("Descrição")
-            data = st.date_input("Data", value=date.today())
-            hora = st.time_input("Hora", value=pd.to_datetime('10:00:00').time())
-            sala = st.text_input("Sala")
-            nome_evento = st.selectbox("Evento", eventos_list, key="p_evento_c")
-            nome_palestrante = st.selectbox("Palestrante", palestrantes_list, key="p_palestrante_c")
-            
-            submit_button = st.form_submit_button("Cadastrar")
-
-            if submit_button:
-                evento_id = eventos_map[nome_evento]
-                palestrante_id = palestrantes_map[nome_palestrante]
-                hora_str = hora.strftime('%H:%M:%S') 
-                
-                resultado = criar_palestra(snowpark_session, titulo, descricao, str(data), hora_str, sala, evento_id, palestrante_id)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Palestra cadastrada com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao cadastrar: {resultado}")
+        painel_cadastro_palestras(tipos_palestrante)
 
     with col2:
-        st.subheader("Atualizar / Excluir Palestra")
-        colunas, dados = ler_palestras(snowpark_session)
-        if not dados:
-            st.info("Nenhuma palestra encontrada.")
-            return
+        painel_atualizacao_palestras(tipos_palestrante)
 
-        df = pd.DataFrame(dados, columns=colunas)
-        
-        palestras_map = {f"{row['TITULO']} - {row['EVENTO']}": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione a Palestra para Alterar/Excluir", list(palestras_map.keys()), key="p_select")
+    visualizar_paginado('PALESTRAS', "l_view", descarga='palestras')
+
+@fragmento
+def painel_cadastro_inscricoes():
+    st.subheader("Registrar Nova Inscrição")
+    participantes_map = opcoes_com_busca("Participante", 'PESSOAS', "i_part_c", tipos_pessoa=('Participante',))
+    participantes_list = list(participantes_map.keys())
+    palestras_map = opcoes_com_busca("Palestra", 'PALESTRAS', "i_pal_c")
+    palestras_list = list(palestras_map.keys())
+    with st.form("form_inscricao_create"):
+        nome_participante = st.selectbox("Participante", participantes_list, key="i_part_c")
+        titulo_palestra = st.selectbox("Palestra", palestras_list, key="i_pal_c")
+        data_inscricao = st.date_input("Data da Inscrição", value=date.today())
         
-        if selecao:
-            update_id = palestras_map[selecao]
-            dados = buscar_registro_por_id(snowpark_session, 'PALESTRAS', update_id)
-
-            if dados:
-                upd_titulo = st.text_input("Novo Título", value=dados[1], key="p_titulo_upd")
-                upd_descricao = st.text_area("Nova Descrição", value=dados[2] if dados[2] else "", key="p_desc_upd")
-                upd_data = st.date_input("Nova Data", value=pd.to_datetime(dados[3]), key="p_data_upd")
-                upd_hora = st.time_input("Nova Hora", value=pd.to_datetime(str(dados[4])).time(), key="p_hora_upd")
-                upd_sala = st.text_input("Nova Sala", value=dados[5] if dados[5] else "", key="p_sala_upd")
-
-                evento_atual_nome = [nome for nome, id in eventos_map.items() if id == dados[6]][0]
-                upd_nome_evento = st.selectbox("Novo Evento", eventos_list, index=eventos_list.index(evento_atual_nome), key="p_evento_upd")
-                upd_evento_id = eventos_map[upd_nome_evento]
-
-                palestrante_atual_nome = [nome for nome, id in palestrantes_map.items() if id == dados[7]][0]
-                upd_nome_palestrante = st.selectbox("Novo Palestrante", palestrantes_list, index=palestrantes_list.index(palestrante_atual_nome), key="p_palestrante_upd")
-                upd_palestrante_id = palestrantes_map[upd_nome_palestrante]
-
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Palestra", key="p_upd_btn"):
-                        upd_hora_str = upd_hora.strftime('%H:%M:%S')
-                        resultado = atualizar_palestra(snowpark_session, update_id, upd_titulo, upd_descricao, str(upd_data), upd_hora_str, upd_sala, upd_evento_id, upd_palestrante_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Palestra atualizada com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Palestra", key="p_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'PALESTRAS', update_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Palestra excluída com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir: {resultado}")
+        submit_button = st.form_submit_button("Inscrever")
 
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_palestras(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+        if submit_button and not selecao_incompleta(nome_participante, titulo_palestra):
+            participante_id = participantes_map[nome_participante]
+            palestra_id = palestras_map[titulo_palestra]
+            
+            resultado = criar_inscricao(snowpark_session, participante_id, palestra_id, str(data_inscricao))
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Inscrição registrada com sucesso!")
+            else:
+                st.error(f"Erro ao inscrever (Inscrição duplicada ou erro no DB): {resultado}")
+
+    importar_csv_em_lote("i", ["participante_id", "palestra_id", "data_inscricao"], criar_inscricoes_em_lote)
+
+@fragmento
+def painel_atualizacao_inscricoes():
+    st.subheader("Cancelar Inscrição")
+    inscricoes_map = opcoes_com_busca("Inscrição (pelo participante)", 'INSCRICOES', "i_select_del")
+    if not inscricoes_map:
+        st.info("Nenhuma inscrição encontrada.")
+
+    selecao_cancelar = st.selectbox("Selecione a Inscrição para Cancelar", list(inscricoes_map.keys()), key="i_select_del")
+    
+    if selecao_cancelar:
+        # A chave da inscrição é composta: (participante_id, palestra_id)
+        participante_id, palestra_id = inscricoes_map[selecao_cancelar]
+        
+        if st.button("Confirmar Cancelamento", key="i_del_btn"):
+            resultado = deletar_inscricao(snowpark_session, participante_id, palestra_id)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Inscrição cancelada com sucesso!")
+            else:
+                st.error(f"Erro ao cancelar: {resultado}")
 
 def mostrar_crud_inscricoes():
     st.header("4. 📝 Inscrição e Matrícula em Palestras")
 
-    # Obter Participantes e Palestras
-    _, dados_participantes = buscar_ids_nomes(snowpark_session, 'PESSOAS', nome_coluna='NOME')
-    _, dados_palestras = buscar_ids_nomes(snowpark_session, 'PALESTRAS', nome_coluna='TITULO')
-    
-    participantes_map = {nome: id for id, nome in dados_participantes if 'PARTICIPANTE' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper()}
-    participantes_list = list(participantes_map.keys())
-    
-    palestras_map = {titulo: id for id, titulo in dados_palestras}
-    palestras_list = list(palestras_map.keys())
-
-    if not participantes_list or not palestras_list:
+    if faltam_cadastros(db_async.buscar_opcoes(snowpark_session, 'PESSOAS', tipos_pessoa=('Participante',)),
+                        db_async.buscar_opcoes(snowpark_session, 'PALESTRAS')):
         st.warning("⚠️ Cadastre pelo menos um 'Participante' e uma 'Palestra' para gerenciar inscrições.")
         return
 
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Registrar Nova Inscrição")
-        with st.form("form_inscricao_create"):
-            nome_participante = st.selectbox("Participante", participantes_list, key="i_part_c")
-            titulo_palestra = st.selectbox("Palestra", palestras_list, key="i_pal_c")
-            data_inscricao = st.date_input("Data da Inscrição", value=date.today())
-            
-            submit_button = st.form_submit_button("Inscrever")
-
-            if submit_button:
-                participante_id = participantes_map[nome_participante]
-                palestra_id = palestras_map[titulo_palestra]
-                
-                resultado = criar_inscricao(snowpark_session, participante_id, palestra_id, str(data_inscricao))
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Inscrição registrada com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao inscrever (Inscrição duplicada ou erro no DB): {resultado}")
+        painel_cadastro_inscricoes()
 
     with col2:
-        st.subheader("Cancelar Inscrição")
-        colunas, dados = ler_inscricoes(snowpark_session)
-        if not dados:
-            st.info("Nenhuma inscrição encontrada.")
-            return
+        painel_atualizacao_inscricoes()
 
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        
-        # Correção: Usar PARTICIPANTE e PALESTRA (Upper case)
-        chaves_inscricoes = df.apply(lambda row: f"{row['PARTICIPANTE']} em {row['PALESTRA']}", axis=1).tolist()
-        
-        selecao_cancelar = st.selectbox("Selecione a Inscrição para Cancelar", chaves_inscricoes, key="i_select_del")
+    visualizar_paginado('INSCRICOES', "i_view", descarga='inscricoes')
+
+def mapa_tipos_pagamento():
+    # Tipos de pagamento são poucos: continuam como lista completa
+    _, dados_tipos_pag = buscar_ids_nomes(snowpark_session, 'TIPOS_PAGAMENTO', nome_coluna='NOME')
+    tipos_pag_map = {nome: id for id, nome in dados_tipos_pag}
+    return tipos_pag_map, list(tipos_pag_map.keys())
+
+@fragmento
+def painel_cadastro_pagamentos():
+    st.subheader("Registrar Novo Pagamento")
+    tipos_pag_map, tipos_pag_list = mapa_tipos_pagamento()
+    participantes_map = opcoes_com_busca("Participante", 'PESSOAS', "pg_part_c", tipos_pessoa=('Participante',))
+    participantes_list = list(participantes_map.keys())
+    eventos_map = opcoes_com_busca("Evento", 'EVENTOS', "pg_evento_c")
+    eventos_list = list(eventos_map.keys())
+    with st.form("form_pagamento_create"):
+        nome_participante = st.selectbox("Participante", participantes_list, key="pg_part_c")
+        nome_evento = st.selectbox("Evento Referente", eventos_list, key="pg_evento_c")
+        valor = st.number_input("Valor (R$)", min_value=0.01, format="%.2f", key="pg_valor_c")
+        status = st.selectbox("Status", ['Pendente', 'Confirmado', 'Cancelado'], key="pg_status_c")
+        tipo_pag_nome = st.selectbox("Tipo de Pagamento", tipos_pag_list, key="pg_tipo_c")
         
-        if selecao_cancelar:
-            participante_nome = selecao_cancelar.split(" em ")[0]
-            palestra_titulo = selecao_cancelar.split(" em ")[1]
+        submit_button = st.form_submit_button("Registrar")
+
+        if submit_button and not selecao_incompleta(nome_participante, nome_evento, tipo_pag_nome):
+            participante_id = participantes_map[nome_participante]
+            evento_id = eventos_map[nome_evento]
+            tipo_pagamento_id = tipos_pag_map[tipo_pag_nome]
+
+            resultado = criar_pagamento(snowpark_session, participante_id, evento_id, valor, status, tipo_pagamento_id)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Pagamento registrado com sucesso!")
+            else:
+                st.error(f"Erro ao registrar: {resultado}")
+
+    importar_csv_em_lote("pg", ["participante_id", "evento_id", "valor", "status", "tipo_pagamento_id"], criar_pagamentos_em_lote)
+
+@fragmento
+def painel_atualizacao_pagamentos():
+    st.subheader("Atualizar / Excluir Pagamento")
+    tipos_pag_map, tipos_pag_list = mapa_tipos_pagamento()
+    pagamentos_map = opcoes_com_busca("Pagamento (pelo participante)", 'PAGAMENTOS', "pg_select")
+    if not pagamentos_map:
+        st.info("Nenhum pagamento encontrado.")
+
+    selecao = st.selectbox("Selecione o Pagamento para Alterar/Excluir", list(pagamentos_map.keys()), key="pg_select")
+    
+    if selecao:
+        update_id = pagamentos_map[selecao]
+        dados_pag = buscar_registro_por_id(snowpark_session, 'PAGAMENTOS', update_id)
+
+        if dados_pag:
+            # Corrigido: Usar índice 3 (valor) e 5 (tipo_pagamento_id) da tabela PAGAMENTOS
+            valor_atual_float = float(dados_pag[3])
+            
+            # Tratamento para NULL/Ausência de Tipo de Pagamento (resolvendo IndexError)
+            tipo_pag_id_atual = dados_pag[5]
             
-            participante_id = participantes_map[participante_nome]
-            palestra_id = palestras_map[palestra_titulo]
+            if tipo_pag_id_atual is None:
+                tipo_pag_nome_atual = tipos_pag_list[0] if tipos_pag_list else ""
+            else:
+                match = [nome for nome, id in tipos_pag_map.items() if id == tipo_pag_id_atual]
+                tipo_pag_nome_atual = match[0] if match else tipos_pag_list[0] if tipos_pag_list else ""
             
-            if st.button("Confirmar Cancelamento", key="i_del_btn"):
-                resultado = deletar_inscricao(snowpark_session, participante_id, palestra_id)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Inscrição cancelada com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao cancelar: {resultado}")
+            # Obter participantes e eventos atuais para FKs (necessário para atualizar a FK no banco)
+            participante_id_atual = dados_pag[1]
+            evento_id_atual = dados_pag[2]
 
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_inscricoes(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+            upd_valor = st.number_input("Novo Valor (R$)", value=valor_atual_float, min_value=0.01, format="%.2f", key="p_valor_upd")
+            
+            status_atual = dados_pag[4]
+            upd_status = st.selectbox("Novo Status", ['Pendente', 'Confirmado', 'Cancelado'], index=['Pendente', 'Confirmado', 'Cancelado'].index(status_atual), key="pg_status_upd")
+
+            upd_tipo_pag_nome = st.selectbox("Novo Tipo de Pagamento", tipos_pag_list, 
+                                             index=tipos_pag_list.index(tipo_pag_nome_atual) if tipo_pag_nome_atual in tipos_pag_list else 0, 
+                                             key="pg_tipo_upd")
+            upd_tipo_pagamento_id = tipos_pag_map[upd_tipo_pag_nome]
+
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Pagamento", key="pg_upd_btn"):
+                    # Corrigido: Passar todas as colunas UPDATE na função atualizar_pagamento
+                    resultado = atualizar_pagamento(snowpark_session, update_id, upd_valor, upd_status, upd_tipo_pagamento_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Pagamento atualizado com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Pagamento", key="pg_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'PAGAMENTOS', update_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Pagamento excluído com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir: {resultado}")
 
 def mostrar_crud_pagamentos():
     st.header("5. 💲 Gestão de Transações e Pagamentos")
 
-    # Obter Participantes, Eventos e Tipos de Pagamento
-    _, dados_participantes = buscar_ids_nomes(snowpark_session, 'PESSOAS', nome_coluna='NOME')
-    participantes_map = {nome: id for id, nome in dados_participantes if 'PARTICIPANTE' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper()}
-    participantes_list = list(participantes_map.keys())
-
-    _, dados_eventos = buscar_ids_nomes(snowpark_session, 'EVENTOS')
-    eventos_map = {nome: id for id, nome in dados_eventos}
-    eventos_list = list(eventos_map.keys())
-    
-    _, dados_tipos_pag = buscar_ids_nomes(snowpark_session, 'TIPOS_PAGAMENTO', nome_coluna='NOME')
-    tipos_pag_map = {nome: id for id, nome in dados_tipos_pag}
-    tipos_pag_list = list(tipos_pag_map.keys())
-
-    if not participantes_list or not eventos_list or not tipos_pag_list:
+    _, tipos_pag_list = mapa_tipos_pagamento()
+    if not tipos_pag_list or faltam_cadastros(db_async.buscar_opcoes(snowpark_session, 'PESSOAS', tipos_pessoa=('Participante',)),
+                                              db_async.buscar_opcoes(snowpark_session, 'EVENTOS')):
         st.warning("⚠️ Cadastre 'Participantes', 'Eventos' e 'Tipos de Pagamento' para gerenciar pagamentos.")
         return
 
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Registrar Novo Pagamento")
-        with st.form("form_pagamento_create"):
-            nome_participante = st.selectbox("Participante", participantes_list, key="pg_part_c")
-            nome_evento = st.selectbox("Evento Referente", eventos_list, key="pg_evento_c")
-            valor = st.number_input("Valor (R$)", min_value=0.01, format="%.2f", key="pg_valor_c")
-            status = st.selectbox("Status", ['Pendente', 'Confirmado', 'Cancelado'], key="pg_status_c")
-            tipo_pag_nome = st.selectbox("Tipo de Pagamento", tipos_pag_list, key="pg_tipo_c")
-            
-            submit_button = st.form_submit_button("Registrar")
-
-            if submit_button:
-                participante_id = participantes_map[nome_participante]
-                evento_id = eventos_map[nome_evento]
-                tipo_pagamento_id = tipos_pag_map[tipo_pag_nome]
-
-                resultado = criar_pagamento(snowpark_session, participante_id, evento_id, valor, status, tipo_pagamento_id)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Pagamento registrado com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao registrar: {resultado}")
+        painel_cadastro_pagamentos()
 
     with col2:
-        st.subheader("Atualizar / Excluir Pagamento")
-        colunas, dados = ler_pagamentos(snowpark_session)
-        if not dados:
-            st.info("Nenhum pagamento encontrado.")
-            return
+        painel_atualizacao_pagamentos()
 
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        
-        pagamentos_map = {f"ID {row['ID']} - R$ {row['VALOR']} ({row['PARTICIPANTE']} em {row['EVENTO']})": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione o Pagamento para Alterar/Excluir", list(pagamentos_map.keys()), key="pg_select")
-        
-        if selecao:
-            update_id = pagamentos_map[selecao]
-            dados_pag = buscar_registro_por_id(snowpark_session, 'PAGAMENTOS', update_id)
-
-            if dados_pag:
-                # Corrigido: Usar índice 3 (valor) e 5 (tipo_pagamento_id) da tabela PAGAMENTOS
-                valor_atual_float = float(dados_pag[3])
-                
-                # Tratamento para NULL/Ausência de Tipo de Pagamento (resolvendo IndexError)
-                tipo_pag_id_atual = dados_pag[5]
-                
-                if tipo_pag_id_atual is None:
-                    tipo_pag_nome_atual = tipos_pag_list[0] if tipos_pag_list else ""
-                else:
-                    match = [nome for nome, id in tipos_pag_map.items() if id == tipo_pag_id_atual]
-                    tipo_pag_nome_atual = match[0] if match else tipos_pag_list[0] if tipos_pag_list else ""
-                
-                # Obter participantes e eventos atuais para FKs (necessário para atualizar a FK no banco)
-                participante_id_atual = dados_pag[1]
-                evento_id_atual = dados_pag[2]
-
-                upd_valor = st.number_input("Novo Valor (R$)", value=valor_atual_float, min_value=0.01, format="%.2f", key="p_valor_upd")
-                
-                status_atual = dados_pag[4]
-                upd_status = st.selectbox("Novo Status", ['Pendente', 'Confirmado', 'Cancelado'], index=['Pendente', 'Confirmado', 'Cancelado'].index(status_atual), key="pg_status_upd")
-
-                upd_tipo_pag_nome = st.selectbox("Novo Tipo de Pagamento", tipos_pag_list, 
-                                                 index=tipos_pag_list.index(tipo_pag_nome_atual) if tipo_pag_nome_atual in tipos_pag_list else 0, 
-                                                 key="pg_tipo_upd")
-                upd_tipo_pagamento_id = tipos_pag_map[upd_tipo_pag_nome]
-
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Pagamento", key="pg_upd_btn"):
-                        # Corrigido: Passar todas as colunas UPDATE na função atualizar_pagamento
-                        resultado = atualizar_pagamento(snowpark_session, update_id, upd_valor, upd_status, upd_tipo_pagamento_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Pagamento atualizado com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Pagamento", key="pg_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'PAGAMENTOS', update_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Pagamento excluído com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir: {resultado}")
+    visualizar_paginado('PAGAMENTOS', "pg_view", descarga='pagamentos')
 
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_pagamentos(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+@fragmento
+def painel_cadastro_tipos_pagamento():
+    st.subheader("Cadastrar Novo Tipo")
+    with st.form("form_tipo_pag_create"):
+        nome = st.text_input("Nome do Tipo de Pagamento (Ex: Boleto, Pix, Cartão)")
+        
+        submit_button = st.form_submit_button("Cadastrar")
+
+        if submit_button:
+            resultado = criar_tipo_pagamento(snowpark_session, nome)
+            if isinstance(resultado, int) and resultado > 0:
+                concluir_escrita("Tipo de Pagamento cadastrado com sucesso!")
+            else:
+                st.error(f"Erro ao cadastrar: {resultado}")
+
+@fragmento
+def painel_atualizacao_tipos_pagamento():
+    st.subheader("Atualizar / Excluir Tipo")
+    tipos_map = opcoes_com_busca("Tipo", 'TIPOS_PAGAMENTO', "t_select")
+    if not tipos_map:
+        st.info("Nenhum tipo de pagamento encontrado.")
+
+    selecao = st.selectbox("Selecione o Tipo para Alterar/Excluir", list(tipos_map.keys()), key="t_select")
+    
+    if selecao:
+        tipo_id = tipos_map[selecao]
+        dados = buscar_registro_por_id(snowpark_session, 'TIPOS_PAGAMENTO', tipo_id)
+
+        if dados:
+            upd_nome = st.text_input("Novo Nome", value=dados[1], key="t_nome_upd")
+
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Tipo", key="t_upd_btn"):
+                    resultado = atualizar_tipo_pagamento(snowpark_session, tipo_id, upd_nome)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Tipo de Pagamento atualizado com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Tipo", key="t_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'TIPOS_PAGAMENTO', tipo_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Tipo de Pagamento excluído com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir (Pode estar sendo usado em PAGAMENTOS): {resultado}")
 
 def mostrar_crud_tipos_pagamento():
     st.header("6. 🏷️ Definição de Tipos de Pagamento")
@@ -496,248 +708,200 @@ def mostrar_crud_tipos_pagamento():
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Cadastrar Novo Tipo")
-        with st.form("form_tipo_pag_create"):
-            nome = st.text_input("Nome do Tipo de Pagamento (Ex: Boleto, Pix, Cartão)")
-            
-            submit_button = st.form_submit_button("Cadastrar")
-
-            if submit_button:
-                resultado = criar_tipo_pagamento(snowpark_session, nome)
-                if isinstance(resultado, int) and resultado > 0:
-                    st.success("Tipo de Pagamento cadastrado com sucesso!")
-                    st.experimental_rerun()
-                else:
-                    st.error(f"Erro ao cadastrar: {resultado}")
+        painel_cadastro_tipos_pagamento()
 
     with col2:
-        st.subheader("Atualizar / Excluir Tipo")
-        _, dados = ler_tipos_pagamento(snowpark_session)
-        if not dados:
-            st.info("Nenhum tipo de pagamento encontrado.")
-            return
+        painel_atualizacao_tipos_pagamento()
 
-        df = pd.DataFrame(dados, columns=["ID", "NOME"])
-        
-        tipos_map = {f"{row['NOME']} ({row['ID']})": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione o Tipo para Alterar/Excluir", list(tipos_map.keys()), key="t_select")
+    visualizar_paginado('TIPOS_PAGAMENTO', "t_view", descarga='tipos_pagamento')
+
+@fragmento
+def painel_cadastro_feedback():
+    st.subheader("Registrar / Atualizar Feedback")
+    st.caption("Se o feedback já existir, ele será atualizado automaticamente (UPSERT).")
+    participantes_map = opcoes_com_busca("Participante", 'PESSOAS', "f_part_c", tipos_pessoa=('Participante',))
+    participantes_list = list(participantes_map.keys())
+    palestras_map = opcoes_com_busca("Palestra", 'PALESTRAS', "f_pal_c")
+    palestras_list = list(palestras_map.keys())
+    with st.form("form_feedback_create"):
+        nome_participante = st.selectbox("Participante", participantes_list, key="f_part_c")
+        titulo_palestra = st.selectbox("Palestra Avaliada", palestras_list, key="f_pal_c")
+        nota = st.slider("Nota (1 = Péssimo, 5 = Excelente)", 1, 5, 5, key="f_nota_c")
+        comentario = st.text_area("Comentário (Opcional)", key="f_comentario_c")
         
-        if selecao:
-            tipo_id = tipos_map[selecao]
-            dados = buscar_registro_por_id(snowpark_session, 'TIPOS_PAGAMENTO', tipo_id)
-
-            if dados:
-                upd_nome = st.text_input("Novo Nome", value=dados[1], key="t_nome_upd")
-
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Tipo", key="t_upd_btn"):
-                        resultado = atualizar_tipo_pagamento(snowpark_session, tipo_id, upd_nome)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Tipo de Pagamento atualizado com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Tipo", key="t_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'TIPOS_PAGAMENTO', tipo_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Tipo de Pagamento excluído com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir (Pode estar sendo usado em PAGAMENTOS): {resultado}")
+        submit_button = st.form_submit_button("Registrar Feedback")
 
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_tipos_pagamento(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+        if submit_button and not selecao_incompleta(nome_participante, titulo_palestra):
+            part_id = participantes_map[nome_participante]
+            pal_id = palestras_map[titulo_palestra]
+            
+            resultado = upsert_feedback(snowpark_session, part_id, pal_id, nota, comentario)
+            
+            if isinstance(resultado, int) and resultado >= 0: # 0 para INSERT, 1 para UPDATE no MERGE
+                concluir_escrita(f"Feedback para '{titulo_palestra}' registrado/atualizado com sucesso!")
+            elif isinstance(resultado, str):
+                st.error(f"Erro: {resultado}")
+            else:
+                st.warning("Erro desconhecido.")
+
+@fragmento
+def painel_atualizacao_feedback():
+    st.subheader("Atualizar Nota/Comentário")
+    feedbacks_map = opcoes_com_busca("Feedback (pelo participante)", 'FEEDBACK_PALESTRAS', "f_select")
+    if not feedbacks_map:
+        st.info("Nenhum feedback encontrado.")
+
+    selecao = st.selectbox("Selecione o Feedback para Alterar/Excluir", list(feedbacks_map.keys()), key="f_select")
+    
+    if selecao:
+        update_id = feedbacks_map[selecao]
+        dados = buscar_registro_por_id(snowpark_session, 'FEEDBACK_PALESTRAS', update_id)
+
+        if dados:
+            upd_nota = st.slider("Nova Nota", 1, 5, dados[3], key="f_nota_upd")
+            upd_comentario = st.text_area("Novo Comentário", value=dados[4] if dados[4] else "", key="f_comentario_upd")
+            
+            col_upd, col_del = st.columns(2)
+            with col_upd:
+                if st.button("Atualizar Feedback", key="f_upd_btn"):
+                    resultado = atualizar_feedback(snowpark_session, update_id, upd_nota, upd_comentario)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Feedback atualizado com sucesso!")
+                    else:
+                        st.error(f"Erro ao atualizar: {resultado}")
+
+            with col_del:
+                if st.button("Excluir Feedback", key="f_del_btn"):
+                    resultado = deletar_registro_por_id(snowpark_session, 'FEEDBACK_PALESTRAS', update_id)
+                    if isinstance(resultado, int) and resultado > 0:
+                        concluir_escrita("Feedback excluído com sucesso!")
+                    else:
+                        st.error(f"Erro ao excluir: {resultado}")
 
 def mostrar_crud_feedback():
     st.header("7. 💬 Coleta e Análise de Feedback")
 
-    # Obter Participantes e Palestras
-    _, dados_participantes = buscar_ids_nomes(snowpark_session, 'PESSOAS', nome_coluna='NOME')
-    participantes_map = {nome: id for id, nome in dados_participantes if 'PARTICIPANTE' in buscar_registro_por_id(snowpark_session, 'PESSOAS', id)[4].upper()}
-    participantes_list = list(participantes_map.keys())
-
-    _, dados_palestras = buscar_ids_nomes(snowpark_session, 'PALESTRAS', nome_coluna='TITULO')
-    palestras_map = {titulo: id for id, titulo in dados_palestras}
-    palestras_list = list(palestras_map.keys())
-
-    if not participantes_list or not palestras_list:
+    if faltam_cadastros(db_async.buscar_opcoes(snowpark_session, 'PESSOAS', tipos_pessoa=('Participante',)),
+                        db_async.buscar_opcoes(snowpark_session, 'PALESTRAS')):
         st.warning("⚠️ Cadastre 'Participantes' e 'Palestras' para coletar feedback.")
         return
 
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Registrar / Atualizar Feedback")
-        st.caption("Se o feedback já existir, ele será atualizado automaticamente (UPSERT).")
-        with st.form("form_feedback_create"):
-            nome_participante = st.selectbox("Participante", participantes_list, key="f_part_c")
-            titulo_palestra = st.selectbox("Palestra Avaliada", palestras_list, key="f_pal_c")
-            nota = st.slider("Nota (1 = Péssimo, 5 = Excelente)", 1, 5, 5, key="f_nota_c")
-            comentario = st.text_area("Comentário (Opcional)", key="f_comentario_c")
-            
-            submit_button = st.form_submit_button("Registrar Feedback")
-
-            if submit_button:
-                part_id = participantes_map[nome_participante]
-                pal_id = palestras_map[titulo_palestra]
-                
-                resultado = upsert_feedback(snowpark_session, part_id, pal_id, nota, comentario)
-                
-                if isinstance(resultado, int) and resultado >= 0: # 0 para INSERT, 1 para UPDATE no MERGE
-                    st.success(f"Feedback para '{titulo_palestra}' registrado/atualizado com sucesso!")
-                    st.experimental_rerun()
-                elif isinstance(resultado, str):
-                    st.error(f"Erro: {resultado}")
-                else:
-                    st.warning("Erro desconhecido.")
+        painel_cadastro_feedback()
 
     with col2:
-        st.subheader("Atualizar Nota/Comentário")
-        colunas, dados = ler_feedback(snowpark_session)
-        if not dados:
-            st.info("Nenhum feedback encontrado.")
-            return
+        painel_atualizacao_feedback()
 
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        
-        feedbacks_map = {f"ID {row['ID']} - {row['PARTICIPANTE']} ({row['NOTA']})": row['ID'] for index, row in df.iterrows()}
-        selecao = st.selectbox("Selecione o Feedback para Alterar/Excluir", list(feedbacks_map.keys()), key="f_select")
-        
-        if selecao:
-            update_id = feedbacks_map[selecao]
-            dados = buscar_registro_por_id(snowpark_session, 'FEEDBACK_PALESTRAS', update_id)
-
-            if dados:
-                upd_nota = st.slider("Nova Nota", 1, 5, dados[3], key="f_nota_upd")
-                upd_comentario = st.text_area("Novo Comentário", value=dados[4] if dados[4] else "", key="f_comentario_upd")
-                
-                col_upd, col_del = st.columns(2)
-                with col_upd:
-                    if st.button("Atualizar Feedback", key="f_upd_btn"):
-                        resultado = atualizar_feedback(snowpark_session, update_id, upd_nota, upd_comentario)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Feedback atualizado com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao atualizar: {resultado}")
-
-                with col_del:
-                    if st.button("Excluir Feedback", key="f_del_btn"):
-                        resultado = deletar_registro_por_id(snowpark_session, 'FEEDBACK_PALESTRAS', update_id)
-                        if isinstance(resultado, int) and resultado > 0:
-                            st.success("Feedback excluído com sucesso!")
-                            st.experimental_rerun()
-                        else:
-                            st.error(f"Erro ao excluir: {resultado}")
+    visualizar_paginado('FEEDBACK_PALESTRAS', "f_view", descarga='feedback')
 
-    st.subheader("Dados Atuais")
-    colunas, dados = ler_feedback(snowpark_session)
-    if dados:
-        df_read = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df_read, use_container_width=True)
+def ler_relatorio(session, funcao, *args):
+    # Roda numa thread do executar_em_paralelo, sem contexto de script: st.error aqui não chega
+    # à página. O erro da consulta volta junto com o DataFrame e é exibido na thread principal
+    with coleta_parcial() as registros:
+        df = funcao(session, *args, formato='dataframe', alertar=False)
+    return df, next((r["erro"] for r in registros if r["erro"]), None)
 
 def mostrar_consultas():
     st.header("8. 📊 Relatórios e Consultas Complexas (Fase 3/4)")
-    
-    # --- Consulta 1 (Fase 3: 3+ Tabelas) ---
-    st.subheader("1. Participantes por Palestra e Evento (Fase 3)")
-    st.caption("Consulta: Listagem de todas as inscrições, mostrando Participante, Palestra, Evento e Data da Inscrição.")
-    colunas, dados = consulta_participantes_palestra(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Nenhuma inscrição encontrada ou erro.")
-
-    st.markdown("---")
-    st.title("Consultas Fase 4 (Análise Avançada)")
-
-    # --- Consulta 2 (Aninhada 1) ---
-    st.subheader("2. Pessoas NÃO Inscritas em um Evento Específico")
-    st.caption("Requisito: Consulta com SELECT aninhado. Identifica participantes que não se inscreveram em nenhuma palestra de um evento selecionado.")
-    
-    _, dados_eventos = buscar_ids_nomes(snowpark_session, 'EVENTOS')
-    eventos_map = {nome: id for id, nome in dados_eventos} if dados_eventos else {}
-    eventos_list = list(eventos_map.keys())
-
-    if eventos_list:
-        nome_evento_sel = st.selectbox("Selecione o Evento de Referência", eventos_list, key="aninhada_1_event")
-        evento_id_ref = eventos_map[nome_evento_sel]
 
-        colunas, dados = consulta_aninhada_1_nao_inscritos_em_evento_x(snowpark_session, evento_id_ref)
-        if dados and colunas:
-            df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-            st.dataframe(df, use_container_width=True)
-        else:
-            st.info("Todos os participantes estão inscritos no evento selecionado ou não há dados.")
-    else:
-        st.warning("Cadastre eventos primeiro para rodar esta consulta.")
+    # Cada relatório: (título, legenda, mensagem se vazio, função, argumentos extras)
+    relatorios = {
+        "participantes_palestra": (
+            "1. Participantes por Palestra e Evento (Fase 3)",
+            "Consulta: Listagem de todas as inscrições, mostrando Participante, Palestra, Evento e Data da Inscrição.",
+            "Nenhuma inscrição encontrada ou erro.",
+            consulta_participantes_palestra, (),
+        ),
+        "aninhada_1": (
+            "2. Pessoas NÃO Inscritas em um Evento Específico",
+            "Requisito: Consulta com SELECT aninhado. Identifica participantes que não se inscreveram em nenhuma palestra de um evento selecionado.",
+            "Todos os participantes estão inscritos no evento selecionado ou não há dados.",
+            consulta_aninhada_1_nao_inscritos_em_evento_x, None,
+        ),
+        "aninhada_2": (
+            "3. Palestras com Nota Média Acima da Média Geral",
+            "Requisito: Consulta com SELECT aninhado. Compara a nota média de cada palestra com a média de feedback de todas as palestras.",
+            "Não há feedbacks suficientes para esta análise.",
+            consulta_aninhada_2_palestras_acima_media, (),
+        ),
+        "grupo_1": (
+            "4. Produtividade e Arrecadação por Organizador",
+            "Requisito: Consulta com função de grupo (COUNT e SUM, com GROUP BY e HAVING). Mostra o total de eventos organizados e o valor total arrecadado por pagamentos associados a esses eventos.",
+            "Nenhum organizador encontrado ou sem eventos/pagamentos.",
+            consulta_grupo_1_total_eventos_por_organizador, (),
+        ),
+        "grupo_2": (
+            "5. Estatísticas de Pagamento por Status",
+            "Requisito: Consulta com função de grupo (AVG, MAX, MIN). Fornece a média, máximo e mínimo dos valores de pagamento para cada status (Confirmado, Pendente, Cancelado).",
+            "Nenhum pagamento registrado.",
+            consulta_grupo_2_estatisticas_por_status_pagamento, (),
+        ),
+        "conjunto_1": (
+            "6. Lista Consolidada de Atores Financeiros",
+            "Requisito: Consulta com operador de conjunto (UNION). Lista todos os Organizadores E todos os Participantes que efetuaram algum pagamento.",
+            "Nenhum dado financeiro ou de organização encontrado.",
+            consulta_conjunto_1_atores_financeiros, (),
+        ),
+        "conjunto_2": (
+            "7. Palestras com Inscrição, mas Sem Feedback",
+            "Requisito: Consulta com operador de conjunto (EXCEPT). Identifica palestras que possuem inscrições registradas, mas que ainda não receberam nenhum feedback.",
+            "Todas as palestras com inscrições têm feedback, ou não há dados.",
+            consulta_conjunto_2_palestras_sem_feedback, (),
+        ),
+    }
+
+    # Primeiro desenha a estrutura da página com um espaço reservado por relatório;
+    # as consultas rodam em paralelo e cada seção é preenchida quando a sua termina.
+    espacos = {}
+    for nome, (titulo, legenda, _, _, args) in relatorios.items():
+        if nome == "aninhada_1":
+            st.markdown("---")
+            st.title("Consultas Fase 4 (Análise Avançada)")
+        elif nome != "participantes_palestra":
+            st.markdown("---")
+        st.subheader(titulo)
+        st.caption(legenda)
+
+        if nome == "aninhada_1":
+            _, dados_eventos = buscar_ids_nomes(snowpark_session, 'EVENTOS')
+            eventos_map = {nome_evento: id for id, nome_evento in dados_eventos} if dados_eventos else {}
+            eventos_list = list(eventos_map.keys())
+            if not eventos_list:
+                st.warning("Cadastre eventos primeiro para rodar esta consulta.")
+                continue
+            nome_evento_sel = st.selectbox("Selecione o Evento de Referência", eventos_list, key="aninhada_1_event")
+            relatorios[nome] = relatorios[nome][:4] + ((eventos_map[nome_evento_sel],),)
+
+        espacos[nome] = st.empty()
+        espacos[nome].info("⏳ Executando consulta...")
+
+    tarefas = {
+        nome: (ler_relatorio, (relatorios[nome][3], *relatorios[nome][4]), {})
+        for nome in espacos
+    }
+    tempos = {}
+    for nome, (df, erro), segundos in executar_em_paralelo(snowpark_session, tarefas):
+        tempos[relatorios[nome][0]] = segundos
+        with espacos[nome].container():
+            if erro:
+                st.error(f"Erro na consulta: {erro}")
+            elif not df.empty:
+                st.dataframe(df, use_container_width=True)
+                botao_exportar(nome, relatorios[nome][4])
+                if nome == "participantes_palestra":
+                    painel_descarga(nome)
+            else:
+                st.info(relatorios[nome][2])
+            st.caption(f"⏱️ {segundos:.2f}s")
 
     st.markdown("---")
-
-    # --- Consulta 3 (Aninhada 2) ---
-    st.subheader("3. Palestras com Nota Média Acima da Média Geral")
-    st.caption("Requisito: Consulta com SELECT aninhado. Compara a nota média de cada palestra com a média de feedback de todas as palestras.")
-    colunas, dados = consulta_aninhada_2_palestras_acima_media(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Não há feedbacks suficientes para esta análise.")
-
-    st.markdown("---")
-
-    # --- Consulta 4 (Grupo 1) ---
-    st.subheader("4. Produtividade e Arrecadação por Organizador")
-    st.caption("Requisito: Consulta com função de grupo (COUNT e SUM, com GROUP BY e HAVING). Mostra o total de eventos organizados e o valor total arrecadado por pagamentos associados a esses eventos.")
-    colunas, dados = consulta_grupo_1_total_eventos_por_organizador(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Nenhum organizador encontrado ou sem eventos/pagamentos.")
-
-    st.markdown("---")
-
-    # --- Consulta 5 (Grupo 2) ---
-    st.subheader("5. Estatísticas de Pagamento por Status")
-    st.caption("Requisito: Consulta com função de grupo (AVG, MAX, MIN). Fornece a média, máximo e mínimo dos valores de pagamento para cada status (Confirmado, Pendente, Cancelado).")
-    colunas, dados = consulta_grupo_2_estatisticas_por_status_pagamento(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Nenhum pagamento registrado.")
-
-    st.markdown("---")
-
-    # --- Consulta 6 (Conjunto 1) ---
-    st.subheader("6. Lista Consolidada de Atores Financeiros")
-    st.caption("Requisito: Consulta com operador de conjunto (UNION). Lista todos os Organizadores E todos os Participantes que efetuaram algum pagamento.")
-    colunas, dados = consulta_conjunto_1_atores_financeiros(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Nenhum dado financeiro ou de organização encontrado.")
-
-    st.markdown("---")
-
-    # --- Consulta 7 (Conjunto 2) ---
-    st.subheader("7. Palestras com Inscrição, mas Sem Feedback")
-    st.caption("Requisito: Consulta com operador de conjunto (EXCEPT). Identifica palestras que possuem inscrições registradas, mas que ainda não receberam nenhum feedback.")
-    colunas, dados = consulta_conjunto_2_palestras_sem_feedback(snowpark_session)
-    if dados and colunas:
-        df = pd.DataFrame(dados, columns=[c.upper() for c in colunas])
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("Todas as palestras com inscrições têm feedback, ou não há dados.")
+    with st.expander("Tempos por consulta"):
+        st.dataframe(
+            pd.DataFrame({"CONSULTA": list(tempos.keys()), "SEGUNDOS": list(tempos.values())}).sort_values("SEGUNDOS", ascending=False),
+            use_container_width=True,
+        )
 
 
 # --- NAVEGAÇÃO PRINCIPAL (ROUTER) ---
@@ -771,6 +935,13 @@ st.sidebar.caption("Exercício-Programa 2/25 - USP EACH")
 def router():
     page = st.session_state.page
 
+    aviso = st.session_state.pop("aviso_escrita", None)
+    if aviso:
+        st.success(aviso)
+
+    # Listas de opções da página de cadastro numa única consulta (as que estão no cache ficam de fora)
+    carregar_listas_da_pagina(snowpark_session, page)
+
     if page == 'Home':
         st.title("Bem-vindo à Plataforma de Gerenciamento de Eventos")
         st.info("Utilize o menu lateral para acessar as funcionalidades de Manutenção e Relatórios.")
@@ -795,6 +966,22 @@ def router():
         mostrar_consultas()
 
 if snowpark_session:
+    # Coleta desta renderização (contexto do script): não mistura outros usuários nem as threads
+    # de aquecimento e reconciliação, como faria o contador global de round trips
+    consultas_da_renderizacao = iniciar_coleta(st.session_state.page)
     router()
+    st.sidebar.caption(f"Consultas ao Snowflake nesta renderização: {len(consultas_da_renderizacao)}")
+    with st.sidebar.expander("Pool de sessões"):
+        st.json(metricas_pool())
+
+    # Painel de depuração: as consultas mais lentas desta renderização
+    if st.sidebar.checkbox("Mostrar consultas mais lentas", key="debug_consultas"):
+        st.markdown("---")
+        st.subheader("🐞 Consultas mais lentas desta renderização")
+        if consultas_da_renderizacao:
+            df_consultas = pd.DataFrame(consultas_da_renderizacao).sort_values("segundos", ascending=False).head(10)
+            st.dataframe(df_consultas, use_container_width=True)
+        else:
+            st.info("Nenhuma consulta ao banco nesta renderização (tudo veio do cache).")
 else:
     st.error("Não foi possível estabelecer a conexão com o Snowflake/Snowpark. Verifique as credenciais no arquivo `snowpark_utils.py`.")
\ No newline at end of file
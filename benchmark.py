@@ -0,0 +1,564 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+# Benchmark das funções do db_utils e das páginas do app.py em várias escalas de dados.
+# Por padrão roda no backend local (DuckDB em memória, ver db_local.py), sem tocar no Snowflake:
+#
+#   python benchmark.py --escalas 10000 100000 --saida resultados.json
+#   python benchmark.py --escalas 10000 --comparar resultados_anteriores.json
+#   python benchmark.py --escalas 10000 --sem-paginas --memoria   # pico de memória por formato, 1M pagamentos
+#
+# Cada escala apaga as tabelas, gera dados sintéticos e mede cada função "fria" (cache de
+# leituras vazio) e "quente" (logo em seguida, servida pelo cache). As páginas são renderizadas
+# com o AppTest do Streamlit, que executa o app.py sem navegador.
+os.environ.setdefault("BD2_BACKEND", "local")
+# Sem o aquecimento do app.py: a renovação em segundo plano mascararia as medições "frias"
+os.environ.setdefault("BD2_AQUECIMENTO", "0")
+
+import numpy as np
+import pandas as pd
+
+import db_utils as db
+
+TABELAS = ['FEEDBACK_PALESTRAS', 'PAGAMENTOS', 'INSCRICOES', 'PALESTRAS', 'EVENTOS', 'TIPOS_PAGAMENTO', 'PESSOAS']
+PAGINAS = ['Home', 'Pessoas', 'Eventos', 'Palestras', 'Inscricoes', 'Pagamentos', 'Tipos_Pagamento', 'Feedback', 'Consultas']
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago", "Vitória", "Yuri"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Ferreira", "Almeida", "Ribeiro"]
+TIPOS_PAGAMENTO = ["Pix", "Cartão de Crédito", "Boleto", "Transferência"]
+STATUS_PAGAMENTO = ["Confirmado", "Pendente", "Cancelado"]
+
+# Proporções derivadas do número de pessoas
+FRACAO_ORGANIZADORES = 0.02
+FRACAO_PALESTRANTES = 0.08
+PESSOAS_POR_EVENTO = 200
+PALESTRAS_POR_EVENTO = 8
+FRACAO_PAGAMENTOS = 0.5     # em relação às inscrições
+FRACAO_FEEDBACK = 0.25      # das inscrições que deixam feedback
+TAMANHO_LOTE_CARGA = 100000
+BUSCAS_REPETIDAS = 20       # buscas por ID seguidas em cada variante (ver medir_buscas_repetidas)
+MEMORIA_LINHAS = 1000000    # linhas de PAGAMENTOS na medição de memória (--memoria sem valor)
+FORMATOS_LEITURA = ['listas', 'dataframe', 'lotes']
+N_MAIS_1_MAX_PESSOAS = 10000  # maior escala em que a linha de base N+1 de buscar_pessoas_por_tipo é medida
+
+# --- GERAÇÃO DE DADOS ---
+
+def limpar_tabelas(session):
+    for tabela in TABELAS:
+        db.executar_snowpark_dml(session, f"DELETE FROM {tabela}")
+    db.invalidar_cache()
+
+def carregar(session, tabela, df):
+    relatorio = db.inserir_em_lote(session, tabela, list(df.columns), df, TAMANHO_LOTE_CARGA, usar_write_pandas=True)
+    falhas = [lote["erro"] for lote in relatorio if lote["erro"]]
+    if falhas:
+        raise RuntimeError(f"Falha ao carregar {tabela}: {falhas[0]}")
+
+def ids_de(resultado):
+    _, dados = resultado
+    return np.array([linha[0] for linha in dados])
+
+def datas_aleatorias(rng, n, inicio=date(2025, 1, 1), dias=365):
+    base = np.datetime64(inicio)
+    return (base + rng.integers(0, dias, n).astype('timedelta64[D]')).astype(str)
+
+def gerar_dados(session, n_pessoas, n_inscricoes, semente=0):
+    # Carrega as sete tabelas e devolve os IDs gerados, usados para escolher argumentos das funções.
+    # Os IDs são lidos de volta do banco, então a geração não depende de a sequência começar em 1.
+    rng = np.random.default_rng(semente)
+
+    tipos = rng.choice(["Organizador", "Palestrante", "Participante"], n_pessoas,
+                       p=[FRACAO_ORGANIZADORES, FRACAO_PALESTRANTES, 1 - FRACAO_ORGANIZADORES - FRACAO_PALESTRANTES])
+    tipos[:3] = ["Organizador", "Palestrante", "Participante"]
+    nomes = np.char.add(np.char.add(rng.choice(NOMES, n_pessoas), " "), rng.choice(SOBRENOMES, n_pessoas))
+    nomes = np.char.add(np.char.add(nomes, " "), np.arange(n_pessoas).astype(str))
+    carregar(session, 'PESSOAS', pd.DataFrame({
+        "nome": nomes,
+        "email": [f"pessoa{i}@exemplo.com" for i in range(n_pessoas)],
+        "telefone": [f"11 9{i:08d}" for i in range(n_pessoas)],
+        "tipo_pessoa": tipos,
+    }))
+    organizadores = ids_de(db.buscar_pessoas_por_tipo(session, "Organizador"))
+    palestrantes = ids_de(db.buscar_pessoas_por_tipo(session, "Palestrante"))
+    participantes = ids_de(db.buscar_pessoas_por_tipo(session, "Participante"))
+
+    carregar(session, 'TIPOS_PAGAMENTO', pd.DataFrame({"nome": TIPOS_PAGAMENTO}))
+    tipos_pagamento = ids_de(db.buscar_ids_nomes(session, 'TIPOS_PAGAMENTO'))
+
+    n_eventos = max(1, n_pessoas // PESSOAS_POR_EVENTO)
+    inicio = datas_aleatorias(rng, n_eventos)
+    carregar(session, 'EVENTOS', pd.DataFrame({
+        "nome": [f"Evento {i}" for i in range(n_eventos)],
+        "data_inicio": inicio,
+        "data_fim": (inicio.astype('datetime64[D]') + rng.integers(0, 4, n_eventos)).astype(str),
+        "local": rng.choice(["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Online"], n_eventos),
+        "organizador_id": rng.choice(organizadores, n_eventos),
+    }))
+    eventos = ids_de(db.buscar_ids_nomes(session, 'EVENTOS'))
+
+    n_palestras = n_eventos * PALESTRAS_POR_EVENTO
+    carregar(session, 'PALESTRAS', pd.DataFrame({
+        "titulo": [f"Palestra {i}" for i in range(n_palestras)],
+        "descricao": "Descrição gerada para o benchmark",
+        "data": datas_aleatorias(rng, n_palestras),
+        "hora": [f"{h:02d}:00:00" for h in rng.integers(8, 20, n_palestras)],
+        "sala": rng.choice(["A", "B", "C", "Auditório"], n_palestras),
+        "evento_id": np.repeat(eventos, PALESTRAS_POR_EVENTO)[:n_palestras],
+        "palestrante_id": rng.choice(palestrantes, n_palestras),
+    }))
+    palestras = ids_de(db.buscar_ids_nomes(session, 'PALESTRAS', 'TITULO'))
+
+    # Pares (participante, palestra) distintos, por causa da chave primária de INSCRICOES
+    n_inscricoes = min(n_inscricoes, len(participantes) * len(palestras))
+    pares = rng.choice(len(participantes) * len(palestras), n_inscricoes, replace=False)
+    inscritos = participantes[pares // len(palestras)]
+    palestras_inscritas = palestras[pares % len(palestras)]
+    carregar(session, 'INSCRICOES', pd.DataFrame({
+        "participante_id": inscritos,
+        "palestra_id": palestras_inscritas,
+        "data_inscricao": datas_aleatorias(rng, n_inscricoes),
+    }))
+
+    n_pagamentos = int(n_inscricoes * FRACAO_PAGAMENTOS)
+    carregar(session, 'PAGAMENTOS', pd.DataFrame({
+        "participante_id": rng.choice(participantes, n_pagamentos),
+        "evento_id": rng.choice(eventos, n_pagamentos),
+        "valor": rng.integers(5000, 50000, n_pagamentos) / 100,
+        "status": rng.choice(STATUS_PAGAMENTO, n_pagamentos, p=[0.7, 0.2, 0.1]),
+        "tipo_pagamento_id": rng.choice(tipos_pagamento, n_pagamentos),
+    }))
+
+    com_feedback = rng.choice(n_inscricoes, int(n_inscricoes * FRACAO_FEEDBACK), replace=False)
+    carregar(session, 'FEEDBACK_PALESTRAS', pd.DataFrame({
+        "participante_id": inscritos[com_feedback],
+        "palestra_id": palestras_inscritas[com_feedback],
+        "nota": rng.integers(1, 6, len(com_feedback)),
+        "comentario": rng.choice(["Ótima", "Boa", "Regular", None], len(com_feedback)),
+    }))
+
+    # A carga em lote não passa pelos deltas dos resumos dos relatórios de grupo
+    db.reconstruir_resumos(session)
+    db.invalidar_cache()
+    return {
+        "participante": int(participantes[0]), "organizador": int(organizadores[0]), "palestrante": int(palestrantes[0]),
+        "evento": int(eventos[0]), "palestra": int(palestras[0]), "tipo_pagamento": int(tipos_pagamento[0]),
+        "eventos": [int(e) for e in eventos[:5]],
+        "linhas": {"PESSOAS": n_pessoas, "EVENTOS": n_eventos, "PALESTRAS": n_palestras, "INSCRICOES": n_inscricoes,
+                   "PAGAMENTOS": n_pagamentos, "FEEDBACK_PALESTRAS": len(com_feedback)},
+    }
+
+# --- CONSULTAS DE REFERÊNCIA ---
+# Versões anteriores às reescritas dos relatórios: medidas ao lado das atuais e usadas pelos
+# testes (tests/) para conferir que a reescrita devolve as mesmas linhas
+
+# Duas subconsultas correlacionadas por palestra (antes do GROUP BY único)
+SQL_ANINHADA_2_ORIGINAL = """
+    SELECT
+        titulo,
+        (SELECT AVG(nota) FROM FEEDBACK_PALESTRAS F2 WHERE F2.palestra_id = P.id) AS media_palestra
+    FROM
+        PALESTRAS P
+    WHERE
+        (SELECT AVG(nota) FROM FEEDBACK_PALESTRAS F WHERE F.palestra_id = P.id) > (
+            SELECT AVG(nota) FROM FEEDBACK_PALESTRAS
+        )
+    ORDER BY media_palestra DESC;
+    """
+
+# NOT IN com subconsulta não correlacionada (antes do NOT EXISTS)
+SQL_ANINHADA_1_ORIGINAL = """
+    SELECT
+        nome, email
+    FROM
+        PESSOAS
+    WHERE
+        tipo_pessoa = 'Participante'
+        AND id NOT IN (
+            SELECT DISTINCT
+                participante_id
+            FROM
+                INSCRICOES I
+            JOIN PALESTRAS L ON I.palestra_id = L.id
+            WHERE
+                L.evento_id = %s
+        );
+    """
+
+def pessoas_por_tipo_pessoa_a_pessoa(session, *tipos_pessoa):
+    # O que buscar_pessoas_por_tipo substituiu (N+1): lista as pessoas e busca o registro de cada
+    # uma, direto no banco, só para ler o papel; devolve (ID, NOME, TIPO_PESSOA)
+    tipos = {t.upper() for t in tipos_pessoa}
+    _, pessoas = db.executar_snowpark_select(session, "SELECT ID, NOME FROM PESSOAS")
+    linhas = []
+    for id_pessoa, nome in pessoas:
+        _, dados = db.executar_snowpark_select(session, "SELECT * FROM PESSOAS WHERE ID = %s", (id_pessoa,))
+        if dados and dados[0][4].upper() in tipos:
+            linhas.append((id_pessoa, nome, dados[0][4]))
+    return linhas
+
+def buscar_por_id_literal(session, tabela, id_registro):
+    # buscar_registro_por_id sem bind: o ID vai no texto do SQL, que muda a cada ID
+    sql = f"SELECT * FROM {tabela} WHERE ID = {int(id_registro)}"
+    return db.registro_do_dataframe(db.executar_snowpark_select(session, sql, formato='dataframe'))
+
+def nao_inscritos_evento_a_evento(session, eventos_ids):
+    # O que a versão em lote substitui: uma consulta por evento; devolve (evento_id, nome, email)
+    linhas = []
+    for evento_id in eventos_ids:
+        _, dados = db.consulta_aninhada_1_nao_inscritos_em_evento_x(session, evento_id)
+        linhas += [(evento_id, *linha) for linha in dados]
+    return linhas
+
+# --- CASOS MEDIDOS ---
+
+def casos_de_leitura(ids):
+    # (nome, função, args, kwargs) de cada leitura medida
+    casos = [
+        ("ler_pessoas", db.ler_pessoas, (), {}),
+        ("ler_eventos", db.ler_eventos, (), {}),
+        ("ler_palestras", db.ler_palestras, (), {}),
+        ("ler_inscricoes", db.ler_inscricoes, (), {}),
+        ("ler_pagamentos", db.ler_pagamentos, (), {}),
+        ("ler_tipos_pagamento", db.ler_tipos_pagamento, (), {}),
+        ("ler_feedback", db.ler_feedback, (), {}),
+        ("buscar_ids_nomes[EVENTOS]", db.buscar_ids_nomes, ('EVENTOS',), {}),
+        ("buscar_pessoas_por_tipo[Organizador]", db.buscar_pessoas_por_tipo, ("Organizador",), {}),
+        ("buscar_registro_por_id[PESSOAS]", db.buscar_registro_por_id, ('PESSOAS', ids["participante"]), {}),
+        ("buscar_opcoes[PESSOAS]", db.buscar_opcoes, ('PESSOAS',), {}),
+        ("buscar_opcoes[PESSOAS,'Ma']", db.buscar_opcoes, ('PESSOAS', "Ma"), {}),
+        ("buscar_opcoes[INSCRICOES,'Ana']", db.buscar_opcoes, ('INSCRICOES', "Ana"), {}),
+        ("buscar_opcao_por_id[EVENTOS]", db.buscar_opcao_por_id, ('EVENTOS', ids["evento"]), {}),
+        ("ler_pagina[PESSOAS]", db.ler_pagina, ('PESSOAS',), {}),
+        ("ler_pagina[INSCRICOES,DATA_INSCRICAO desc]", db.ler_pagina, ('INSCRICOES',), {"ordenar_por": "DATA_INSCRICAO", "decrescente": True}),
+        ("ler_pagina[PAGAMENTOS,filtro]", db.ler_pagina, ('PAGAMENTOS',), {"filtro": ("PARTICIPANTE", "Ana")}),
+        ("consulta_participantes_palestra", db.consulta_participantes_palestra, (), {}),
+        ("consulta_aninhada_1_nao_inscritos_em_evento_x", db.consulta_aninhada_1_nao_inscritos_em_evento_x, (ids["evento"],), {}),
+        ("consulta_aninhada_1_nao_inscritos_em_evento_x[original]", db.executar_snowpark_select, (SQL_ANINHADA_1_ORIGINAL, (ids["evento"],)), {}),
+        ("consulta_aninhada_1_nao_inscritos_em_evento_x[5 consultas]", nao_inscritos_evento_a_evento, (ids["eventos"],), {}),
+        ("consulta_aninhada_1_nao_inscritos_por_evento[5]", db.consulta_aninhada_1_nao_inscritos_por_evento, (ids["eventos"],), {}),
+        ("consulta_aninhada_2_palestras_acima_media", db.consulta_aninhada_2_palestras_acima_media, (), {}),
+        ("consulta_aninhada_2_palestras_acima_media[original]", db.executar_snowpark_select, (SQL_ANINHADA_2_ORIGINAL,), {}),
+        ("consulta_grupo_1_total_eventos_por_organizador", db.consulta_grupo_1_total_eventos_por_organizador, (), {}),
+        ("consulta_grupo_2_estatisticas_por_status_pagamento", db.consulta_grupo_2_estatisticas_por_status_pagamento, (), {}),
+        ("consulta_conjunto_1_atores_financeiros", db.consulta_conjunto_1_atores_financeiros, (), {}),
+        ("consulta_conjunto_2_palestras_sem_feedback", db.consulta_conjunto_2_palestras_sem_feedback, (), {}),
+    ]
+    if ids["linhas"]["PESSOAS"] <= N_MAIS_1_MAX_PESSOAS:
+        # Uma consulta por pessoa: em escalas maiores a linha de base dominaria o tempo do benchmark
+        casos.append(("buscar_pessoas_por_tipo[Organizador][N+1]", pessoas_por_tipo_pessoa_a_pessoa, ("Organizador",), {}))
+    return casos
+
+def casos_de_escrita(session, ids, repeticao):
+    # Escritas de uma linha; cada repetição cria seus próprios registros para não colidir com as anteriores
+    email = f"benchmark{repeticao}@exemplo.com"
+    hoje = date(2025, 6, 1)
+
+    def id_criado(tabela, coluna, valor):
+        _, dados = db.executar_snowpark_select(session, f"SELECT MAX(ID) FROM {tabela} WHERE {coluna} = %s", (valor,))
+        return dados[0][0]
+
+    def atualizar_pessoa_criada():
+        id_pessoa = id_criado('PESSOAS', 'EMAIL', email)
+        return db.atualizar_pessoa(session, id_pessoa, "Benchmark Atualizado", email, None, "Participante")
+
+    def atualizar_pagamento_criado():
+        id_pagamento = id_criado('PAGAMENTOS', 'PARTICIPANTE_ID', ids["participante"])
+        return db.atualizar_pagamento(session, id_pagamento, 99.9, "Pendente", ids["tipo_pagamento"])
+
+    def deletar_pessoa_criada():
+        return db.deletar_registro_por_id(session, 'PESSOAS', id_criado('PESSOAS', 'EMAIL', email))
+
+    return [
+        ("criar_pessoa", db.criar_pessoa, (session, "Benchmark", email, None, "Participante"), {}),
+        ("atualizar_pessoa", atualizar_pessoa_criada, (), {}),
+        ("criar_evento", db.criar_evento, (session, f"Evento benchmark {repeticao}", hoje, hoje + timedelta(days=1), "Online", ids["organizador"]), {}),
+        ("criar_pagamento", db.criar_pagamento, (session, ids["participante"], ids["evento"], 150.0, "Confirmado", ids["tipo_pagamento"]), {}),
+        ("atualizar_pagamento", atualizar_pagamento_criado, (), {}),
+        ("upsert_feedback", db.upsert_feedback, (session, ids["participante"], ids["palestra"], 1 + repeticao % 5, "Benchmark"), {}),
+        ("deletar_registro_por_id[PESSOAS]", deletar_pessoa_criada, (), {}),
+    ]
+
+# --- MEDIÇÃO ---
+
+def contar_linhas(resultado):
+    if isinstance(resultado, tuple) and len(resultado) == 2:
+        primeiro = resultado[0]
+        return len(primeiro) if isinstance(primeiro, pd.DataFrame) else len(resultado[1])
+    if isinstance(resultado, db.Registro) or (isinstance(resultado, list) and resultado and not isinstance(resultado[0], (list, tuple))):
+        return 1  # um único registro, como o de buscar_registro_por_id
+    if isinstance(resultado, (pd.DataFrame, dict, list)):
+        return len(resultado)
+    return None
+
+def medir(funcao, *args, **kwargs):
+    # (segundos, linhas, round trips, erro) de uma chamada
+    db.zerar_round_trips()
+    inicio = time.perf_counter()
+    try:
+        resultado = funcao(*args, **kwargs)
+        erro = resultado if isinstance(resultado, str) else None
+    except Exception as e:
+        resultado, erro = None, f"{type(e).__name__}: {e}"
+    segundos = time.perf_counter() - inicio
+    return segundos, contar_linhas(resultado), db.contar_round_trips(), erro
+
+def registro(escala, tipo, nome, modo, repeticao, medicao, pico_bytes=None, compilacao_s=None, reuso=None):
+    segundos, linhas, round_trips, erro = medicao
+    return {"escala": escala, "tipo": tipo, "nome": nome, "modo": modo, "repeticao": repeticao,
+            "segundos": round(segundos, 6), "linhas": linhas, "round_trips": round_trips, "erro": erro,
+            "pico_bytes": pico_bytes, "compilacao_s": compilacao_s, "reuso": reuso}
+
+def medir_funcoes(session, escala, ids, repeticoes):
+    resultados = []
+    for repeticao in range(repeticoes):
+        for nome, funcao, args, kwargs in casos_de_leitura(ids):
+            db.invalidar_cache()
+            resultados.append(registro(escala, "funcao", nome, "frio", repeticao, medir(funcao, session, *args, **kwargs)))
+            resultados.append(registro(escala, "funcao", nome, "quente", repeticao, medir(funcao, session, *args, **kwargs)))
+        for nome, funcao, args, kwargs in casos_de_escrita(session, ids, repeticao):
+            resultados.append(registro(escala, "escrita", nome, "frio", repeticao, medir(funcao, *args, **kwargs)))
+    return resultados
+
+def medir_buscas_repetidas(session, escala, repeticoes):
+    # Buscas seguidas por ID em PAGAMENTOS (fora do repositório: uma consulta por chamada), nas
+    # quatro combinações de IDs (distintos ou sempre o mesmo) e SQL (com bind, como o
+    # buscar_registro_por_id, ou com o ID no texto). Com bind o texto não muda e a primeira chamada
+    # paga a compilação; com o mesmo ID o Snowflake pode devolver o resultado guardado.
+    # "primeira" e "seguintes" separam os custos; o tempo de compilação e o reuso de cada chamada
+    # vêm do QUERY_HISTORY, pelo query_id registrado (só no Snowflake)
+    por_variante = BUSCAS_REPETIDAS + 1
+    total = 2 * por_variante * repeticoes
+    _, dados = db.executar_snowpark_select(session, f"SELECT ID FROM PAGAMENTOS ORDER BY ID LIMIT {total}")
+    # Cada variante usa IDs só seus: a primeira busca de uma não reaproveita o resultado de outra
+    proximos = itertools.cycle([linha[0] for linha in dados])
+    buscas = {"bind": db.buscar_registro_por_id, "literal": buscar_por_id_literal}
+    medicoes = []
+    for repeticao in range(repeticoes):
+        for ids_modo in ("distintos", "identicos"):
+            for sql_modo, funcao in buscas.items():
+                if ids_modo == "distintos":
+                    lote = [next(proximos) for _ in range(BUSCAS_REPETIDAS)]
+                else:
+                    lote = [next(proximos)] * BUSCAS_REPETIDAS
+                nome = f"buscar_registro_por_id[PAGAMENTOS] ids {ids_modo}, {sql_modo}"
+                db.invalidar_cache()
+                for i, id_pagamento in enumerate(lote):
+                    with db.coleta_parcial() as consultas:
+                        medicao = medir(funcao, session, 'PAGAMENTOS', id_pagamento)
+                    query_id = next((c["query_id"] for c in reversed(consultas) if c["query_id"]), None)
+                    medicoes.append((nome, "primeira" if i == 0 else "seguintes", repeticao, medicao, query_id))
+
+    historico = historico_das_consultas(session, [query_id for *_, query_id in medicoes])
+    resultados = []
+    for nome, modo, repeticao, medicao, query_id in medicoes:
+        compilacao_s, reuso = historico.get(query_id, (None, None))
+        resultados.append(registro(escala, "funcao", nome, modo, repeticao, medicao, compilacao_s=compilacao_s, reuso=reuso))
+    return resultados
+
+def historico_das_consultas(session, query_ids):
+    # query_id -> (COMPILATION_TIME em segundos, resultado reaproveitado) do QUERY_HISTORY.
+    # Não há coluna de reuso: uma consulta servida pelo cache de resultados não executa nem lê
+    # bytes. O backend local não tem histórico (nem query_id nas leituras): devolve {}
+    query_ids = sorted({q for q in query_ids if q})
+    if db.BACKEND == "local" or not query_ids:
+        return {}
+    sql = f"""
+        SELECT QUERY_ID, COMPILATION_TIME, EXECUTION_TIME, BYTES_SCANNED
+        FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(RESULT_LIMIT => 10000))
+        WHERE QUERY_ID IN ({", ".join(["%s"] * len(query_ids))})
+    """
+    _, dados = db.executar_snowpark_select(session, sql, query_ids, alertar=False)
+    return {query_id: (compilacao_ms / 1000, execucao_ms == 0 and bytes_lidos == 0)
+            for query_id, compilacao_ms, execucao_ms, bytes_lidos in dados}
+
+def completar_pagamentos(session, ids, total, semente=0):
+    # Leva PAGAMENTOS a `total` linhas com pagamentos sintéticos do mesmo participante
+    _, dados = db.executar_snowpark_select(session, "SELECT COUNT(*) FROM PAGAMENTOS")
+    faltam = total - dados[0][0]
+    if faltam <= 0:
+        return
+    rng = np.random.default_rng(semente)
+    carregar(session, 'PAGAMENTOS', pd.DataFrame({
+        "participante_id": ids["participante"],
+        "evento_id": rng.choice(ids["eventos"], faltam),
+        "valor": rng.integers(5000, 50000, faltam) / 100,
+        "status": rng.choice(STATUS_PAGAMENTO, faltam, p=[0.7, 0.2, 0.1]),
+        "tipo_pagamento_id": ids["tipo_pagamento"],
+    }))
+    db.reconstruir_resumos(session)
+    db.invalidar_cache()
+
+def ler_no_formato(session, formato):
+    # Leitura completa de PAGAMENTOS. Em lotes, cada lote é descartado depois de contado e sobra
+    # um DataFrame sem colunas (só o RangeIndex), para a contagem de linhas sair como nos outros
+    resultado = db.executar_snowpark_select(session, "SELECT * FROM PAGAMENTOS", formato=formato)
+    if formato == 'lotes':
+        return pd.DataFrame(index=pd.RangeIndex(sum(len(lote) for lote in resultado)))
+    return resultado
+
+def medir_memoria(session, escala, ids, linhas, repeticoes):
+    # Pico de memória alocada (tracemalloc: objetos Python e arrays do numpy/pandas) de cada
+    # formato do executar_snowpark_select. O buffer do driver (Arrow/DuckDB) fica de fora, e os
+    # tempos saem inflados pelo rastreamento: compare os picos, não os segundos
+    completar_pagamentos(session, ids, linhas)
+    resultados = []
+    for repeticao in range(repeticoes):
+        for formato in FORMATOS_LEITURA:
+            tracemalloc.start()
+            try:
+                medicao = medir(ler_no_formato, session, formato)
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            resultados.append(registro(escala, "memoria", f"executar_snowpark_select[PAGAMENTOS,{formato}]", "frio",
+                                       repeticao, medicao, pico))
+    return resultados
+
+def renderizar_pagina(pagina, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=timeout)
+    app.session_state["page"] = pagina
+    app.run()
+    if app.exception:
+        return "; ".join(e.message for e in app.exception)
+    return None
+
+def medir_paginas(escala, repeticoes, timeout):
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        print("streamlit.testing indisponível; páginas não serão medidas", file=sys.stderr)
+        return []
+
+    resultados = []
+    for repeticao in range(repeticoes):
+        for pagina in PAGINAS:
+            db.invalidar_cache()
+            resultados.append(registro(escala, "pagina", pagina, "frio", repeticao, medir(renderizar_pagina, pagina, timeout)))
+            resultados.append(registro(escala, "pagina", pagina, "quente", repeticao, medir(renderizar_pagina, pagina, timeout)))
+    return resultados
+
+# --- SAÍDA E COMPARAÇÃO ---
+
+def metadados(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"data": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "backend": db.BACKEND,
+            "python": platform.python_version(), "plataforma": platform.platform(),
+            "escalas": args.escalas, "repeticoes": args.repeticoes, "semente": args.semente}
+
+def resumir(resultados):
+    # Mediana por (escala, tipo, nome, modo); erros ficam de fora da mediana
+    grupos = {}
+    for r in resultados:
+        grupos.setdefault((r["escala"], r["tipo"], r["nome"], r["modo"]), []).append(r)
+    resumo = []
+    for (escala, tipo, nome, modo), linhas in grupos.items():
+        validas = [r["segundos"] for r in linhas if not r["erro"]]
+        picos = [r["pico_bytes"] for r in linhas if not r["erro"] and r["pico_bytes"] is not None]
+        compilacoes = [r["compilacao_s"] for r in linhas if r["compilacao_s"] is not None]
+        reusos = [r["reuso"] for r in linhas if r["reuso"] is not None]
+        resumo.append({"escala": escala, "tipo": tipo, "nome": nome, "modo": modo,
+                       "mediana_s": round(statistics.median(validas), 6) if validas else None,
+                       "linhas": linhas[-1]["linhas"], "round_trips": linhas[-1]["round_trips"],
+                       "erros": sum(1 for r in linhas if r["erro"]),
+                       "pico_mb": round(statistics.median(picos) / 2**20, 1) if picos else None,
+                       "compilacao_s": round(statistics.median(compilacoes), 6) if compilacoes else None,
+                       "reuso": round(sum(reusos) / len(reusos), 2) if reusos else None})
+    return resumo
+
+def salvar(caminho, dados):
+    if caminho.endswith(".csv"):
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=list(dados["resultados"][0].keys()))
+            escritor.writeheader()
+            escritor.writerows(dados["resultados"])
+    else:
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2, default=str)
+
+def comparar(resumo, caminho_base, limite, minimo_s):
+    # Lista os itens cuja mediana cresceu mais que `limite` (ex.: 1.2 = 20% mais lento) em relação à base;
+    # diferenças abaixo de `minimo_s` são ruído de medição e não contam
+    with open(caminho_base, encoding="utf-8") as f:
+        base = {(r["escala"], r["tipo"], r["nome"], r["modo"]): r["mediana_s"] for r in json.load(f)["resumo"]}
+    regressoes = []
+    for r in resumo:
+        anterior = base.get((r["escala"], r["tipo"], r["nome"], r["modo"]))
+        if anterior and r["mediana_s"] and r["mediana_s"] > anterior * limite and r["mediana_s"] - anterior > minimo_s:
+            regressoes.append((r, anterior))
+    for r, anterior in regressoes:
+        print(f"REGRESSÃO {r['escala']} {r['tipo']} {r['nome']} ({r['modo']}): {anterior:.4f}s -> {r['mediana_s']:.4f}s")
+    return regressoes
+
+def imprimir(resumo):
+    for r in resumo:
+        mediana = f"{r['mediana_s']:.4f}s" if r["mediana_s"] is not None else "erro"
+        print(f"{r['escala']:>9} {r['tipo']:<8} {r['modo']:<9} {mediana:>10} {str(r['linhas']):>9} linhas "
+              f"{r['round_trips']:>3} rt  {r['nome']}" + (f"  [{r['erros']} erro(s)]" if r["erros"] else "")
+              + (f"  pico {r['pico_mb']} MB" if r.get("pico_mb") is not None else "")
+              + (f"  compilação {r['compilacao_s']:.4f}s" if r.get("compilacao_s") is not None else "")
+              + (f"  reuso {r['reuso']:.0%}" if r.get("reuso") is not None else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das funções do db_utils e das páginas do app")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[10000], help="número de pessoas em cada rodada")
+    parser.add_argument("--inscricoes-por-pessoa", type=float, default=1.0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sem-paginas", action="store_true", help="não renderiza as páginas do app.py")
+    parser.add_argument("--timeout-pagina", type=float, default=120)
+    parser.add_argument("--memoria", type=int, nargs="?", const=MEMORIA_LINHAS, default=0, metavar="LINHAS",
+                        help=f"mede o pico de memória de cada formato numa leitura de PAGAMENTOS com LINHAS linhas (padrão {MEMORIA_LINHAS})")
+    parser.add_argument("--saida", help="arquivo .json (resultados, resumo e metadados) ou .csv (só os resultados)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior; sai com código 1 se houver regressão")
+    parser.add_argument("--limite", type=float, default=1.2, help="razão de tempo considerada regressão")
+    parser.add_argument("--minimo-s", type=float, default=0.005, help="diferença mínima, em segundos, para contar como regressão")
+    parser.add_argument("--permitir-snowflake", action="store_true",
+                        help="permite rodar com BD2_BACKEND=snowflake (APAGA e recarrega as tabelas)")
+    args = parser.parse_args()
+
+    if db.BACKEND != "local" and not args.permitir_snowflake:
+        parser.error("o benchmark apaga as tabelas; use o backend local ou --permitir-snowflake")
+
+    session = db.get_snowpark_session()
+    resultados = []
+    for escala in args.escalas:
+        print(f"Gerando dados: {escala} pessoas...", file=sys.stderr)
+        limpar_tabelas(session)
+        inicio = time.perf_counter()
+        ids = gerar_dados(session, escala, int(escala * args.inscricoes_por_pessoa), args.semente)
+        print(f"  {ids['linhas']} em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+        resultados += medir_funcoes(session, escala, ids, args.repeticoes)
+        resultados += medir_buscas_repetidas(session, escala, args.repeticoes)
+        if not args.sem_paginas:
+            resultados += medir_paginas(escala, args.repeticoes, args.timeout_pagina)
+        if args.memoria:
+            # Por último: a carga extra de PAGAMENTOS mudaria as medições acima
+            resultados += medir_memoria(session, escala, ids, args.memoria, args.repeticoes)
+
+    resumo = resumir(resultados)
+    imprimir(resumo)
+    if args.saida:
+        salvar(args.saida, {"metadados": metadados(args), "resumo": resumo, "resultados": resultados})
+    if args.comparar and comparar(resumo, args.comparar, args.limite, args.minimo_s):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
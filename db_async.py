@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import pandas as pd
+import streamlit as st
+from snowflake.snowpark import Session
+from snowflake.snowpark.exceptions import SnowparkSQLException
+
+import db_utils as db
+
+# API assíncrona (asyncio) das leituras do db_utils. Cada consulta é submetida como trabalho
+# assíncrono do Snowpark (to_pandas(block=False) / collect_nowait()) e a sessão volta ao pool
+# logo em seguida; a corrotina só aguarda o término, sem prender a thread. Assim uma página
+# dispara várias leituras independentes e espera a mais lenta, e não a soma de todas:
+#
+#   participantes, palestras = db_async.executar(
+#       db_async.buscar_opcoes(session, 'PESSOAS', tipos_pessoa=('Participante',)),
+#       db_async.buscar_opcoes(session, 'PALESTRAS'),
+#   )
+#
+# As funções têm os mesmos nomes, argumentos e retornos das síncronas do db_utils e usam o
+# mesmo pool de sessões, cache de leituras e instrumentação.
+
+# --- EXECUÇÃO ---
+async def aguardar_trabalho(trabalho):
+    # No Snowflake, is_done() e result() também vão à rede: rodam numa thread, e o intervalo
+    # entre verificações cresce para não sobrecarregar o serviço em consultas longas
+    espera = db.ASSINCRONO_ESPERA_INICIAL_SEGUNDOS
+    while not await asyncio.to_thread(trabalho.is_done):
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, db.ASSINCRONO_ESPERA_MAXIMA_SEGUNDOS)
+    return await asyncio.to_thread(trabalho.result)
+
+async def executar_snowpark_select(session: Session, sql, params=None, formato='listas', alertar=True):
+    inicio, trabalho = time.perf_counter(), None
+    try:
+        sql_final, valores = db.preparar_sql(sql, params)
+
+        db.registrar_round_trip()
+        with db.sessao_emprestada(session) as sessao:
+            trabalho = sessao.sql(sql_final, params=valores).to_pandas(block=False)
+        df = await aguardar_trabalho(trabalho)
+        db.registrar_consulta("select", sql, inicio, linhas=len(df), bytes_=db.tamanho_aproximado(df),
+                              query_id=trabalho.query_id)
+        return df if formato == 'dataframe' else db.resultado_em_listas(df)
+    except SnowparkSQLException as e:
+        if alertar:
+            st.error(f"Erro na consulta: {e}")
+        excecao = e
+    except Exception as e:
+        if alertar:
+            st.error(f"Erro geral: {e}")
+        excecao = e
+    query_id = db.ultimo_query_id(None, excecao) or (trabalho.query_id if trabalho is not None else None)
+    db.registrar_consulta("select", sql, inicio, query_id=query_id, erro=str(excecao))
+    return pd.DataFrame() if formato == 'dataframe' else ([], [])
+
+async def executar_snowpark_dml(session: Session, sql, params=None):
+    inicio, trabalho = time.perf_counter(), None
+    try:
+        sql_final, valores = db.preparar_sql(sql, params)
+
+        db.registrar_round_trip()
+        with db.sessao_emprestada(session) as sessao:
+            trabalho = sessao.sql(sql_final, params=valores).collect_nowait()
+        resultado = await aguardar_trabalho(trabalho)
+        db.registrar_consulta("dml", sql, inicio, linhas=resultado[0][0], query_id=trabalho.query_id)
+        return resultado[0][0]
+    except SnowparkSQLException as e:
+        excecao = e
+    except Exception as e:
+        excecao = e
+    query_id = db.ultimo_query_id(None, excecao) or (trabalho.query_id if trabalho is not None else None)
+    db.registrar_consulta("dml", sql, inicio, query_id=query_id, erro=str(excecao))
+    return str(excecao)
+
+async def reunir(*corrotinas):
+    # Aguarda as corrotinas juntas; os resultados saem na ordem em que foram passadas
+    return await asyncio.gather(*corrotinas)
+
+def executar(*corrotinas):
+    # Ponto de entrada síncrono (script do Streamlit, CLI): roda as corrotinas num laço de eventos
+    # próprio. O laço herda o contexto atual, então as consultas contam para a página que as disparou
+    return asyncio.run(reunir(*corrotinas))
+
+# --- CACHE DE LEITURAS ---
+async def ler_com_cache(session: Session, tabelas, sql, params=None, formato='listas'):
+    df = db.consultar_cache(tabelas, sql, params)
+    if df is None:
+        df = await executar_snowpark_select(session, sql, params, formato='dataframe')
+        db.guardar_no_cache(tabelas, sql, params, df)
+    return df if formato == 'dataframe' else db.resultado_em_listas(df)
+
+async def ler_visao(session: Session, visao, formato='listas'):
+    # A cópia sincronizada pela cláusula CHANGES (e o seu lock) fica no db_utils
+    if db.SINCRONIZACAO_INCREMENTAL and visao in db.VISOES_INCREMENTAIS:
+        return await asyncio.to_thread(db.ler_incremental, session, visao, formato)
+    definicao = db.VISOES_PAGINADAS[visao]
+    return await ler_com_cache(session, definicao["tabelas"], definicao["sql"], formato=formato)
+
+# --- LEITURAS ---
+# ler_pessoas, ler_eventos...: uma por item de db.LEITURAS, com o SQL e as tabelas da visão
+def leitura(visao):
+    async def ler(session: Session, formato='listas'):
+        return await ler_visao(session, visao, formato)
+    return ler
+
+for _nome, _visao in db.LEITURAS.items():
+    globals()[_nome] = leitura(_visao)
+    globals()[_nome].__name__ = _nome
+
+async def buscar_opcoes(session: Session, seletor, texto="", tipos_pessoa=(), limite=db.SELETOR_LIMITE):
+    sql, params, opcoes = db.consulta_seletor(seletor, texto, tipos_pessoa, limite)
+    if opcoes is not None:
+        return opcoes
+    df = await ler_com_cache(session, db.SELETORES[seletor]["tabelas"], sql, params, formato='dataframe')
+    if not len(df.columns):
+        return {}
+    return db.opcoes_do_dataframe(seletor, df)
+
+# --- CONSULTAS (FASE 3/4) ---
+async def consulta_participantes_palestra(session: Session, formato='listas', alertar=True):
+    return await executar_snowpark_select(session, db.SQL_PARTICIPANTES_PALESTRA, formato=formato, alertar=alertar)
+
+async def consulta_aninhada_1_nao_inscritos_em_evento_x(session: Session, evento_id_ref, formato='listas', alertar=True):
+    return await executar_snowpark_select(session, db.SQL_NAO_INSCRITOS_EM_EVENTO, (evento_id_ref,), formato=formato, alertar=alertar)
+
+async def consulta_aninhada_1_nao_inscritos_por_evento(session: Session, eventos_ids=None, formato='listas', alertar=True):
+    sql, params = db.sql_nao_inscritos_por_evento(eventos_ids)
+    return await executar_snowpark_select(session, sql, params, formato=formato, alertar=alertar)
+
+async def consulta_aninhada_2_palestras_acima_media(session: Session, formato='listas', alertar=True):
+    return await executar_snowpark_select(session, db.SQL_PALESTRAS_ACIMA_MEDIA, formato=formato, alertar=alertar)
+
+async def consulta_grupo_1_total_eventos_por_organizador(session: Session, formato='listas', alertar=True):
+    await asyncio.to_thread(db.garantir_resumos_atualizados, session)
+    return await executar_snowpark_select(session, db.SQL_TOTAL_EVENTOS_POR_ORGANIZADOR, formato=formato, alertar=alertar)
+
+async def consulta_grupo_2_estatisticas_por_status_pagamento(session: Session, formato='listas', alertar=True):
+    await asyncio.to_thread(db.garantir_resumos_atualizados, session)
+    return await executar_snowpark_select(session, db.SQL_ESTATISTICAS_POR_STATUS_PAGAMENTO, formato=formato, alertar=alertar)
+
+async def consulta_conjunto_1_atores_financeiros(session: Session, formato='listas', alertar=True):
+    return await executar_snowpark_select(session, db.SQL_ATORES_FINANCEIROS, formato=formato, alertar=alertar)
+
+async def consulta_conjunto_2_palestras_sem_feedback(session: Session, formato='listas', alertar=True):
+    return await executar_snowpark_select(session, db.SQL_PALESTRAS_SEM_FEEDBACK, formato=formato, alertar=alertar)
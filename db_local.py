@@ -0,0 +1,289 @@
+import copy
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import namedtuple
+from email.utils import formatdate
+
+# Backend local (DuckDB embutido) com a mesma interface usada de Session pelo db_utils:
+# sessao.sql(query, params=...).collect() / .to_pandas() / .collect_nowait() / .to_pandas(block=False),
+# sessao.write_pandas(...), sessao.file.get(...) e sessao.close().
+# Serve para testes e experimentos de carga sem gastar créditos do warehouse nem usar a rede.
+# Requer `pip install duckdb` (1.4 ou superior, por causa do MERGE).
+
+ESQUEMA_LOCAL = [
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_PESSOAS",
+    """
+    CREATE TABLE IF NOT EXISTS PESSOAS (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_PESSOAS'),
+        nome VARCHAR NOT NULL,
+        email VARCHAR,
+        telefone VARCHAR,
+        tipo_pessoa VARCHAR NOT NULL
+    )
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_EVENTOS",
+    """
+    CREATE TABLE IF NOT EXISTS EVENTOS (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_EVENTOS'),
+        nome VARCHAR NOT NULL,
+        data_inicio DATE,
+        data_fim DATE,
+        local VARCHAR,
+        organizador_id INTEGER
+    )
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_PALESTRAS",
+    """
+    CREATE TABLE IF NOT EXISTS PALESTRAS (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_PALESTRAS'),
+        titulo VARCHAR NOT NULL,
+        descricao VARCHAR,
+        data DATE,
+        hora TIME,
+        sala VARCHAR,
+        evento_id INTEGER,
+        palestrante_id INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS INSCRICOES (
+        participante_id INTEGER NOT NULL,
+        palestra_id INTEGER NOT NULL,
+        data_inscricao DATE,
+        PRIMARY KEY (participante_id, palestra_id)
+    )
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_TIPOS_PAGAMENTO",
+    """
+    CREATE TABLE IF NOT EXISTS TIPOS_PAGAMENTO (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_TIPOS_PAGAMENTO'),
+        nome VARCHAR NOT NULL
+    )
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_PAGAMENTOS",
+    """
+    CREATE TABLE IF NOT EXISTS PAGAMENTOS (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_PAGAMENTOS'),
+        participante_id INTEGER,
+        evento_id INTEGER,
+        valor DECIMAL(10, 2),
+        status VARCHAR,
+        tipo_pagamento_id INTEGER
+    )
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS SEQ_FEEDBACK_PALESTRAS",
+    """
+    CREATE TABLE IF NOT EXISTS FEEDBACK_PALESTRAS (
+        id INTEGER PRIMARY KEY DEFAULT nextval('SEQ_FEEDBACK_PALESTRAS'),
+        participante_id INTEGER NOT NULL,
+        palestra_id INTEGER NOT NULL,
+        nota INTEGER,
+        comentario VARCHAR
+    )
+    """,
+]
+
+# Uma conexão base por arquivo (ou ":memory:"); cada sessão é um cursor dela,
+# assim todas as sessões do pool enxergam o mesmo banco
+_bancos = {}
+_bancos_lock = threading.Lock()
+
+def conexao_base(caminho):
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("O backend local precisa do pacote duckdb: pip install duckdb") from e
+
+    with _bancos_lock:
+        if caminho not in _bancos:
+            con = duckdb.connect(caminho)
+            for sql in ESQUEMA_LOCAL:
+                con.execute(sql)
+            _bancos[caminho] = con
+        return _bancos[caminho]
+
+class ResultadoLocal:
+    # Equivalente ao DataFrame do Snowpark devolvido por session.sql(): só executa no collect/to_pandas
+    def __init__(self, con, query, params=None):
+        self.con = con
+        self.query = query
+        self.params = params
+
+    def _executar(self):
+        return self.con.execute(self.query, self.params or [])
+
+    def collect(self):
+        # INSERT/UPDATE/DELETE/MERGE no DuckDB devolvem uma linha com a contagem, como no Snowflake;
+        # DDL não devolve nada, enquanto o Snowflake devolve uma linha de status
+        linhas = self._executar().fetchall()
+        if not linhas and self.query.lstrip().upper().startswith(("CREATE", "ALTER", "DROP")):
+            return [("Statement executed successfully.",)]
+        return linhas
+
+    def to_pandas_batches(self):
+        # Lotes de até 16 vetores do DuckDB (~32 mil linhas), como os lotes de resultado do Snowflake.
+        # O primeiro sai mesmo vazio, para quem grava o resultado conhecer as colunas
+        cursor = self._executar()
+        primeiro = True
+        while True:
+            df = cursor.fetch_df_chunk(16)
+            if df.empty and not primeiro:
+                return
+            df.columns = [str(c).upper() for c in df.columns]
+            yield df
+            if df.empty:
+                return
+            primeiro = False
+
+    def to_pandas(self, block=True):
+        if not block:
+            return self._sem_esperar("to_pandas")
+        df = self._executar().df()
+        # O Snowflake devolve identificadores não citados em maiúsculas; o app depende disso
+        df.columns = [str(c).upper() for c in df.columns]
+        return df
+
+    def collect_nowait(self):
+        return self._sem_esperar("collect")
+
+    def _sem_esperar(self, metodo):
+        # Cursor próprio: a sessão pode voltar ao pool enquanto a consulta roda
+        copia = copy.copy(self)
+        copia.con = self.con.cursor()
+        return TrabalhoLocal(copia, metodo)
+
+class TrabalhoLocal:
+    # Equivalente ao AsyncJob do Snowpark: a consulta roda numa thread e o resultado fica guardado
+    # (linhas para collect_nowait(), DataFrame para to_pandas(block=False))
+    def __init__(self, resultado, metodo="collect"):
+        self.query_id = str(uuid.uuid4())
+        self._resultado, self._erro = None, None
+        self._thread = threading.Thread(target=self._rodar, args=(resultado, metodo), daemon=True)
+        self._thread.start()
+
+    def _rodar(self, resultado, metodo):
+        try:
+            self._resultado = getattr(resultado, metodo)()
+        except Exception as e:
+            self._erro = e
+        finally:
+            resultado.con.close()
+
+    def is_done(self):
+        return not self._thread.is_alive()
+
+    def result(self, result_type=None):
+        self._thread.join()
+        if self._erro is not None:
+            raise self._erro
+        return self._resultado
+
+# --- STAGE LOCAL ---
+# Stand-in dos stages internos: @NOME/prefixo vira a pasta <pasta_stage>/NOME/prefixo.
+# Cobre só o que o db_utils usa: CREATE STAGE, COPY INTO @stage (descarga), LIST @stage e file.get.
+RE_CRIAR_STAGE = re.compile(r"^\s*CREATE STAGE IF NOT EXISTS (\w+)\s*$", re.I)
+RE_COPY_STAGE = re.compile(r"^\s*COPY INTO @(\S+?)/?\s+FROM \((.*)\)\s+FILE_FORMAT = \(TYPE = (\w+)[^)]*\)(.*)$", re.I | re.S)
+RE_LIST_STAGE = re.compile(r"^\s*LIST @(\S+?)/?\s*$", re.I)
+RE_MAX_ARQUIVO = re.compile(r"MAX_FILE_SIZE = (\d+)", re.I)
+
+ResultadoGet = namedtuple("ResultadoGet", "file size status message")  # como o GetResult do Snowpark
+
+class ResultadoStage(ResultadoLocal):
+    # Comando de stage executado em Python; collect() devolve as linhas no formato do Snowflake
+    def __init__(self, con, comando, *args):
+        super().__init__(con, None)
+        self.comando = comando
+        self.args = args
+
+    def collect(self):
+        return self.comando(self.con, *self.args)
+
+class StageLocal:
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def caminho(self, local):
+        # Nomes de stage não diferenciam maiúsculas; o prefixo é mantido como veio
+        stage, _, prefixo = local.strip("/").partition("/")
+        return os.path.join(self.pasta, stage.upper(), *[p for p in prefixo.split("/") if p])
+
+    def arquivos(self, local):
+        raiz = self.caminho(local)
+        for pasta, _, nomes in sorted(os.walk(raiz)):
+            for nome in sorted(nomes):
+                yield os.path.join(pasta, nome)
+
+    def criar(self, con, stage):
+        os.makedirs(self.caminho(stage), exist_ok=True)
+        return [(f"Stage area {stage.upper()} successfully created.",)]
+
+    def descarregar(self, con, local, sql, tipo, opcoes):
+        # COPY do DuckDB com um arquivo por thread (PER_THREAD_OUTPUT), como o unload paralelo
+        destino = self.caminho(local)
+        if re.search(r"OVERWRITE = TRUE", opcoes, re.I):
+            shutil.rmtree(destino, ignore_errors=True)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if tipo.upper() == "PARQUET":
+            formato = "FORMAT parquet, COMPRESSION snappy"
+        else:
+            cabecalho = ", HEADER" if re.search(r"HEADER = TRUE", opcoes, re.I) else ""
+            formato = f"FORMAT csv, COMPRESSION gzip{cabecalho}"
+        maximo = RE_MAX_ARQUIVO.search(opcoes)
+        if maximo:
+            formato += f", FILE_SIZE_BYTES {maximo.group(1)}"
+        linhas = con.execute(f"COPY ({sql}) TO '{destino.replace(chr(39), chr(39) * 2)}' ({formato}, PER_THREAD_OUTPUT)").fetchone()[0]
+        gravados = sum(os.path.getsize(arquivo) for arquivo in self.arquivos(local))
+        # rows_unloaded, input_bytes, output_bytes
+        return [(linhas, gravados, gravados)]
+
+    def listar(self, con, local):
+        # name, size, md5, last_modified; o name começa pelo nome do stage em minúsculas, como no Snowflake
+        linhas = []
+        for arquivo in self.arquivos(local):
+            relativo = os.path.relpath(arquivo, self.pasta).replace(os.sep, "/")
+            stage, _, resto = relativo.partition("/")
+            with open(arquivo, "rb") as f:
+                md5 = hashlib.md5(f.read()).hexdigest()
+            linhas.append((f"{stage.lower()}/{resto}", os.path.getsize(arquivo), md5, formatdate(os.path.getmtime(arquivo), usegmt=True)))
+        return linhas
+
+    def get(self, stage_location, target_directory, **_):
+        # Como o GET: os arquivos do prefixo vão para a pasta de destino, sem as subpastas
+        os.makedirs(target_directory, exist_ok=True)
+        resultados = []
+        for arquivo in self.arquivos(stage_location.lstrip("@")):
+            shutil.copyfile(arquivo, os.path.join(target_directory, os.path.basename(arquivo)))
+            resultados.append(ResultadoGet(os.path.basename(arquivo), os.path.getsize(arquivo), "DOWNLOADED", ""))
+        return resultados
+
+class SessaoLocal:
+    def __init__(self, caminho=":memory:", pasta_stage="stage_local"):
+        self.caminho = caminho
+        self.con = conexao_base(caminho).cursor()
+        self.file = StageLocal(pasta_stage)
+
+    def sql(self, query, params=None):
+        comandos_de_stage = ((RE_CRIAR_STAGE, self.file.criar), (RE_COPY_STAGE, self.file.descarregar), (RE_LIST_STAGE, self.file.listar))
+        for padrao, comando in comandos_de_stage:
+            encontrado = padrao.match(query)
+            if encontrado:
+                return ResultadoStage(self.con, comando, *encontrado.groups())
+        return ResultadoLocal(self.con, query, params)
+
+    def write_pandas(self, df, tabela, quote_identifiers=False, **_):
+        self.con.register("_df_carga", df)
+        try:
+            colunas = ", ".join(df.columns)
+            self.con.execute(f"INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM _df_carga")
+        finally:
+            self.con.unregister("_df_carga")
+
+    def close(self):
+        self.con.close()
+
+def criar_sessao_local(caminho=":memory:", pasta_stage="stage_local"):
+    return SessaoLocal(caminho, pasta_stage)
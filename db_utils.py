@@ -2,6 +2,18 @@ from snowflake.snowpark import Session
 from snowflake.snowpark.exceptions import SnowparkSQLException
 import pandas as pd
 import streamlit as st
+import atexit
+import contextvars
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 
 # --- CONFIGURAÇÃO ---
 CONNECTION_PARAMETERS = {
@@ -12,83 +24,1015 @@ CONNECTION_PARAMETERS = {
     "database": "BD2",
     "schema": "PUBLIC"
 }
+
+# Backend de dados: "snowflake" (padrão) ou "local" (DuckDB embutido, ver db_local.py)
+BACKEND = os.environ.get("BD2_BACKEND", "snowflake")
+BANCO_LOCAL = os.environ.get("BD2_BANCO_LOCAL", ":memory:")
+
+# Pool de sessões Snowpark compartilhado pelo processo
+POOL_TAMANHO = 8
+POOL_TIMEOUT_SEGUNDOS = 30
+POOL_VERIFICAR_APOS_SEGUNDOS = 300
+
+# Cache de leituras compartilhado pelo processo (todas as abas/usuários)
+CACHE_TTL_SEGUNDOS = 60
+CACHE_MAX_ENTRADAS = 256
+
+# Repositório em memória: uma tabela com mais linhas que isso não é copiada (as consultas por ID
+# e por índice voltam ao banco), para a cópia não crescer junto com um histórico grande
+REPOSITORIO_MAX_LINHAS = 100000
+
+# Inserções em lote: linhas por INSERT multi-linha (ou por chamada de write_pandas)
+TAMANHO_LOTE_INSERCAO = 1000
+
+# Linhas por página nos visualizadores de tabela
+PAGINA_TAMANHO = 100
+
+# Máximo de opções devolvidas pelos seletores com busca
+SELETOR_LIMITE = 50
+
+# Consultas simultâneas na página de relatórios (cada uma usa uma sessão do pool)
+CONSULTAS_MAX_PARALELO = 7
+
+# Destinos dos registros de cada consulta, separados por vírgula:
+# "log", "csv:<arquivo>" e/ou "prometheus:<arquivo>" (vazio: só o painel de depuração do app)
+INSTRUMENTACAO = os.environ.get("BD2_INSTRUMENTACAO", "")
+INSTRUMENTACAO_SQL_MAX = 500          # caracteres do SQL guardados em cada registro
+INSTRUMENTACAO_AMOSTRA_BYTES = 1000   # linhas medidas para estimar o tamanho do resultado
+INSTRUMENTACAO_PROMETHEUS_INTERVALO = 5
+
+# Sincronização incremental de ler_eventos/ler_palestras/ler_inscricoes pela cláusula CHANGES
+# do Snowflake (liga o CHANGE_TRACKING das tabelas; sem permissão, ou no backend local, essas
+# leituras continuam no cache comum)
+SINCRONIZACAO_INCREMENTAL = os.environ.get("BD2_SINCRONIZACAO_INCREMENTAL", "") == "1"
+SINCRONIZACAO_INTERVALO_SEGUNDOS = 10   # atraso máximo para enxergar escritas de outros processos
+SINCRONIZACAO_MAX_ALTERADAS = 5000      # acima disso, recarregar a visão inteira sai mais barato
+
+# Descargas (COPY INTO) de extrações grandes direto do warehouse para um stage interno
+STAGE_DESCARGAS = os.environ.get("BD2_STAGE_DESCARGAS", "BD2_DESCARGAS")
+STAGE_LOCAL = os.environ.get("BD2_STAGE_LOCAL", "stage_local")   # pasta que faz o papel do stage no backend local
+DESCARGA_MAX_ARQUIVO_BYTES = 256 * 1024 * 1024                     # tamanho máximo de cada arquivo gerado
+
+# Após uma escrita aplicada localmente, espera antes de reler as linhas escritas em segundo plano
+# (escritas seguidas na mesma tabela geram uma só releitura)
+RECONCILIACAO_ATRASO_SEGUNDOS = 2
+
+# Dados de referência (tipos de pagamento, eventos, pessoas por papel) carregados em paralelo
+# na subida do processo e renovados em segundo plano antes de vencerem no cache
+AQUECIMENTO = os.environ.get("BD2_AQUECIMENTO", "1") == "1"
+AQUECIMENTO_INTERVALO_SEGUNDOS = 45   # menor que CACHE_TTL_SEGUNDOS
+
+# API assíncrona (db_async.py): intervalo entre as verificações de um trabalho assíncrono,
+# dobrado a cada verificação até o máximo
+ASSINCRONO_ESPERA_INICIAL_SEGUNDOS = 0.01
+ASSINCRONO_ESPERA_MAXIMA_SEGUNDOS = 0.5
 # --------------------
 
-def get_snowpark_session():
-    if 'snowpark_session' not in st.session_state:
+# Contador global de idas ao Snowflake, para medições num processo de um só usuário (benchmark.py);
+# no app, a contagem por renderização vem da coleta (iniciar_coleta)
+_round_trips = {"total": 0}
+_round_trips_lock = threading.Lock()
+
+def registrar_round_trip():
+    with _round_trips_lock:
+        _round_trips["total"] += 1
+
+def contar_round_trips():
+    return _round_trips["total"]
+
+def zerar_round_trips():
+    with _round_trips_lock:
+        _round_trips["total"] = 0
+
+# --- INSTRUMENTAÇÃO DE CONSULTAS ---
+# Cada chamada dos executores gera um registro (tempo, linhas, tamanho aproximado, query ID
+# e página de origem) entregue aos sinks configurados e à coleta da renderização atual.
+# Página e coleta vivem em variáveis de contexto, que executar_em_paralelo repassa às threads.
+CAMPOS_REGISTRO = ["momento", "pagina", "tipo", "segundos", "linhas", "bytes", "query_id", "erro", "sql"]
+
+logger_consultas = logging.getLogger("bd2.consultas")
+_pagina_atual = contextvars.ContextVar("pagina_atual", default=None)
+_coleta_atual = contextvars.ContextVar("coleta_atual", default=None)
+# (Transacao, sessão) da unidade de trabalho em execução neste contexto, ou None
+_transacao_atual = contextvars.ContextVar("transacao_atual", default=None)
+_sinks = []
+
+def iniciar_coleta(pagina=None):
+    # Chamado no início de cada renderização; devolve a lista que recebe os registros dela
+    coleta = []
+    _pagina_atual.set(pagina)
+    _coleta_atual.set(coleta)
+    return coleta
+
+@contextmanager
+def coleta_parcial(pagina=None):
+    # Coleta de um trecho da renderização (ex.: um fragmento da página); os registros
+    # também entram na coleta de fora, quando o trecho roda dentro de uma renderização completa
+    externa = _coleta_atual.get()
+    coleta = []
+    token_coleta = _coleta_atual.set(coleta)
+    token_pagina = _pagina_atual.set(pagina if pagina is not None else _pagina_atual.get())
+    try:
+        yield coleta
+    finally:
+        _pagina_atual.reset(token_pagina)
+        _coleta_atual.reset(token_coleta)
+        if externa is not None:
+            externa.extend(coleta)
+
+def adicionar_sink(sink):
+    # sink: qualquer função que receba o dicionário do registro
+    _sinks.append(sink)
+
+def remover_sink(sink):
+    _sinks.remove(sink)
+
+def sink_log(registro):
+    logger_consultas.info("[%(pagina)s] %(tipo)s %(segundos).3fs linhas=%(linhas)s bytes=%(bytes)s id=%(query_id)s erro=%(erro)s: %(sql)s", registro)
+
+class SinkCSV:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+
+    def __call__(self, registro):
+        with self.lock:
+            novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+            with open(self.caminho, "a", newline="", encoding="utf-8") as f:
+                escritor = csv.DictWriter(f, fieldnames=CAMPOS_REGISTRO)
+                if novo:
+                    escritor.writeheader()
+                escritor.writerow(registro)
+
+class SinkPrometheus:
+    # Acumula contadores por (página, tipo) e regrava o arquivo no formato texto do Prometheus
+    # (para o textfile collector do node_exporter) no máximo a cada `intervalo` segundos
+    METRICAS = [
+        ("bd2_consultas_total", "consultas", "Consultas executadas"),
+        ("bd2_consultas_erros_total", "erros", "Consultas que falharam"),
+        ("bd2_consultas_segundos_total", "segundos", "Tempo total das consultas em segundos"),
+        ("bd2_consultas_linhas_total", "linhas", "Linhas devolvidas ou afetadas"),
+        ("bd2_consultas_bytes_total", "bytes", "Tamanho aproximado dos resultados em bytes"),
+    ]
+
+    def __init__(self, caminho, intervalo=INSTRUMENTACAO_PROMETHEUS_INTERVALO):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.totais = {}
+        self.escrito_em = 0.0
+        self.lock = threading.Lock()
+        atexit.register(self.escrever)
+
+    def __call__(self, registro):
+        with self.lock:
+            totais = self.totais.setdefault((registro["pagina"] or "", registro["tipo"]),
+                                            {"consultas": 0, "erros": 0, "segundos": 0.0, "linhas": 0, "bytes": 0})
+            totais["consultas"] += 1
+            totais["erros"] += 1 if registro["erro"] else 0
+            totais["segundos"] += registro["segundos"]
+            totais["linhas"] += registro["linhas"] or 0
+            totais["bytes"] += registro["bytes"] or 0
+            if time.monotonic() - self.escrito_em < self.intervalo:
+                return
+        self.escrever()
+
+    def escrever(self):
+        with self.lock:
+            linhas = []
+            for nome, campo, ajuda in self.METRICAS:
+                linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} counter"]
+                for (pagina, tipo), totais in sorted(self.totais.items()):
+                    pagina = pagina.replace("\\", "\\\\").replace('"', '\\"')
+                    linhas.append(f'{nome}{{pagina="{pagina}",tipo="{tipo}"}} {totais[campo]}')
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write("\n".join(linhas) + "\n")
+            os.replace(temporario, self.caminho)
+            self.escrito_em = time.monotonic()
+
+def configurar_sinks(especificacao):
+    for item in filter(None, (parte.strip() for parte in especificacao.split(","))):
+        tipo, _, caminho = item.partition(":")
+        if tipo == "log":
+            adicionar_sink(sink_log)
+        elif tipo == "csv" and caminho:
+            adicionar_sink(SinkCSV(caminho))
+        elif tipo == "prometheus" and caminho:
+            adicionar_sink(SinkPrometheus(caminho))
+        else:
+            raise ValueError(f"Destino de instrumentação inválido: {item!r}")
+
+configurar_sinks(INSTRUMENTACAO)
+
+def tamanho_aproximado(df):
+    # memory_usage(deep=True) percorre todas as strings; mede só uma amostra e extrapola
+    if df.empty:
+        return 0
+    amostra = df.head(INSTRUMENTACAO_AMOSTRA_BYTES)
+    return int(amostra.memory_usage(deep=True, index=False).sum() * len(df) / len(amostra))
+
+@contextmanager
+def historico_de_consultas(sessao):
+    # O Snowpark informa o query ID de cada comando a este ouvinte; o backend local não tem equivalente
+    if not hasattr(sessao, "query_history"):
+        yield None
+        return
+    with sessao.query_history() as historico:
+        yield historico
+
+def ultimo_query_id(historico, erro=None):
+    if getattr(erro, "sfqid", None):
+        return erro.sfqid
+    return historico.queries[-1].query_id if historico is not None and historico.queries else None
+
+def registrar_consulta(tipo, sql, inicio, linhas=None, bytes_=None, query_id=None, erro=None):
+    registro = {
+        "momento": datetime.now().isoformat(timespec="milliseconds"),
+        "pagina": _pagina_atual.get(),
+        "tipo": tipo,
+        "segundos": time.perf_counter() - inicio,
+        "linhas": linhas if isinstance(linhas, int) else None,
+        "bytes": bytes_,
+        "query_id": query_id,
+        "erro": erro,
+        "sql": " ".join(sql.split())[:INSTRUMENTACAO_SQL_MAX],
+    }
+    coleta = _coleta_atual.get()
+    if coleta is not None:
+        coleta.append(registro)
+    for sink in list(_sinks):
         try:
-            session = Session.builder.configs(CONNECTION_PARAMETERS).create()
-            session.sql("ALTER SESSION SET QUOTED_IDENTIFIERS_IGNORE_CASE = TRUE").collect()
-            st.session_state.snowpark_session = session
-            return session
-        except Exception as e:
-            st.error(f"Erro ao conectar com Snowpark. Verifique as credenciais em snowpark_utils.py: {e}")
-            st.stop()
-    return st.session_state.snowpark_session
+            sink(registro)
+        except Exception:
+            # Falha de instrumentação nunca derruba a consulta
+            logger_consultas.exception("Falha ao registrar consulta")
+    return registro
+
+# --- POOL DE SESSÕES ---
+def criar_sessao_snowpark():
+    session = Session.builder.configs(CONNECTION_PARAMETERS).create()
+    session.sql("ALTER SESSION SET QUOTED_IDENTIFIERS_IGNORE_CASE = TRUE").collect()
+    return session
+
+def criar_sessao():
+    # Todas as funções deste módulo só usam sql()/collect()/to_pandas()/write_pandas()/close(),
+    # então qualquer objeto com essa interface serve como backend
+    if BACKEND == "local":
+        from db_local import criar_sessao_local
+        return criar_sessao_local(BANCO_LOCAL, STAGE_LOCAL)
+    return criar_sessao_snowpark()
+
+class PoolSessoes:
+    # Empresta sessões já abertas em vez de fazer um login por aba do navegador.
+    # Sessões ociosas há mais de `verificar_apos` segundos passam por um SELECT 1
+    # antes de serem entregues; se a sessão expirou, é descartada e recriada.
+    def __init__(self, criar_sessao, tamanho=POOL_TAMANHO, timeout=POOL_TIMEOUT_SEGUNDOS,
+                 verificar_apos=POOL_VERIFICAR_APOS_SEGUNDOS):
+        self.criar_sessao = criar_sessao
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.verificar_apos = verificar_apos
+        self._ociosas = []  # lista de (sessao, devolvida_em)
+        self._abertas = 0
+        self._em_uso = 0
+        self._cond = threading.Condition()
+        self._metricas = {"criadas": 0, "descartadas": 0, "emprestimos": 0,
+                          "espera_total_s": 0.0, "espera_max_s": 0.0}
+
+    def _sessao_saudavel(self, sessao):
+        try:
+            sessao.sql("SELECT 1").collect()
+            return True
+        except Exception:
+            return False
+
+    def _descartar(self, sessao):
+        with self._cond:
+            self._metricas["descartadas"] += 1
+        try:
+            sessao.close()
+        except Exception:
+            pass
+
+    def _retirar(self):
+        inicio = time.monotonic()
+        with self._cond:
+            while not self._ociosas and self._abertas >= self.tamanho:
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    raise TimeoutError(f"Nenhuma sessão Snowpark livre após {self.timeout}s")
+                self._cond.wait(restante)
+            if self._ociosas:
+                sessao, devolvida_em = self._ociosas.pop()
+            else:
+                sessao, devolvida_em = None, None
+                self._abertas += 1
+            self._em_uso += 1
+
+        try:
+            if sessao is not None and time.monotonic() - devolvida_em > self.verificar_apos:
+                if not self._sessao_saudavel(sessao):
+                    self._descartar(sessao)
+                    sessao = None
+            if sessao is None:
+                sessao = self.criar_sessao()
+                with self._cond:
+                    self._metricas["criadas"] += 1
+        except Exception:
+            with self._cond:
+                self._abertas -= 1
+                self._em_uso -= 1
+                self._cond.notify()
+            raise
+
+        espera = time.monotonic() - inicio
+        with self._cond:
+            self._metricas["emprestimos"] += 1
+            self._metricas["espera_total_s"] += espera
+            self._metricas["espera_max_s"] = max(self._metricas["espera_max_s"], espera)
+        return sessao
+
+    def _devolver(self, sessao, saudavel=True):
+        with self._cond:
+            self._em_uso -= 1
+            if saudavel:
+                self._ociosas.append((sessao, time.monotonic()))
+            else:
+                self._abertas -= 1
+            self._cond.notify()
+        if not saudavel:
+            self._descartar(sessao)
+
+    @contextmanager
+    def emprestar(self):
+        sessao = self._retirar()
+        saudavel = True
+        try:
+            yield sessao
+        except SnowparkSQLException:
+            # Erro de SQL não invalida a sessão
+            raise
+        except Exception:
+            saudavel = False
+            raise
+        finally:
+            self._devolver(sessao, saudavel)
+
+    def metricas(self):
+        with self._cond:
+            emprestimos = self._metricas["emprestimos"]
+            return {
+                **self._metricas,
+                "espera_media_s": self._metricas["espera_total_s"] / emprestimos if emprestimos else 0.0,
+                "tamanho": self.tamanho,
+                "abertas": self._abertas,
+                "em_uso": self._em_uso,
+                "ociosas": len(self._ociosas),
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolSessoes(criar_sessao)
+        return _pool
+
+def metricas_pool():
+    return obter_pool().metricas()
+
+@contextmanager
+def sessao_emprestada(session):
+    # Aceita tanto o pool (caso normal) quanto uma Session avulsa
+    if isinstance(session, PoolSessoes):
+        with session.emprestar() as sessao:
+            yield sessao
+    else:
+        yield session
+
+def get_snowpark_session():
+    # Devolve o pool do processo; a primeira chamada abre uma sessão para validar as credenciais
+    pool = obter_pool()
+    try:
+        with pool.emprestar():
+            pass
+    except Exception as e:
+        st.error(f"Erro ao conectar com Snowpark. Verifique as credenciais em snowpark_utils.py: {e}")
+        st.stop()
+    preparar_resumos(pool)
+    return pool
+
+def preparar_sql(sql, params=None):
+    # Placeholders %s viram binds "?" resolvidos no servidor: o texto do SQL fica
+    # idêntico entre chamadas e o Snowflake reaproveita compilação e result cache
+    if not params:
+        return sql, None
+    valores = [p.item() if hasattr(p, 'item') else p for p in params]  # numpy -> Python
+    return sql.replace('%s', '?'), valores
 
 def executar_snowpark_dml(session: Session, sql, params=None):
+    inicio, historico = time.perf_counter(), None
     try:
-        if params:
-            safe_params = tuple(f"'{p}'" if isinstance(p, str) else str(p) for p in params)
-            sql_final = sql.replace('%s', '{}').format(*safe_params)
-        else:
-            sql_final = sql
+        sql_final, valores = preparar_sql(sql, params)
 
-        resultado = session.sql(sql_final).collect()
+        registrar_round_trip()
+        with sessao_emprestada(session) as sessao, historico_de_consultas(sessao) as historico:
+            resultado = sessao.sql(sql_final, params=valores).collect()
+        registrar_consulta("dml", sql, inicio, linhas=resultado[0][0], query_id=ultimo_query_id(historico))
         return resultado[0][0] 
     except SnowparkSQLException as e:
-        return str(e)
+        excecao = e
     except Exception as e:
-        return str(e)
+        excecao = e
+    registrar_consulta("dml", sql, inicio, query_id=ultimo_query_id(historico, excecao), erro=str(excecao))
+    return str(excecao)
+
+def executar_comando(session: Session, sql, tipo="comando"):
+    # Comandos sem contagem de linhas (BEGIN, COMMIT, ALTER, LIST...); aqui os erros sobem como exceção
+    inicio = time.perf_counter()
+    registrar_round_trip()
+    with sessao_emprestada(session) as sessao:
+        linhas = sessao.sql(sql).collect()
+    registrar_consulta(tipo, sql, inicio, linhas=len(linhas))
+    return linhas
+
+def resultado_em_listas(df):
+    return df.columns.tolist(), df.values.tolist()
 
-def executar_snowpark_select(session: Session, sql, params=None):
+def executar_snowpark_select(session: Session, sql, params=None, formato='listas', alertar=True):
+    # formato='listas' devolve (colunas, linhas) como antes; formato='dataframe' devolve
+    # o DataFrame do to_pandas() direto, sem as cópias para ndarray de objetos e listas;
+    # formato='lotes' devolve um gerador de DataFrames parciais (ver ler_em_lotes).
+    # alertar=False não mostra o erro na página (para quem tem um plano B para a falha)
+    if formato == 'lotes':
+        return ler_em_lotes(session, sql, params)
+    inicio, historico = time.perf_counter(), None
     try:
-        if params:
-            safe_params = tuple(f"'{p}'" if isinstance(p, str) else str(p) for p in params)
-            sql_final = sql.replace('%s', '{}').format(*safe_params)
-        else:
-            sql_final = sql
-            
-        df_snowpark = session.sql(sql_final).to_pandas()
-        return df_snowpark.columns.tolist(), df_snowpark.values.tolist()
+        sql_final, valores = preparar_sql(sql, params)
+
+        registrar_round_trip()
+        with sessao_emprestada(session) as sessao, historico_de_consultas(sessao) as historico:
+            df_snowpark = sessao.sql(sql_final, params=valores).to_pandas()
+        registrar_consulta("select", sql, inicio, linhas=len(df_snowpark), bytes_=tamanho_aproximado(df_snowpark),
+                           query_id=ultimo_query_id(historico))
+        return df_snowpark if formato == 'dataframe' else resultado_em_listas(df_snowpark)
     except SnowparkSQLException as e:
-        st.error(f"Erro na consulta: {e}")
-        return [], []
+        if alertar:
+            st.error(f"Erro na consulta: {e}")
+        excecao = e
     except Exception as e:
-        st.error(f"Erro geral: {e}")
-        return [], []
+        if alertar:
+            st.error(f"Erro geral: {e}")
+        excecao = e
+    registrar_consulta("select", sql, inicio, query_id=ultimo_query_id(historico, excecao), erro=str(excecao))
+    return pd.DataFrame() if formato == 'dataframe' else ([], [])
+
+def ler_em_lotes(session: Session, sql, params=None):
+    # Gera o resultado em DataFrames parciais (to_pandas_batches), sem montar tudo em memória.
+    # A sessão fica emprestada enquanto o gerador é consumido; aqui os erros sobem como exceção.
+    inicio, historico, linhas, bytes_ = time.perf_counter(), None, 0, 0
+    sql_final, valores = preparar_sql(sql, params)
+    registrar_round_trip()
+    try:
+        with sessao_emprestada(session) as sessao, historico_de_consultas(sessao) as historico:
+            for lote in sessao.sql(sql_final, params=valores).to_pandas_batches():
+                linhas += len(lote)
+                bytes_ += tamanho_aproximado(lote)
+                yield lote
+    except Exception as e:
+        registrar_consulta("lotes", sql, inicio, linhas=linhas, bytes_=bytes_, query_id=ultimo_query_id(historico, e), erro=str(e))
+        raise
+    registrar_consulta("lotes", sql, inicio, linhas=linhas, bytes_=bytes_, query_id=ultimo_query_id(historico))
+
+# --- EXECUÇÃO CONCORRENTE ---
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+def executar_em_paralelo(session, tarefas, max_paralelo=CONSULTAS_MAX_PARALELO):
+    # tarefas: {nome: (funcao, args, kwargs)}; cada funcao recebe `session` como primeiro argumento.
+    # Gera (nome, resultado, segundos) na ordem em que as consultas terminam, para que a
+    # página possa exibir cada seção assim que o seu resultado chega. Cada tarefa roda numa
+    # cópia do contexto atual, para a instrumentação atribuí-la à página que a disparou.
+    with ThreadPoolExecutor(max_workers=max_paralelo) as executor:
+        futuros = {
+            executor.submit(contextvars.copy_context().run, cronometrar, funcao, session, *args, **kwargs): nome
+            for nome, (funcao, args, kwargs) in tarefas.items()
+        }
+        for futuro in as_completed(futuros):
+            resultado, segundos = futuro.result()
+            yield futuros[futuro], resultado, segundos
+
+# --- CACHE DE LEITURAS ---
+# Chave: (tabelas das quais a consulta depende, sql, params) -> (expira_em, (colunas, dados)).
+# Entradas expiram pelo TTL, as menos usadas saem primeiro (LRU) e qualquer escrita
+# em uma tabela invalida todas as entradas que dependem dela.
+_cache_leituras = OrderedDict()
+_cache_lock = threading.Lock()
+
+def ler_com_cache(session: Session, tabelas, sql, params=None, formato='listas', renovar=False):
+    # O cache guarda só o DataFrame; o formato em listas é derivado dele a cada leitura.
+    # renovar=True consulta de novo mesmo com a entrada válida (a antiga vale até a nova chegar)
+    chave = (tuple(tabelas), sql, tuple(params) if params else None)
+    agora = time.monotonic()
+    df = None
+    with _cache_lock:
+        entrada = _cache_leituras.get(chave)
+        if entrada and entrada[0] > agora and not renovar:
+            _cache_leituras.move_to_end(chave)
+            df = entrada[1]
+        elif not renovar:
+            _cache_leituras.pop(chave, None)
+
+    if df is None:
+        df = executar_snowpark_select(session, sql, params, formato='dataframe')
+        guardar_no_cache(tabelas, sql, params, df, agora)
+    return df if formato == 'dataframe' else resultado_em_listas(df)
+
+def guardar_no_cache(tabelas, sql, params, df, agora=None):
+    # Sem colunas = erro na consulta; não guarda para tentar de novo na próxima leitura
+    if not len(df.columns):
+        return
+    chave = (tuple(tabelas), sql, tuple(params) if params else None)
+    with _cache_lock:
+        _cache_leituras[chave] = ((agora or time.monotonic()) + CACHE_TTL_SEGUNDOS, df)
+        _cache_leituras.move_to_end(chave)
+        while len(_cache_leituras) > CACHE_MAX_ENTRADAS:
+            _cache_leituras.popitem(last=False)
+
+def consultar_cache(tabelas, sql, params=None):
+    # Só espia o cache: devolve o DataFrame se a entrada existir e estiver válida, sem ir ao banco
+    entrada = entrada_no_cache(tabelas, sql, params)
+    return entrada[1] if entrada else None
+
+def entrada_no_cache(tabelas, sql, params=None):
+    # (expira_em, DataFrame) da entrada válida, ou None
+    chave = (tuple(tabelas), sql, tuple(params) if params else None)
+    with _cache_lock:
+        entrada = _cache_leituras.get(chave)
+    return entrada if entrada and entrada[0] > time.monotonic() else None
+
+def invalidar_cache(*tabelas, repositorio=True):
+    # repositorio=False preserva a cópia em memória (já corrigida por escrever_linha)
+    alvo = {t.upper() for t in tabelas}
+    if repositorio:
+        invalidar_repositorio(*alvo)
+    # Cópias incrementais que dependem das tabelas sincronizam na próxima leitura
+    for visao, copia in _copias.items():
+        if not alvo or alvo.intersection(VISOES_INCREMENTAIS[visao]):
+            copia["pendente"] = True
+    with _cache_lock:
+        if not alvo:
+            _cache_leituras.clear()
+            return
+        for chave in [c for c in _cache_leituras if alvo.intersection(c[0])]:
+            del _cache_leituras[chave]
+
+def executar_escrita(session: Session, tabela, sql, params=None):
+    resultado = executar_snowpark_dml(session, sql, params)
+    invalidar_cache(tabela)
+    return resultado
+
+class LinhasAfetadas(int):
+    # Contagem de linhas de uma escrita (os `resultado > 0` de quem chama continuam valendo)
+    # que também traz a linha afetada: a relida após INSERT/UPDATE/MERGE ou a removida no DELETE
+    def __new__(cls, linhas, registro=None):
+        resultado = super().__new__(cls, linhas)
+        resultado.registro = registro
+        return resultado
+
+def reler_linha(session: Session, tabela, localizar):
+    # Releitura no estilo RETURNING, que o Snowflake não tem: a linha de maior ID que casa com
+    # `localizar` ({coluna: valor}). Numa inserção, passe colunas que identificam a linha nova
+    # (sem valores float, que podem não bater com o DECIMAL gravado)
+    condicoes = " AND ".join(f"{validar_coluna(coluna)} IS NOT DISTINCT FROM %s" for coluna in localizar)
+    sql = f"SELECT * FROM {tabela} WHERE ID = (SELECT MAX(ID) FROM {tabela} WHERE {condicoes})"
+    return registro_do_dataframe(executar_snowpark_select(session, sql, list(localizar.values()), formato='dataframe', alertar=False))
+
+def registro_do_dataframe(df):
+    # Primeira linha como Registro
+    registros = registros_do_dataframe(df)
+    return registros[0] if registros else None
+
+def registros_do_dataframe(df):
+    # Coluna a coluna, com a mesma conversão numpy -> Python das cópias em memória
+    colunas = tuple(df.columns)
+    return [Registro(colunas, valores) for valores in zip(*(df[coluna].tolist() for coluna in colunas))]
+
+def escrever_linha(session: Session, tabela, sql, params, localizar, remover=False):
+    # Escrita de uma linha aplicada direto à cópia em memória da tabela, em vez de descartá-la:
+    # a página seguinte não relê a tabela inteira. As consultas em cache que dependem da tabela
+    # (junções, filtros, páginas) continuam invalidadas, e uma releitura em segundo plano das
+    # linhas escritas reconcilia a cópia com o banco. Devolve LinhasAfetadas (ou a mensagem de erro).
+    tabela = tabela.upper()
+    anterior = buscar_na_memoria(tabela, localizar.get('ID')) if remover else None
+    resultado = executar_snowpark_dml(session, sql, params)
+    # O MERGE devolve só as inserções na primeira coluna: 0 também é sucesso quando ele atualizou
+    mescla = sql.lstrip().upper().startswith("MERGE")
+    if not isinstance(resultado, int) or (resultado == 0 and not mescla):
+        invalidar_cache(tabela)
+        return resultado
+
+    if not no_repositorio(tabela):
+        return escrever_fora_do_repositorio(session, tabela, resultado, localizar, remover)
+
+    if remover:
+        registro = anterior or Registro(('ID',), (localizar['ID'],))
+        corrigir = lambda: aplicar_no_repositorio(tabela, removido=localizar['ID'])
+    else:
+        registro = reler_linha(session, tabela, localizar)
+        if registro is None:
+            invalidar_cache(tabela)
+            return LinhasAfetadas(resultado)
+        corrigir = lambda: aplicar_no_repositorio(tabela, registro=registro)
+    invalidar_cache(tabela, repositorio=False)
+    depois_do_commit(tabela, corrigir, lambda: agendar_reconciliacao(tabela, registro['ID']))
+    return LinhasAfetadas(resultado, registro)
+
+def escrever_fora_do_repositorio(session: Session, tabela, resultado, localizar, remover):
+    # Sem cópia em memória (PAGAMENTOS, FEEDBACK_PALESTRAS...): a linha escrita é relida por ID e
+    # trocada na leitura completa da visão em cache, que não volta a ser lida inteira. As demais
+    # consultas da tabela (páginas, junções) são invalidadas como antes
+    definicao = VISOES_PAGINADAS.get(tabela)
+    if definicao is None or definicao["chave"] != ('ID',):
+        # INSCRICOES (chave composta, cópia sincronizada): a linha afetada são os próprios valores escritos
+        invalidar_cache(tabela)
+        return LinhasAfetadas(resultado, Registro(tuple(c.upper() for c in localizar), tuple(localizar.values())))
+
+    registro = Registro(('ID',), (localizar['ID'],)) if remover else reler_linha(session, tabela, localizar)
+    # Visões incrementais se sincronizam sozinhas; numa Transacao o COMMIT invalida o cache inteiro
+    entrada = None
+    if registro is not None and tabela not in VISOES_INCREMENTAIS and _transacao_atual.get() is None:
+        entrada = entrada_no_cache(definicao["tabelas"], definicao["sql"])
+    invalidar_cache(tabela)
+    if registro is None:
+        return LinhasAfetadas(resultado)
+    if entrada is not None:
+        mesclar_na_visao(session, tabela, entrada, registro['ID'], remover)
+    return LinhasAfetadas(resultado, registro)
+
+def mesclar_na_visao(session: Session, visao, entrada, id_registro, remover=False):
+    # `entrada` é a leitura completa da visão (expira_em, DataFrame) tirada do cache antes da
+    # invalidação: volta com a linha relida no lugar da antiga (ou sem ela), com o mesmo prazo
+    definicao = VISOES_PAGINADAS[visao]
+    expira_em, df = entrada
+    df = df[df["ID"] != id_registro]
+    if not remover:
+        sql = f"SELECT * FROM ({definicao['sql']}) AS V WHERE ID = %s"
+        linha = executar_snowpark_select(session, sql, (id_registro,), formato='dataframe', alertar=False)
+        if not len(linha.columns):
+            return
+        df = pd.concat([df, linha], ignore_index=True)
+    chave = (tuple(definicao["tabelas"]), definicao["sql"], None)
+    with _cache_lock:
+        # Uma leitura feita depois da escrita já trouxe a visão atual: fica a dela
+        if chave not in _cache_leituras:
+            _cache_leituras[chave] = (expira_em, df)
+
+def depois_do_commit(tabela, *funcoes):
+    # Dentro de uma Transacao a linha escrita ainda não existe para as outras sessões: a cópia
+    # compartilhada (e a releitura de reconciliação) só é corrigida depois do COMMIT
+    ativa = _transacao_atual.get()
+    if ativa is not None:
+        ativa[0].ao_confirmar += [(tabela, funcao) for funcao in funcoes]
+        return
+    for funcao in funcoes:
+        funcao()
+
+# --- INSERÇÃO EM LOTE ---
+def normalizar_linhas(colunas, linhas):
+    # Aceita DataFrame, iterável de dicts ou de tuplas; devolve tuplas na ordem de `colunas`
+    if isinstance(linhas, pd.DataFrame):
+        df = linhas.rename(columns=str.upper)
+        faltando = [c for c in colunas if c.upper() not in df.columns]
+        if faltando:
+            raise ValueError(f"Colunas ausentes: {', '.join(faltando)}")
+        linhas = df[[c.upper() for c in colunas]].itertuples(index=False, name=None)
+    for linha in linhas:
+        if isinstance(linha, dict):
+            linha = {str(k).upper(): v for k, v in linha.items()}
+            linha = tuple(linha.get(c.upper()) for c in colunas)
+        yield tuple(None if pd.isna(v) else v for v in linha)
+
+def fatiar_em_lotes(linhas, tamanho_lote):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def inserir_em_lote(session: Session, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE_INSERCAO, usar_write_pandas=False):
+    # Um INSERT multi-linha por lote (ou um write_pandas, que faz PUT + COPY em stage).
+    # Um lote com erro não interrompe os demais; o retorno traz o resultado de cada lote.
+    relatorio = []
+    colunas_sql = ", ".join(colunas)
+    linha_binds = "(" + ", ".join(["%s"] * len(colunas)) + ")"
+    for numero, lote in enumerate(fatiar_em_lotes(normalizar_linhas(colunas, linhas), tamanho_lote), start=1):
+        if usar_write_pandas:
+            inicio = time.perf_counter()
+            try:
+                df_lote = pd.DataFrame(lote, columns=[c.upper() for c in colunas])
+                registrar_round_trip()
+                with sessao_emprestada(session) as sessao:
+                    sessao.write_pandas(df_lote, tabela, quote_identifiers=False)
+                resultado = len(lote)
+                registrar_consulta("write_pandas", f"write_pandas {tabela}", inicio, linhas=resultado, bytes_=tamanho_aproximado(df_lote))
+            except Exception as e:
+                resultado = str(e)
+                registrar_consulta("write_pandas", f"write_pandas {tabela}", inicio, erro=resultado)
+        else:
+            sql = f"INSERT INTO {tabela} ({colunas_sql}) VALUES " + ", ".join([linha_binds] * len(lote))
+            resultado = executar_snowpark_dml(session, sql, [v for linha in lote for v in linha])
+        erro = resultado if isinstance(resultado, str) else None
+        relatorio.append({"lote": numero, "linhas": len(lote), "inseridas": 0 if erro else resultado, "erro": erro})
+    invalidar_cache(tabela)
+    return relatorio
+
+# --- REPOSITÓRIO EM MEMÓRIA ---
+# Cópia colunar das tabelas de referência (uma lista por coluna), carregada inteira numa consulta,
+# com um dict ID -> posição e, para as colunas indexadas, um dict valor -> posições.
+# Consultas por ID e por índice ficam O(1), sem ida ao banco; registros são montados sob
+# demanda. Qualquer escrita na tabela (invalidar_cache) descarta a cópia, e o TTL do cache
+# cobre escritas feitas fora do processo. PAGAMENTOS e FEEDBACK_PALESTRAS são históricos que só
+# crescem: ficam de fora, e uma consulta por ID lê só a linha pedida (WHERE ID = ?).
+REPOSITORIO = {
+    'PESSOAS': ('TIPO_PESSOA',),
+    'EVENTOS': ('ORGANIZADOR_ID',),
+    'PALESTRAS': ('EVENTO_ID', 'PALESTRANTE_ID'),
+    'TIPOS_PAGAMENTO': (),
+}
+
+class Registro:
+    # Uma linha do repositório. Indexável por posição, como a lista que buscar_registro_por_id
+    # devolvia, e também por nome de coluna: registro["NOME"] ou registro.nome
+    __slots__ = ("_colunas", "_valores")
+
+    def __init__(self, colunas, valores):
+        self._colunas = colunas
+        self._valores = valores
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self._valores[self._colunas.index(item.upper())]
+        return self._valores[item]
+
+    def __getattr__(self, nome):
+        if nome.startswith("_") or nome.upper() not in self._colunas:
+            raise AttributeError(nome)
+        return self[nome]
+
+    def __len__(self):
+        return len(self._valores)
+
+    def __iter__(self):
+        return iter(self._valores)
+
+    def __eq__(self, outro):
+        return list(self._valores) == list(outro)
+
+    def __repr__(self):
+        return f"Registro({dict(zip(self._colunas, self._valores))})"
+
+class TabelaEmMemoria:
+    __slots__ = ("colunas", "valores", "posicoes", "indices", "expira_em")
+
+    def __init__(self, df, indices=()):
+        self.colunas = tuple(df.columns)
+        self.valores = [df[coluna].tolist() for coluna in self.colunas]  # numpy -> Python
+        self.posicoes = {id_registro: i for i, id_registro in enumerate(self.coluna('ID'))}
+        self.indices = {}
+        for coluna in indices:
+            serie = df[coluna]
+            if pd.api.types.is_string_dtype(serie):
+                serie = serie.str.upper()  # como o UPPER(...) dos filtros em SQL
+            self.indices[coluna] = {valor: posicoes.tolist() for valor, posicoes in serie.groupby(serie).indices.items()}
+        self.expira_em = time.monotonic() + CACHE_TTL_SEGUNDOS
+
+    def _chave_indice(self, coluna, posicao):
+        valor = self.coluna(coluna)[posicao]
+        return valor.upper() if isinstance(valor, str) else valor
+
+    def aplicar(self, registro):
+        # Insere ou substitui a linha (registro com as colunas do SELECT *), mantendo os índices
+        posicao = self.posicoes.get(registro['ID'])
+        if posicao is None:
+            posicao = len(self.valores[0]) if self.valores else 0
+            for valores in self.valores:
+                valores.append(None)
+        else:
+            self._desindexar(posicao)
+        for coluna, valores in zip(self.colunas, self.valores):
+            valores[posicao] = registro[coluna]
+        self.posicoes[registro['ID']] = posicao
+        for coluna, indice in self.indices.items():
+            indice.setdefault(self._chave_indice(coluna, posicao), []).append(posicao)
+
+    def remover(self, id_registro):
+        # Os valores ficam nas listas, mas nenhuma posição ou índice aponta mais para eles
+        posicao = self.posicoes.pop(id_registro, None)
+        if posicao is not None:
+            self._desindexar(posicao)
+
+    def _desindexar(self, posicao):
+        for coluna, indice in self.indices.items():
+            posicoes = indice.get(self._chave_indice(coluna, posicao), [])
+            if posicao in posicoes:
+                posicoes.remove(posicao)
+
+    def coluna(self, nome):
+        return self.valores[self.colunas.index(nome)]
+
+    def registro(self, id_registro):
+        posicao = self.posicoes.get(id_registro)
+        if posicao is None:
+            return None
+        return Registro(self.colunas, tuple(valores[posicao] for valores in self.valores))
+
+    def posicoes_por(self, coluna, *valores):
+        indice = self.indices[coluna]
+        return sorted(p for valor in valores for p in indice.get(valor.upper() if isinstance(valor, str) else valor, ()))
+
+    def linhas(self, posicoes, colunas):
+        selecionadas = [self.coluna(c) for c in colunas]
+        return [[valores[p] for valores in selecionadas] for p in posicoes]
+
+_repositorio = {}
+_repositorio_geracao = {}  # incrementada a cada invalidação: uma carga já iniciada não grava cópia velha
+_repositorio_grandes = set()  # tabelas que passaram de REPOSITORIO_MAX_LINHAS na última carga
+_repositorio_lock = threading.Lock()
+
+def no_repositorio(tabela):
+    return tabela.upper() in REPOSITORIO and tabela.upper() not in _repositorio_grandes
+
+def tabela_em_memoria(session: Session, tabela):
+    # Devolve a cópia da tabela, carregando-a se preciso; None se a tabela não está no repositório,
+    # é grande demais para ele ou a carga falhou
+    tabela = tabela.upper()
+    if not no_repositorio(tabela):
+        return None
+    with _repositorio_lock:
+        copia = _repositorio.get(tabela)
+        if copia is not None and copia.expira_em > time.monotonic():
+            return copia
+        geracao = _repositorio_geracao.get(tabela, 0)
+    return carregar_tabela(session, tabela, geracao)
+
+def carregar_tabela(session: Session, tabela, geracao, alertar=True):
+    # O LIMIT descobre o tamanho sem um COUNT(*) à parte e sem trazer a tabela inteira se ela cresceu
+    sql = f"SELECT * FROM {tabela} LIMIT {REPOSITORIO_MAX_LINHAS + 1}"
+    df = executar_snowpark_select(session, sql, formato='dataframe', alertar=alertar)
+    if not len(df.columns):
+        return None
+    if len(df) > REPOSITORIO_MAX_LINHAS:
+        with _repositorio_lock:
+            _repositorio_grandes.add(tabela)
+            _repositorio.pop(tabela, None)
+        return None
+    copia = TabelaEmMemoria(df, REPOSITORIO[tabela])
+    with _repositorio_lock:
+        if _repositorio_geracao.get(tabela, 0) == geracao:
+            _repositorio[tabela] = copia
+    return copia
+
+def buscar_na_memoria(tabela, id_registro):
+    # Só espia a cópia carregada, sem ir ao banco
+    with _repositorio_lock:
+        copia = _repositorio.get(tabela.upper())
+    return copia.registro(id_registro) if copia is not None and id_registro is not None else None
+
+def aplicar_no_repositorio(tabela, registro=None, removido=None):
+    with _repositorio_lock:
+        # Uma carga iniciada antes da escrita traria a linha antiga: é descartada
+        _repositorio_geracao[tabela] = _repositorio_geracao.get(tabela, 0) + 1
+        copia = _repositorio.get(tabela)
+        if copia is None:
+            return
+        if removido is not None:
+            copia.remover(removido)
+        else:
+            copia.aplicar(registro)
+
+_reconciliacoes = {}  # tabela -> (releitura agendada, IDs escritos desde a última)
+
+def agendar_reconciliacao(tabela, id_registro):
+    # A cópia corrigida localmente pode divergir do banco (valores padrão, triggers...); relê
+    # só as linhas escritas, fora da renderização. O resto da tabela fica com o TTL da cópia
+    with _repositorio_lock:
+        anterior, ids = _reconciliacoes.get(tabela, (None, set()))
+        if anterior is not None:
+            anterior.cancel()
+        ids.add(id_registro)
+        temporizador = threading.Timer(RECONCILIACAO_ATRASO_SEGUNDOS, reconciliar_tabela, args=(tabela,))
+        temporizador.daemon = True
+        _reconciliacoes[tabela] = (temporizador, ids)
+        temporizador.start()
+
+def reconciliar_tabela(tabela):
+    # Usa o pool (e não a sessão da escrita, que pode ser a de uma transação já devolvida)
+    with _repositorio_lock:
+        _, ids = _reconciliacoes.pop(tabela, (None, set()))
+    if not ids:
+        return
+    try:
+        placeholders = ", ".join(["%s"] * len(ids))
+        sql = f"SELECT * FROM {tabela} WHERE ID IN ({placeholders})"
+        df = executar_snowpark_select(obter_pool(), sql, sorted(ids), formato='dataframe', alertar=False)
+        if not len(df.columns):
+            return
+        registros = registros_do_dataframe(df)
+        for registro in registros:
+            aplicar_no_repositorio(tabela, registro=registro)
+        # ID escrito que não voltou: a linha foi apagada (por esta ou outra escrita)
+        for id_registro in ids - {registro['ID'] for registro in registros}:
+            aplicar_no_repositorio(tabela, removido=id_registro)
+    except Exception:
+        logger_consultas.exception("Falha ao reconciliar %s", tabela)
+
+def carregar_repositorio(session: Session, *tabelas):
+    # Carga em massa antecipada (por padrão, de todas as tabelas do repositório)
+    for tabela in tabelas or REPOSITORIO:
+        tabela_em_memoria(session, tabela)
+
+def invalidar_repositorio(*tabelas):
+    with _repositorio_lock:
+        if not tabelas:
+            # Invalidação completa (ex.: carga em massa): o tamanho das tabelas é medido de novo
+            _repositorio_grandes.clear()
+        for tabela in [t.upper() for t in tabelas] or list(REPOSITORIO):
+            _repositorio.pop(tabela, None)
+            _repositorio_geracao[tabela] = _repositorio_geracao.get(tabela, 0) + 1
 
 def buscar_ids_nomes(session: Session, tabela, nome_coluna='NOME'):
+    # Tabelas do repositório respondem da cópia em memória (já carregada pelo aquecimento)
+    copia = tabela_em_memoria(session, tabela)
+    if copia is not None:
+        colunas = ['ID', validar_coluna(nome_coluna)]
+        return colunas, copia.linhas(sorted(copia.posicoes.values()), colunas)
     sql = f"SELECT ID, {nome_coluna} FROM {tabela}"
-    return executar_snowpark_select(session, sql)
+    return ler_com_cache(session, (tabela.upper(),), sql)
+
+def buscar_pessoas_por_tipo(session: Session, *tipos_pessoa):
+    # (ID, NOME, TIPO_PESSOA) das pessoas dos tipos pedidos, pelo índice de TIPO_PESSOA do
+    # repositório; a consulta em SQL fica como alternativa se a carga falhar
+    if not tipos_pessoa:
+        return [], []
+    colunas = ['ID', 'NOME', 'TIPO_PESSOA']
+    pessoas = tabela_em_memoria(session, 'PESSOAS')
+    if pessoas is not None:
+        return colunas, pessoas.linhas(pessoas.posicoes_por('TIPO_PESSOA', *tipos_pessoa), colunas)
+    placeholders = ", ".join(["%s"] * len(tipos_pessoa))
+    sql = f"SELECT ID, NOME, TIPO_PESSOA FROM PESSOAS WHERE UPPER(TIPO_PESSOA) IN ({placeholders})"
+    return ler_com_cache(session, ('PESSOAS',), sql, tuple(t.upper() for t in tipos_pessoa))
 
 def buscar_registro_por_id(session: Session, tabela, id_registro):
+    copia = tabela_em_memoria(session, tabela)
+    if copia is not None:
+        return copia.registro(id_registro)
+    # Fora do repositório: só a linha pedida, pela chave primária
     sql = f"SELECT * FROM {tabela} WHERE ID = %s"
-    _, dados = executar_snowpark_select(session, sql, (id_registro,))
-    return dados[0] if dados else None
+    return registro_do_dataframe(executar_snowpark_select(session, sql, (id_registro,), formato='dataframe'))
 
 def deletar_registro_por_id(session: Session, tabela, id_registro):
+    afetados = grupos_afetados(session, tabela, id_registro)
     sql = f"DELETE FROM {tabela} WHERE ID = %s"
-    return executar_snowpark_dml(session, sql, (id_registro,))
+    resultado = escrever_linha(session, tabela, sql, (id_registro,), {'ID': id_registro}, remover=True)
+    if isinstance(resultado, int) and resultado > 0:
+        recalcular_resumos(session, *afetados)
+    return resultado
 
 def criar_pessoa(session: Session, nome, email, telefone, tipo_pessoa):
     sql = "INSERT INTO PESSOAS (nome, email, telefone, tipo_pessoa) VALUES (%s, %s, %s, %s)"
-    return executar_snowpark_dml(session, sql, (nome, email, telefone, tipo_pessoa))
+    localizar = {'NOME': nome, 'EMAIL': email, 'TELEFONE': telefone, 'TIPO_PESSOA': tipo_pessoa}
+    return escrever_linha(session, 'PESSOAS', sql, (nome, email, telefone, tipo_pessoa), localizar)
 
-def ler_pessoas(session: Session):
-    sql = "SELECT id, nome, email, telefone, tipo_pessoa FROM PESSOAS"
-    return executar_snowpark_select(session, sql)
+def criar_pessoas_em_lote(session: Session, linhas, tamanho_lote=TAMANHO_LOTE_INSERCAO, usar_write_pandas=False):
+    colunas = ("nome", "email", "telefone", "tipo_pessoa")
+    return inserir_em_lote(session, 'PESSOAS', colunas, linhas, tamanho_lote, usar_write_pandas)
+
+SQL_LER_PESSOAS = "SELECT id, nome, email, telefone, tipo_pessoa FROM PESSOAS"
+
+def ler_pessoas(session: Session, formato='listas'):
+    return ler_visao(session, 'PESSOAS', formato)
 
 def atualizar_pessoa(session: Session, id_pessoa, nome, email, telefone, tipo_pessoa):
     sql = "UPDATE PESSOAS SET nome = %s, email = %s, telefone = %s, tipo_pessoa = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (nome, email, telefone, tipo_pessoa, id_pessoa))
+    return escrever_linha(session, 'PESSOAS', sql, (nome, email, telefone, tipo_pessoa, id_pessoa), {'ID': id_pessoa})
 
 def criar_evento(session: Session, nome, data_inicio, data_fim, local, organizador_id):
     sql = "INSERT INTO EVENTOS (nome, data_inicio, data_fim, local, organizador_id) VALUES (%s, %s, %s, %s, %s)"
-    return executar_snowpark_dml(session, sql, (nome, data_inicio, data_fim, local, organizador_id))
+    localizar = {'NOME': nome, 'LOCAL': local, 'ORGANIZADOR_ID': organizador_id}
+    resultado = escrever_linha(session, 'EVENTOS', sql, (nome, data_inicio, data_fim, local, organizador_id), localizar)
+    if isinstance(resultado, int) and resultado > 0:
+        manter_resumos(session, (SQL_DELTA_EVENTO_ORGANIZADOR, (organizador_id,)))
+    return resultado
 
-def ler_eventos(session: Session):
-    sql = """
+SQL_LER_EVENTOS = """
     SELECT
         E.id, E.nome AS nome_evento, E.data_inicio, E.data_fim, E.local, P.nome AS organizador
     FROM
@@ -96,18 +1040,25 @@ def ler_eventos(session: Session):
     JOIN
         PESSOAS P ON E.organizador_id = P.id
     """
-    return executar_snowpark_select(session, sql)
+
+def ler_eventos(session: Session, formato='listas'):
+    return ler_visao(session, 'EVENTOS', formato)
 
 def atualizar_evento(session: Session, id_evento, nome, data_inicio, data_fim, local, organizador_id):
+    organizadores, _ = grupos_afetados(session, 'EVENTOS', id_evento)
     sql = "UPDATE EVENTOS SET nome = %s, data_inicio = %s, data_fim = %s, local = %s, organizador_id = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (nome, data_inicio, data_fim, local, organizador_id, id_evento))
+    resultado = escrever_linha(session, 'EVENTOS', sql, (nome, data_inicio, data_fim, local, organizador_id, id_evento), {'ID': id_evento})
+    if isinstance(resultado, int) and resultado > 0:
+        # Trocar o organizador move o evento (e seus pagamentos) de um resumo para outro
+        recalcular_resumos(session, organizadores | {organizador_id})
+    return resultado
 
 def criar_palestra(session: Session, titulo, descricao, data, hora, sala, evento_id, palestrante_id):
     sql = "INSERT INTO PALESTRAS (titulo, descricao, data, hora, sala, evento_id, palestrante_id) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-    return executar_snowpark_dml(session, sql, (titulo, descricao, data, hora, sala, evento_id, palestrante_id))
+    localizar = {'TITULO': titulo, 'SALA': sala, 'EVENTO_ID': evento_id, 'PALESTRANTE_ID': palestrante_id}
+    return escrever_linha(session, 'PALESTRAS', sql, (titulo, descricao, data, hora, sala, evento_id, palestrante_id), localizar)
 
-def ler_palestras(session: Session):
-    sql = """
+SQL_LER_PALESTRAS = """
     SELECT
         L.id, L.titulo, L.data, L.hora, L.sala, E.nome AS evento, P.nome AS palestrante
     FROM
@@ -117,18 +1068,24 @@ def ler_palestras(session: Session):
     JOIN
         PESSOAS P ON L.palestrante_id = P.id
     """
-    return executar_snowpark_select(session, sql)
+
+def ler_palestras(session: Session, formato='listas'):
+    return ler_visao(session, 'PALESTRAS', formato)
 
 def atualizar_palestra(session: Session, id_palestra, titulo, descricao, data, hora, sala, evento_id, palestrante_id):
     sql = "UPDATE PALESTRAS SET titulo = %s, descricao = %s, data = %s, hora = %s, sala = %s, evento_id = %s, palestrante_id = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (titulo, descricao, data, hora, sala, evento_id, palestrante_id, id_palestra))
+    return escrever_linha(session, 'PALESTRAS', sql, (titulo, descricao, data, hora, sala, evento_id, palestrante_id, id_palestra), {'ID': id_palestra})
 
 def criar_inscricao(session: Session, participante_id, palestra_id, data_inscricao):
     sql = "INSERT INTO INSCRICOES (participante_id, palestra_id, data_inscricao) VALUES (%s, %s, %s)"
-    return executar_snowpark_dml(session, sql, (participante_id, palestra_id, data_inscricao))
+    localizar = {'PARTICIPANTE_ID': participante_id, 'PALESTRA_ID': palestra_id, 'DATA_INSCRICAO': data_inscricao}
+    return escrever_linha(session, 'INSCRICOES', sql, (participante_id, palestra_id, data_inscricao), localizar)
 
-def ler_inscricoes(session: Session):
-    sql = """
+def criar_inscricoes_em_lote(session: Session, linhas, tamanho_lote=TAMANHO_LOTE_INSERCAO, usar_write_pandas=False):
+    colunas = ("participante_id", "palestra_id", "data_inscricao")
+    return inserir_em_lote(session, 'INSCRICOES', colunas, linhas, tamanho_lote, usar_write_pandas)
+
+SQL_LER_INSCRICOES = """
     SELECT
         I.participante_id, I.palestra_id, P.nome AS participante, L.titulo AS palestra, I.data_inscricao
     FROM
@@ -138,18 +1095,36 @@ def ler_inscricoes(session: Session):
     JOIN
         PALESTRAS L ON I.palestra_id = L.id
     """
-    return executar_snowpark_select(session, sql)
+
+def ler_inscricoes(session: Session, formato='listas'):
+    return ler_visao(session, 'INSCRICOES', formato)
 
 def deletar_inscricao(session: Session, participante_id, palestra_id):
     sql = "DELETE FROM INSCRICOES WHERE participante_id = %s AND palestra_id = %s"
-    return executar_snowpark_dml(session, sql, (participante_id, palestra_id))
+    localizar = {'PARTICIPANTE_ID': participante_id, 'PALESTRA_ID': palestra_id}
+    return escrever_linha(session, 'INSCRICOES', sql, (participante_id, palestra_id), localizar, remover=True)
 
 def criar_pagamento(session: Session, participante_id, evento_id, valor, status, tipo_pagamento_id):
     sql = "INSERT INTO PAGAMENTOS (participante_id, evento_id, valor, status, tipo_pagamento_id) VALUES (%s, %s, %s, %s, %s)"
-    return executar_snowpark_dml(session, sql, (participante_id, evento_id, valor, status, tipo_pagamento_id))
+    localizar = {'PARTICIPANTE_ID': participante_id, 'EVENTO_ID': evento_id, 'STATUS': status, 'TIPO_PAGAMENTO_ID': tipo_pagamento_id}
+    resultado = escrever_linha(session, 'PAGAMENTOS', sql, (participante_id, evento_id, valor, status, tipo_pagamento_id), localizar)
+    if isinstance(resultado, int) and resultado > 0:
+        manter_resumos(
+            session,
+            (SQL_DELTA_PAGAMENTO_STATUS, (status, valor)),
+            (SQL_DELTA_PAGAMENTO_ORGANIZADOR, (valor, evento_id)),
+        )
+    return resultado
 
-def ler_pagamentos(session: Session):
-    sql = """
+def criar_pagamentos_em_lote(session: Session, linhas, tamanho_lote=TAMANHO_LOTE_INSERCAO, usar_write_pandas=False):
+    colunas = ("participante_id", "evento_id", "valor", "status", "tipo_pagamento_id")
+    relatorio = inserir_em_lote(session, 'PAGAMENTOS', colunas, linhas, tamanho_lote, usar_write_pandas)
+    if any(lote["inseridas"] for lote in relatorio):
+        # Numa carga em massa, recalcular os resumos de uma vez sai mais barato que um delta por linha
+        reconstruir_resumos(session)
+    return relatorio
+
+SQL_LER_PAGAMENTOS = """
         SELECT
             PG.id, P.nome AS participante, E.nome AS evento, PG.valor, PG.status, T.nome AS tipo_pagamento, PG.TIPO_PAGAMENTO_ID
         FROM
@@ -161,41 +1136,49 @@ def ler_pagamentos(session: Session):
         LEFT JOIN
             TIPOS_PAGAMENTO T ON PG.TIPO_PAGAMENTO_ID = T.ID
     """
-    return executar_snowpark_select(session, sql)
+
+def ler_pagamentos(session: Session, formato='listas'):
+    return ler_visao(session, 'PAGAMENTOS', formato)
 
 def atualizar_pagamento(session: Session, id_pagamento, valor, status, tipo_pagamento_id):
+    organizadores, status_antigos = grupos_afetados(session, 'PAGAMENTOS', id_pagamento)
     sql = "UPDATE PAGAMENTOS SET valor = %s, status = %s, tipo_pagamento_id = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (valor, status, tipo_pagamento_id, id_pagamento))
+    resultado = escrever_linha(session, 'PAGAMENTOS', sql, (valor, status, tipo_pagamento_id, id_pagamento), {'ID': id_pagamento})
+    if isinstance(resultado, int) and resultado > 0:
+        recalcular_resumos(session, organizadores, status_antigos | {status})
+    return resultado
 
 def criar_tipo_pagamento(session: Session, nome):
     sql = "INSERT INTO TIPOS_PAGAMENTO (nome) VALUES (%s)"
-    return executar_snowpark_dml(session, sql, (nome,))
+    return escrever_linha(session, 'TIPOS_PAGAMENTO', sql, (nome,), {'NOME': nome})
+
+SQL_LER_TIPOS_PAGAMENTO = "SELECT id, nome FROM TIPOS_PAGAMENTO"
 
-def ler_tipos_pagamento(session: Session):
-    sql = "SELECT id, nome FROM TIPOS_PAGAMENTO"
-    return executar_snowpark_select(session, sql)
+def ler_tipos_pagamento(session: Session, formato='listas'):
+    return ler_visao(session, 'TIPOS_PAGAMENTO', formato)
 
 def atualizar_tipo_pagamento(session: Session, id_tipo, nome):
     sql = "UPDATE TIPOS_PAGAMENTO SET nome = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (nome, id_tipo))
+    return escrever_linha(session, 'TIPOS_PAGAMENTO', sql, (nome, id_tipo), {'ID': id_tipo})
 
 def upsert_feedback(session: Session, participante_id, palestra_id, nota, comentario):
-    sql = f"""
+    sql = """
     MERGE INTO FEEDBACK_PALESTRAS AS target
     USING (
-        SELECT {participante_id} AS participante_id, {palestra_id} AS palestra_id, {nota} AS nota, '{comentario}' AS comentario
+        SELECT %s AS participante_id, %s AS palestra_id, %s AS nota, %s AS comentario
     ) AS source
     ON target.participante_id = source.participante_id AND target.palestra_id = source.palestra_id
     WHEN MATCHED THEN
-        UPDATE SET target.nota = source.nota, target.comentario = source.comentario
+        UPDATE SET nota = source.nota, comentario = source.comentario
     WHEN NOT MATCHED THEN
         INSERT (participante_id, palestra_id, nota, comentario)
         VALUES (source.participante_id, source.palestra_id, source.nota, source.comentario)
     """
-    return executar_snowpark_dml(session, sql)
+    # O MERGE garante um feedback por (participante, palestra): esse par localiza a linha
+    localizar = {'PARTICIPANTE_ID': participante_id, 'PALESTRA_ID': palestra_id}
+    return escrever_linha(session, 'FEEDBACK_PALESTRAS', sql, (participante_id, palestra_id, nota, comentario), localizar)
 
-def ler_feedback(session: Session):
-    sql = """
+SQL_LER_FEEDBACK = """
     SELECT
         F.id, P.nome AS participante, L.titulo AS palestra, F.nota, F.comentario
     FROM
@@ -205,14 +1188,727 @@ def ler_feedback(session: Session):
     JOIN
         PALESTRAS L ON F.palestra_id = L.id
     """
-    return executar_snowpark_select(session, sql)
+
+def ler_feedback(session: Session, formato='listas'):
+    return ler_visao(session, 'FEEDBACK_PALESTRAS', formato)
 
 def atualizar_feedback(session: Session, id_feedback, nota, comentario):
     sql = "UPDATE FEEDBACK_PALESTRAS SET nota = %s, comentario = %s WHERE id = %s"
-    return executar_snowpark_dml(session, sql, (nota, comentario, id_feedback))
+    return escrever_linha(session, 'FEEDBACK_PALESTRAS', sql, (nota, comentario, id_feedback), {'ID': id_feedback})
 
-def consulta_participantes_palestra(session: Session):
-    sql = """
+# --- TRANSAÇÕES (UNIDADE DE TRABALHO) ---
+# Uma Transacao enfileira chamadas das funções de escrita acima (criar_*, atualizar_*, upsert_*,
+# deletar_*) e, em executar(), as repete em ordem numa única sessão entre BEGIN e COMMIT.
+# Enfileirar a chamada, e não só o SQL, preserva a manutenção dos resumos, que depende do
+# resultado de cada escrita e entra na mesma transação. O Snowpark executa um comando por
+# sessao.sql(), então são vários comandos numa só transação, não uma requisição multi-comando.
+# write_pandas e DDL fazem commit implícito no Snowflake e não devem ser usados aqui.
+# Não há transação aninhada: uma Transacao executada durante outra (ex.: por uma das chamadas
+# enfileiradas) entra na de fora, na mesma sessão, e uma falha dela desfaz a unidade inteira.
+class Adiado:
+    # Argumento resolvido só durante a execução, na sessão da transação (que enxerga as escritas
+    # anteriores dela), ex.: o ID de uma pessoa inserida na mesma transação
+    def __init__(self, funcao, *args):
+        self.funcao = funcao
+        self.args = args
+
+    def resolver(self, sessao):
+        return self.funcao(sessao, *self.args)
+
+class Transacao:
+    def __init__(self, session, invalidar=True):
+        self.session = session
+        self.invalidar = invalidar
+        self.chamadas = []
+        self.relatorio = []  # um item por comando DML: chamada, sql, linhas, erro
+        self.ok = None
+        self.erro = None
+        self.falha_interna = None  # falha de uma unidade que entrou nesta (ver juntar_a)
+        self.ao_confirmar = []  # (tabela, função) de escrever_linha, aplicadas só se houver COMMIT
+
+    def adicionar(self, funcao, *args, **kwargs):
+        self.chamadas.append((funcao, args, kwargs))
+        return self
+
+    def executar(self):
+        self.relatorio, self.ok, self.erro, self.ao_confirmar = [], False, None, []
+        externa = _transacao_atual.get()
+        if externa is not None:
+            return self.juntar_a(*externa)
+        if not self.chamadas:
+            self.ok = True
+            return True
+        try:
+            with sessao_emprestada(self.session) as sessao:
+                self.ok = contextvars.copy_context().run(self._executar_na_sessao, sessao)
+        except Exception as e:
+            self.erro = self.erro or str(e)
+        finally:
+            corrigidas = self.confirmar_na_memoria() if self.ok else set()
+            # Escritas da transação invalidaram o cache antes do COMMIT; leituras feitas nesse
+            # intervalo podem ter guardado o estado anterior. A cópia das tabelas já corrigidas
+            # linha a linha é preservada
+            restantes = [t for t in REPOSITORIO if t not in corrigidas]
+            if self.invalidar and corrigidas:
+                invalidar_cache(repositorio=False)
+                if restantes:  # sem argumentos, invalidar_repositorio descartaria todas
+                    invalidar_repositorio(*restantes)
+            elif self.invalidar:
+                invalidar_cache()
+        return self.ok
+
+    def confirmar_na_memoria(self):
+        # Depois do COMMIT: aplica à cópia em memória as linhas escritas e agenda a reconciliação
+        for _, funcao in self.ao_confirmar:
+            funcao()
+        return {tabela for tabela, _ in self.ao_confirmar}
+
+    def _executar_na_sessao(self, sessao):
+        # Roda numa cópia do contexto: _transacao_atual vale só enquanto a unidade executa
+        _transacao_atual.set((self, sessao))
+        executar_comando(sessao, "BEGIN TRANSACTION", "transacao")
+        try:
+            ok = self._executar_chamadas(sessao)
+        except BaseException:
+            executar_comando(sessao, "ROLLBACK", "transacao")
+            raise
+        executar_comando(sessao, "COMMIT" if ok else "ROLLBACK", "transacao")
+        return ok
+
+    def juntar_a(self, externa, sessao):
+        # Unidade executada dentro de outra: sem BEGIN/COMMIT próprios, na sessão da de fora. Uma
+        # falha aqui fica registrada na de fora, que a trata como falha da chamada em curso
+        self.ok = self._executar_chamadas(sessao)
+        if not self.ok:
+            externa.falha_interna = externa.falha_interna or self.erro
+        return self.ok
+
+    def _executar_chamadas(self, sessao):
+        coleta_externa = _coleta_atual.get()
+        try:
+            for funcao, args, kwargs in self.chamadas:
+                registros = []
+                _coleta_atual.set(registros)
+                self.falha_interna = None
+                try:
+                    args = [a.resolver(sessao) if isinstance(a, Adiado) else a for a in args]
+                    resultado = funcao(sessao, *args, **kwargs)
+                    falha = resultado if isinstance(resultado, str) else next((r["erro"] for r in registros if r["erro"]), None)
+                    falha = falha or self.falha_interna
+                except Exception as e:
+                    falha = str(e)
+                self.relatorio += [
+                    {"chamada": funcao.__name__, "sql": r["sql"], "linhas": r["linhas"], "erro": r["erro"]}
+                    for r in registros if r["tipo"] == "dml"
+                ]
+                if coleta_externa is not None:
+                    coleta_externa.extend(registros)
+                if falha:
+                    self.erro = f"{funcao.__name__}: {falha}"
+                    return False
+        finally:
+            _coleta_atual.set(coleta_externa)
+        return True
+
+@contextmanager
+def transacao(session):
+    # with transacao(pool) as t: t.adicionar(criar_pessoa, ...); ...
+    # Executa ao sair do bloco (nada é enviado se o bloco levantar exceção); o resultado
+    # fica em t.ok, t.erro e t.relatorio
+    unidade = Transacao(session)
+    yield unidade
+    unidade.executar()
+
+def buscar_id_por_coluna(session: Session, tabela, coluna, valor):
+    # ID mais recente com coluna = valor; útil com Adiado para encadear inserções
+    sql = f"SELECT MAX(ID) FROM {tabela} WHERE {validar_coluna(coluna)} = %s"
+    _, dados = executar_snowpark_select(session, sql, (valor,))
+    return dados[0][0] if dados else None
+
+def registrar_participante(session: Session, nome, email, telefone, palestras_ids, data_inscricao, pagamento=None):
+    # Cadastra o participante, inscreve-o nas palestras e, se informado, registra o pagamento
+    # (evento_id, valor, status, tipo_pagamento_id), tudo ou nada. Devolve a Transacao executada.
+    participante_id = Adiado(buscar_id_por_coluna, 'PESSOAS', 'EMAIL', email)
+    with transacao(session) as t:
+        t.adicionar(criar_pessoa, nome, email, telefone, 'Participante')
+        for palestra_id in palestras_ids:
+            t.adicionar(criar_inscricao, participante_id, palestra_id, data_inscricao)
+        if pagamento:
+            t.adicionar(criar_pagamento, participante_id, *pagamento)
+    return t
+
+# --- LEITURA PAGINADA (KEYSET) ---
+# Cada visão paginável reaproveita o SELECT do ler_* correspondente. A chave é única
+# e não nula (ID, ou a chave composta de INSCRICOES) e desempata a ordenação.
+VISOES_PAGINADAS = {
+    'PESSOAS': {"sql": SQL_LER_PESSOAS, "tabelas": ('PESSOAS',), "chave": ('ID',)},
+    'EVENTOS': {"sql": SQL_LER_EVENTOS, "tabelas": ('EVENTOS', 'PESSOAS'), "chave": ('ID',)},
+    'PALESTRAS': {"sql": SQL_LER_PALESTRAS, "tabelas": ('PALESTRAS', 'EVENTOS', 'PESSOAS'), "chave": ('ID',)},
+    'INSCRICOES': {"sql": SQL_LER_INSCRICOES, "tabelas": ('INSCRICOES', 'PESSOAS', 'PALESTRAS'), "chave": ('PARTICIPANTE_ID', 'PALESTRA_ID')},
+    'PAGAMENTOS': {"sql": SQL_LER_PAGAMENTOS, "tabelas": ('PAGAMENTOS', 'PESSOAS', 'EVENTOS', 'TIPOS_PAGAMENTO'), "chave": ('ID',)},
+    'TIPOS_PAGAMENTO': {"sql": SQL_LER_TIPOS_PAGAMENTO, "tabelas": ('TIPOS_PAGAMENTO',), "chave": ('ID',)},
+    'FEEDBACK_PALESTRAS': {"sql": SQL_LER_FEEDBACK, "tabelas": ('FEEDBACK_PALESTRAS', 'PESSOAS', 'PALESTRAS'), "chave": ('ID',)},
+}
+
+# Leituras completas (ler_*) -> visão de que vêm; o db_async monta as suas a partir daqui
+LEITURAS = {
+    'ler_pessoas': 'PESSOAS',
+    'ler_eventos': 'EVENTOS',
+    'ler_palestras': 'PALESTRAS',
+    'ler_inscricoes': 'INSCRICOES',
+    'ler_pagamentos': 'PAGAMENTOS',
+    'ler_tipos_pagamento': 'TIPOS_PAGAMENTO',
+    'ler_feedback': 'FEEDBACK_PALESTRAS',
+}
+
+def ler_visao(session: Session, visao, formato='listas'):
+    # A visão inteira: pela cópia sincronizada, se a visão tem uma, ou pelo cache de leituras
+    if visao in VISOES_INCREMENTAIS:
+        return ler_incremental(session, visao, formato)
+    definicao = VISOES_PAGINADAS[visao]
+    return ler_com_cache(session, definicao["tabelas"], definicao["sql"], formato=formato)
+
+def validar_coluna(coluna):
+    # Nomes de coluna não podem ser bind; só aceita identificadores simples
+    if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", coluna or ""):
+        raise ValueError(f"Coluna inválida: {coluna!r}")
+    return coluna.upper()
+
+def condicao_keyset(colunas, valores, decrescente=False):
+    # (a, b, c) > (x, y, z) expandido em: a > x OR (a = x AND (b > y OR (b = y AND c > z))).
+    # Os nulos vêm por último (NULLS LAST), nos dois sentidos: depois de um valor x vêm também
+    # os a IS NULL; com o cursor já entre os nulos (x nulo), só a IS NULL AND (resto)
+    op = '<' if decrescente else '>'
+    expr, params = None, []
+    for coluna, valor in zip(reversed(colunas), reversed(valores)):
+        if valor is None:
+            expr = "FALSE" if expr is None else f"{coluna} IS NULL AND ({expr})"
+        elif expr is None:
+            expr, params = f"{coluna} {op} %s OR {coluna} IS NULL", [valor]
+        else:
+            expr = f"{coluna} {op} %s OR {coluna} IS NULL OR ({coluna} = %s AND ({expr}))"
+            params = [valor, valor] + params
+    return f"({expr})", params
+
+def ler_pagina(session: Session, visao, apos=None, tamanho=PAGINA_TAMANHO, ordenar_por=None, decrescente=False, filtro=None):
+    # Devolve (DataFrame da página, cursor da próxima página ou None).
+    # `apos` é o cursor devolvido pela página anterior; `filtro` é (coluna, texto) e vira um ILIKE.
+    # Linhas com NULL na coluna de ordenação vêm depois das demais (NULLS LAST), em qualquer sentido.
+    definicao = VISOES_PAGINADAS[visao]
+    colunas_ordem = list(definicao["chave"])
+    if ordenar_por and validar_coluna(ordenar_por) not in colunas_ordem:
+        colunas_ordem.insert(0, validar_coluna(ordenar_por))
+
+    condicoes, params = [], []
+    if filtro:
+        coluna_filtro, texto = filtro
+        condicoes.append(f"CAST({validar_coluna(coluna_filtro)} AS VARCHAR) ILIKE %s")
+        params.append(f"%{texto}%")
+    if apos is not None:
+        condicao, params_keyset = condicao_keyset(colunas_ordem, list(apos), decrescente)
+        condicoes.append(condicao)
+        params.extend(params_keyset)
+
+    direcao = " DESC" if decrescente else ""
+    sql = f"SELECT * FROM ({definicao['sql']}) AS V"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += " ORDER BY " + ", ".join(f"{c}{direcao} NULLS LAST" for c in colunas_ordem)
+    sql += f" LIMIT {int(tamanho) + 1}"
+
+    df = ler_com_cache(session, definicao["tabelas"], sql, params, formato='dataframe')
+    if len(df) <= tamanho:
+        return df, None
+    pagina = df.iloc[:tamanho]
+    ultima = pagina.iloc[-1]
+    # NaN/NaT/None do pandas viram None: o cursor parado num nulo usa o ramo IS NULL
+    return pagina, tuple(None if pd.isna(ultima[c]) else ultima[c] for c in colunas_ordem)
+
+def prefetch_pagina(session: Session, visao, apos, **opcoes):
+    # Carrega a próxima página em segundo plano; ela fica no cache para o clique em "Próxima"
+    threading.Thread(target=contextvars.copy_context().run, args=(ler_pagina, session, visao, apos), kwargs=opcoes, daemon=True).start()
+
+# --- SINCRONIZAÇÃO INCREMENTAL ---
+# Estas visões mantêm uma cópia completa em memória. Em vez de reler a junção inteira, cada
+# sincronização pergunta ao Snowflake (cláusula CHANGES) quais linhas das tabelas base mudaram
+# desde a última marca de tempo, traduz isso nas chaves afetadas da visão e relê só essas linhas.
+# Inserção, alteração e exclusão têm o mesmo tratamento: as chaves afetadas saem da cópia e
+# voltam as que ainda existem. Para cada tabela base: SQL que leva as linhas alteradas dela
+# ({mudancas}) às chaves da visão.
+VISOES_INCREMENTAIS = {
+    'EVENTOS': {
+        'EVENTOS': "SELECT ID FROM {mudancas}",
+        'PESSOAS': "SELECT E.ID FROM EVENTOS E WHERE E.ORGANIZADOR_ID IN (SELECT ID FROM {mudancas})",
+    },
+    'PALESTRAS': {
+        'PALESTRAS': "SELECT ID FROM {mudancas}",
+        'EVENTOS': "SELECT L.ID FROM PALESTRAS L WHERE L.EVENTO_ID IN (SELECT ID FROM {mudancas})",
+        'PESSOAS': "SELECT L.ID FROM PALESTRAS L WHERE L.PALESTRANTE_ID IN (SELECT ID FROM {mudancas})",
+    },
+    'INSCRICOES': {
+        'INSCRICOES': "SELECT PARTICIPANTE_ID, PALESTRA_ID FROM {mudancas}",
+        'PESSOAS': "SELECT I.PARTICIPANTE_ID, I.PALESTRA_ID FROM INSCRICOES I WHERE I.PARTICIPANTE_ID IN (SELECT ID FROM {mudancas})",
+        'PALESTRAS': "SELECT I.PARTICIPANTE_ID, I.PALESTRA_ID FROM INSCRICOES I WHERE I.PALESTRA_ID IN (SELECT ID FROM {mudancas})",
+    },
+}
+
+_copias = {
+    visao: {"lock": threading.Lock(), "df": None, "marca": None, "sincronizada_em": 0.0, "pendente": False}
+    for visao in VISOES_INCREMENTAIS
+}
+_sincronizacao = {"preparada": False, "disponivel": False}
+_sincronizacao_lock = threading.Lock()
+
+def preparar_sincronizacao(session: Session):
+    # Uma vez por processo: liga o change tracking das tabelas base (exige ser dono delas)
+    with _sincronizacao_lock:
+        if not _sincronizacao["preparada"]:
+            try:
+                for tabela in sorted({t for afetadas in VISOES_INCREMENTAIS.values() for t in afetadas}):
+                    executar_comando(session, f"ALTER TABLE {tabela} SET CHANGE_TRACKING = TRUE")
+                _sincronizacao["disponivel"] = True
+            except Exception as e:
+                logger_consultas.warning("Sincronização incremental indisponível, usando o cache comum: %s", e)
+            _sincronizacao["preparada"] = True
+        return _sincronizacao["disponivel"]
+
+def sql_mudancas(tabela, desde):
+    # `desde` é um CURRENT_TIMESTAMP lido do próprio Snowflake, nunca um valor do usuário
+    return f"(SELECT * FROM {tabela} CHANGES(INFORMATION => DEFAULT) AT(TIMESTAMP => TO_TIMESTAMP_TZ('{pd.Timestamp(desde).isoformat()}')))"
+
+def carregar_copia(session: Session, visao, copia):
+    # A marca é lida antes da carga: o que mudar entre as duas consultas é reaplicado na próxima sincronização
+    _, dados = executar_snowpark_select(session, "SELECT CURRENT_TIMESTAMP AS AGORA")
+    df = executar_snowpark_select(session, VISOES_PAGINADAS[visao]["sql"], formato='dataframe')
+    if dados and len(df.columns):
+        copia.update(df=df, marca=dados[0][0], sincronizada_em=time.monotonic())
+
+def sincronizar_copia(session: Session, visao, copia):
+    definicao = VISOES_PAGINADAS[visao]
+    chave = list(definicao["chave"])
+    afetadas = " UNION ".join(
+        sql.format(mudancas=sql_mudancas(tabela, copia["marca"])) for tabela, sql in VISOES_INCREMENTAIS[visao].items()
+    )
+    # A nova marca vem na mesma consulta das mudanças (o LEFT JOIN garante uma linha mesmo sem mudanças)
+    sql = f"SELECT A.AGORA, C.* FROM (SELECT CURRENT_TIMESTAMP AS AGORA) A LEFT JOIN ({afetadas}) C ON TRUE"
+    df_chaves = executar_snowpark_select(session, sql, formato='dataframe', alertar=False)
+    if not len(df_chaves.columns):
+        # Marca além da retenção do change tracking, tabela recriada etc.: recarrega a visão
+        return carregar_copia(session, visao, copia)
+
+    nova_marca = df_chaves["AGORA"].iloc[0]
+    chaves = df_chaves[chave].dropna().drop_duplicates().astype("int64")
+    if len(chaves) > SINCRONIZACAO_MAX_ALTERADAS:
+        return carregar_copia(session, visao, copia)
+
+    df = copia["df"]
+    if len(chaves):
+        linha_binds = "(" + ", ".join(["%s"] * len(chave)) + ")"
+        condicao = f"({', '.join(chave)}) IN ({', '.join([linha_binds] * len(chaves))})"
+        params = [v for linha in chaves.itertuples(index=False, name=None) for v in linha]
+        novas = executar_snowpark_select(session, f"SELECT * FROM ({definicao['sql']}) AS V WHERE {condicao}", params,
+                                         formato='dataframe', alertar=False)
+        if not len(novas.columns):
+            return carregar_copia(session, visao, copia)
+        afetada = pd.MultiIndex.from_frame(df[chave]).isin(pd.MultiIndex.from_frame(chaves))
+        df = pd.concat([df[~afetada], novas], ignore_index=True)
+    copia.update(df=df, marca=nova_marca, sincronizada_em=time.monotonic())
+
+def ler_incremental(session: Session, visao, formato='listas'):
+    definicao = VISOES_PAGINADAS[visao]
+    if not (SINCRONIZACAO_INCREMENTAL and preparar_sincronizacao(session)):
+        return ler_com_cache(session, definicao["tabelas"], definicao["sql"], formato=formato)
+
+    copia = _copias[visao]
+    with copia["lock"]:
+        # Zera o pendente antes de consultar: uma escrita durante a sincronização marca de novo
+        pendente, copia["pendente"] = copia["pendente"], False
+        if copia["df"] is None:
+            carregar_copia(session, visao, copia)
+        elif pendente or time.monotonic() - copia["sincronizada_em"] >= SINCRONIZACAO_INTERVALO_SEGUNDOS:
+            sincronizar_copia(session, visao, copia)
+        df = copia["df"]
+    if df is None:
+        return pd.DataFrame() if formato == 'dataframe' else ([], [])
+    return df if formato == 'dataframe' else resultado_em_listas(df)
+
+# --- SELETORES COM BUSCA (TYPEAHEAD) ---
+# Cada seletor expõe a chave, um ROTULO para exibir e a coluna BUSCA comparada por prefixo.
+SELETORES = {
+    'PESSOAS': {
+        "sql": "SELECT ID, NOME || ' (' || CAST(ID AS VARCHAR) || ')' AS ROTULO, NOME AS BUSCA, TIPO_PESSOA FROM PESSOAS",
+        "tabelas": ('PESSOAS',), "chave": ('ID',), "extras": ('TIPO_PESSOA',),
+    },
+    'EVENTOS': {
+        "sql": "SELECT ID, NOME || ' (' || CAST(ID AS VARCHAR) || ')' AS ROTULO, NOME AS BUSCA FROM EVENTOS",
+        "tabelas": ('EVENTOS',), "chave": ('ID',),
+    },
+    'PALESTRAS': {
+        "sql": """
+        SELECT L.ID, L.TITULO || ' - ' || E.NOME AS ROTULO, L.TITULO AS BUSCA
+        FROM PALESTRAS L JOIN EVENTOS E ON L.EVENTO_ID = E.ID
+        """,
+        "tabelas": ('PALESTRAS', 'EVENTOS'), "chave": ('ID',),
+    },
+    'INSCRICOES': {
+        "sql": """
+        SELECT I.PARTICIPANTE_ID, I.PALESTRA_ID, P.NOME || ' em ' || L.TITULO AS ROTULO, P.NOME AS BUSCA
+        FROM INSCRICOES I
+        JOIN PESSOAS P ON I.PARTICIPANTE_ID = P.ID
+        JOIN PALESTRAS L ON I.PALESTRA_ID = L.ID
+        """,
+        "tabelas": ('INSCRICOES', 'PESSOAS', 'PALESTRAS'), "chave": ('PARTICIPANTE_ID', 'PALESTRA_ID'),
+    },
+    'PAGAMENTOS': {
+        "sql": """
+        SELECT PG.ID, 'ID ' || CAST(PG.ID AS VARCHAR) || ' - R$ ' || CAST(PG.VALOR AS VARCHAR) || ' (' || P.NOME || ' em ' || E.NOME || ')' AS ROTULO, P.NOME AS BUSCA
+        FROM PAGAMENTOS PG
+        JOIN PESSOAS P ON PG.PARTICIPANTE_ID = P.ID
+        JOIN EVENTOS E ON PG.EVENTO_ID = E.ID
+        """,
+        "tabelas": ('PAGAMENTOS', 'PESSOAS', 'EVENTOS'), "chave": ('ID',),
+    },
+    'TIPOS_PAGAMENTO': {
+        "sql": "SELECT ID, NOME || ' (' || CAST(ID AS VARCHAR) || ')' AS ROTULO, NOME AS BUSCA FROM TIPOS_PAGAMENTO",
+        "tabelas": ('TIPOS_PAGAMENTO',), "chave": ('ID',),
+    },
+    'FEEDBACK_PALESTRAS': {
+        "sql": """
+        SELECT F.ID, 'ID ' || CAST(F.ID AS VARCHAR) || ' - ' || P.NOME || ' (' || CAST(F.NOTA AS VARCHAR) || ')' AS ROTULO, P.NOME AS BUSCA
+        FROM FEEDBACK_PALESTRAS F JOIN PESSOAS P ON F.PARTICIPANTE_ID = P.ID
+        """,
+        "tabelas": ('FEEDBACK_PALESTRAS', 'PESSOAS'), "chave": ('ID',),
+    },
+}
+
+def escapar_like(texto):
+    return texto.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def sql_seletor(seletor, tipos_pessoa=(), limite=SELETOR_LIMITE):
+    # O texto do SQL não depende do prefixo (que vai como bind), então todos os
+    # prefixos de um mesmo seletor compartilham a mesma chave base no cache
+    definicao = SELETORES[seletor]
+    sql = f"SELECT * FROM ({definicao['sql']}) AS S WHERE BUSCA ILIKE %s ESCAPE '!'"
+    if tipos_pessoa:
+        sql += f" AND UPPER(TIPO_PESSOA) IN ({', '.join(['%s'] * len(tipos_pessoa))})"
+    return sql + f" ORDER BY ROTULO LIMIT {int(limite)}"
+
+def opcoes_do_dataframe(seletor, df):
+    chave = SELETORES[seletor]["chave"]
+    if len(chave) == 1:
+        ids = [v.item() if hasattr(v, 'item') else v for v in df[chave[0]]]
+    else:
+        ids = list(df[list(chave)].itertuples(index=False, name=None))
+    return dict(zip(df["ROTULO"], ids))
+
+def buscar_opcoes(session: Session, seletor, texto="", tipos_pessoa=(), limite=SELETOR_LIMITE, renovar=False):
+    # Devolve {rótulo: id} das linhas cujo BUSCA começa com `texto` (sem diferenciar maiúsculas).
+    # Se um prefixo mais curto já está no cache e veio incompleto (menos que `limite` linhas),
+    # o resultado é refinado localmente sem ir ao banco.
+    sql, params, opcoes = consulta_seletor(seletor, texto, tipos_pessoa, limite)
+    if opcoes is not None:
+        return opcoes
+    df = ler_com_cache(session, SELETORES[seletor]["tabelas"], sql, params, formato='dataframe', renovar=renovar)
+    if not len(df.columns):
+        return {}
+    return opcoes_do_dataframe(seletor, df)
+
+def consulta_seletor(seletor, texto, tipos_pessoa, limite):
+    # (sql, params) da busca, e as opções já resolvidas localmente quando um prefixo mais
+    # curto está no cache (senão None)
+    definicao = SELETORES[seletor]
+    texto = (texto or "").strip()
+    # Ordenados: ('Organizador', 'Palestrante') e ('Palestrante', 'Organizador') usam a mesma entrada
+    tipos = tuple(sorted(t.upper() for t in tipos_pessoa))
+    sql = sql_seletor(seletor, tipos, limite)
+
+    for tamanho in range(len(texto) - 1, -1, -1):
+        df_prefixo = consultar_cache(definicao["tabelas"], sql, (escapar_like(texto[:tamanho]) + '%',) + tipos)
+        if df_prefixo is not None and len(df_prefixo) < limite:
+            refinado = df_prefixo[df_prefixo["BUSCA"].str.lower().str.startswith(texto.lower())]
+            return sql, None, opcoes_do_dataframe(seletor, refinado)
+    return sql, (escapar_like(texto) + '%',) + tipos, None
+
+def buscar_opcao_por_id(session: Session, seletor, id_registro):
+    # Rótulo de um registro específico (ex.: valor atual de uma FK em um formulário de atualização)
+    definicao = SELETORES[seletor]
+    sql = f"SELECT * FROM ({definicao['sql']}) AS S WHERE ID = %s"
+    df = ler_com_cache(session, definicao["tabelas"], sql, (id_registro,), formato='dataframe')
+    if not len(df.columns):
+        return {}
+    return opcoes_do_dataframe(seletor, df)
+
+# --- LISTAS DAS PÁGINAS DE CADASTRO (CONSULTA ÚNICA) ---
+# Listas de opções que cada página de cadastro desenha com a busca vazia: (seletor, tipos_pessoa).
+# As que não estão no cache vêm juntas numa única consulta UNION ALL e são guardadas no cache
+# com a mesma chave que buscar_opcoes usaria; a página então não vai ao banco lista por lista.
+# Só entram seletores de chave ID (INSCRICOES tem outras colunas e segue pelo buscar_opcoes).
+LISTAS_DAS_PAGINAS = {
+    'Pessoas': [('PESSOAS', ())],
+    'Eventos': [('PESSOAS', ('Organizador', 'Palestrante')), ('EVENTOS', ())],
+    'Palestras': [('EVENTOS', ()), ('PESSOAS', ('Organizador', 'Palestrante')), ('PALESTRAS', ())],
+    'Inscricoes': [('PESSOAS', ('Participante',)), ('PALESTRAS', ())],
+    'Pagamentos': [('PESSOAS', ('Participante',)), ('EVENTOS', ()), ('PAGAMENTOS', ())],
+    'Tipos_Pagamento': [('TIPOS_PAGAMENTO', ())],
+    'Feedback': [('PESSOAS', ('Participante',)), ('PALESTRAS', ()), ('FEEDBACK_PALESTRAS', ())],
+}
+
+def sql_listas_da_pagina(pendentes):
+    # Cada parte mantém o próprio ORDER BY/LIMIT numa subconsulta; LISTA diz de qual seletor é a linha
+    extras = sorted({coluna for seletor, _, _ in pendentes for coluna in SELETORES[seletor].get("extras", ())})
+    partes = []
+    for i, (seletor, sql, _) in enumerate(pendentes):
+        proprias = SELETORES[seletor].get("extras", ())
+        colunas = ", ".join(["ID", "ROTULO", "BUSCA"] + [c if c in proprias else f"CAST(NULL AS VARCHAR) AS {c}" for c in extras])
+        partes.append(f"SELECT {i} AS LISTA, {colunas} FROM ({sql}) AS L{i}")
+    return "\nUNION ALL\n".join(partes)
+
+def carregar_listas_da_pagina(session: Session, pagina, limite=SELETOR_LIMITE):
+    # Devolve quantas listas vieram do banco (0 = todas já estavam no cache)
+    pendentes = []
+    for seletor, tipos in LISTAS_DAS_PAGINAS.get(pagina, ()):
+        sql, params, _ = consulta_seletor(seletor, "", tipos, limite)
+        if consultar_cache(SELETORES[seletor]["tabelas"], sql, params) is None:
+            pendentes.append((seletor, sql, params))
+    if not pendentes:
+        return 0
+
+    valores = [valor for _, _, params in pendentes for valor in params]
+    df = executar_snowpark_select(session, sql_listas_da_pagina(pendentes), valores, formato='dataframe')
+    if not len(df.columns):
+        return 0
+    for i, (seletor, sql, params) in enumerate(pendentes):
+        # A ordem entre as partes do UNION ALL não é garantida: reaplica o ORDER BY ROTULO
+        colunas = ["ID", "ROTULO", "BUSCA", *SELETORES[seletor].get("extras", ())]
+        parte = df[df["LISTA"] == i].sort_values("ROTULO", kind="stable")[colunas].reset_index(drop=True)
+        guardar_no_cache(SELETORES[seletor]["tabelas"], sql, params, parte)
+    return len(pendentes)
+
+# --- DADOS DE REFERÊNCIA (AQUECIMENTO) ---
+# Listas pequenas que toda página usa: são carregadas em paralelo uma vez por processo, antes da
+# primeira renderização, e renovadas por uma thread antes de vencerem, enquanto houver uso.
+# Nome -> (funcao, args, kwargs), no formato de executar_em_paralelo.
+REFERENCIAS = {
+    'tipos_pagamento': (ler_com_cache, (('TIPOS_PAGAMENTO',), SQL_LER_TIPOS_PAGAMENTO), {"formato": 'dataframe', "renovar": True}),
+    'seletor_organizadores': (buscar_opcoes, ('PESSOAS',), {"tipos_pessoa": ('Organizador', 'Palestrante'), "renovar": True}),
+    'seletor_participantes': (buscar_opcoes, ('PESSOAS',), {"tipos_pessoa": ('Participante',), "renovar": True}),
+    'seletor_eventos': (buscar_opcoes, ('EVENTOS',), {"renovar": True}),
+    'seletor_palestras': (buscar_opcoes, ('PALESTRAS',), {"renovar": True}),
+    'seletor_tipos_pagamento': (buscar_opcoes, ('TIPOS_PAGAMENTO',), {"renovar": True}),
+}
+
+# Cópias do repositório carregadas só na primeira vez; depois seguem o TTL e as escritas
+REPOSITORIO_AQUECIDO = ('TIPOS_PAGAMENTO', 'EVENTOS', 'PESSOAS')
+
+_aquecimento = {"thread": None, "atividade": 0.0}  # atividade: monotonic da última renderização
+_aquecimento_lock = threading.Lock()
+
+def aquecer_referencias(session: Session, repositorio=False):
+    # Carrega (ou renova) todas as referências em paralelo; devolve {nome: segundos}
+    tarefas = dict(REFERENCIAS)
+    if repositorio:
+        tarefas.update({f"repositorio_{tabela.lower()}": (tabela_em_memoria, (tabela,), {}) for tabela in REPOSITORIO_AQUECIDO})
+    return {nome: segundos for nome, _, segundos in executar_em_paralelo(session, tarefas)}
+
+def renovar_referencias(session: Session):
+    renovado_em = time.monotonic()
+    while True:
+        time.sleep(AQUECIMENTO_INTERVALO_SEGUNDOS)
+        # Nenhuma renderização desde a última renovação: o processo está ocioso, não vai ao banco
+        if _aquecimento["atividade"] <= renovado_em:
+            continue
+        renovado_em = time.monotonic()
+        try:
+            aquecer_referencias(session)
+        except Exception:
+            logger_consultas.exception("Falha ao renovar os dados de referência")
+
+def iniciar_aquecimento(session: Session):
+    # Chamada a cada renderização, que conta como atividade. Só na primeira do processo a carga
+    # é feita (síncrona, para que já a primeira página de cada usuário saia da memória); depois
+    # uma thread daemon renova as listas enquanto houver renderizações
+    if not AQUECIMENTO:
+        return
+    _aquecimento["atividade"] = time.monotonic()
+    with _aquecimento_lock:
+        if _aquecimento["thread"] is not None:
+            return
+        try:
+            aquecer_referencias(session, repositorio=True)
+        except Exception:
+            logger_consultas.exception("Falha no aquecimento dos dados de referência")
+        thread = threading.Thread(target=renovar_referencias, args=(session,), daemon=True, name="bd2-aquecimento")
+        _aquecimento["thread"] = thread
+        thread.start()
+
+# --- RESUMOS MATERIALIZADOS ---
+# RESUMO_ORGANIZADORES e RESUMO_STATUS_PAGAMENTO guardam os agregados dos relatórios de
+# grupo, mantidos a cada escrita: inserções aplicam um delta O(1); atualizações e exclusões
+# recalculam só os grupos afetados (MAX/MIN não podem ser "desfeitos" por delta).
+# Se alguma manutenção falhar, o próximo relatório reconstrói tudo antes de ler. A reconstrução
+# completa só roda sozinha quando as tabelas são criadas; escritas feitas fora do app pedem
+# `python manutencao.py reconstruir-resumos`.
+_resumos = {"preparados": False, "desatualizados": False}
+_resumos_lock = threading.Lock()
+
+SQL_CRIAR_RESUMOS = [
+    """
+    CREATE TABLE IF NOT EXISTS RESUMO_ORGANIZADORES (
+        organizador_id INTEGER PRIMARY KEY,
+        total_eventos INTEGER NOT NULL,
+        valor_total DECIMAL(38, 2) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RESUMO_STATUS_PAGAMENTO (
+        status VARCHAR PRIMARY KEY,
+        total_pagamentos INTEGER NOT NULL,
+        total_valores INTEGER NOT NULL,  -- pagamentos com valor (os nulos ficam fora da média)
+        soma_valor DECIMAL(38, 2) NOT NULL,
+        maior_valor DECIMAL(38, 2),
+        menor_valor DECIMAL(38, 2)
+    )
+    """,
+]
+
+SQL_FONTE_RESUMO_ORGANIZADORES = """
+    SELECT E.organizador_id, COUNT(DISTINCT E.id), COALESCE(SUM(P.valor), 0.00)
+    FROM EVENTOS E
+    LEFT JOIN PAGAMENTOS P ON E.id = P.evento_id
+"""
+
+SQL_FONTE_RESUMO_STATUS = """
+    SELECT status, COUNT(*), COUNT(valor), COALESCE(SUM(valor), 0), MAX(valor), MIN(valor)
+    FROM PAGAMENTOS
+"""
+
+SQL_DELTA_EVENTO_ORGANIZADOR = """
+    MERGE INTO RESUMO_ORGANIZADORES AS R
+    USING (SELECT %s AS organizador_id) AS S
+    ON R.organizador_id = S.organizador_id
+    WHEN MATCHED THEN UPDATE SET total_eventos = R.total_eventos + 1
+    WHEN NOT MATCHED THEN INSERT (organizador_id, total_eventos, valor_total) VALUES (S.organizador_id, 1, 0)
+"""
+
+SQL_DELTA_PAGAMENTO_STATUS = """
+    MERGE INTO RESUMO_STATUS_PAGAMENTO AS R
+    USING (SELECT %s AS status, %s AS valor) AS S
+    ON R.status = S.status
+    WHEN MATCHED THEN UPDATE SET
+        total_pagamentos = R.total_pagamentos + 1,
+        total_valores = R.total_valores + CASE WHEN S.valor IS NULL THEN 0 ELSE 1 END,
+        soma_valor = R.soma_valor + COALESCE(S.valor, 0),
+        -- No Snowflake, GREATEST/LEAST com um argumento nulo dão nulo
+        maior_valor = GREATEST(COALESCE(R.maior_valor, S.valor), COALESCE(S.valor, R.maior_valor)),
+        menor_valor = LEAST(COALESCE(R.menor_valor, S.valor), COALESCE(S.valor, R.menor_valor))
+    WHEN NOT MATCHED THEN INSERT (status, total_pagamentos, total_valores, soma_valor, maior_valor, menor_valor)
+        VALUES (S.status, 1, CASE WHEN S.valor IS NULL THEN 0 ELSE 1 END, COALESCE(S.valor, 0), S.valor, S.valor)
+"""
+
+SQL_DELTA_PAGAMENTO_ORGANIZADOR = """
+    UPDATE RESUMO_ORGANIZADORES
+    SET valor_total = valor_total + COALESCE(%s, 0)
+    WHERE organizador_id = (SELECT organizador_id FROM EVENTOS WHERE id = %s)
+"""
+
+COLUNAS_RESUMO_STATUS = "status, total_pagamentos, total_valores, soma_valor, maior_valor, menor_valor"
+
+SQL_COLUNAS_RESUMOS = """
+    SELECT UPPER(table_name), UPPER(column_name)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE table_schema = CURRENT_SCHEMA()
+      AND UPPER(table_name) IN ('RESUMO_ORGANIZADORES', 'RESUMO_STATUS_PAGAMENTO')
+"""
+
+def manter_resumos(session: Session, *comandos, atomico=False):
+    # Executa comandos de manutenção (sql, params); qualquer falha marca os resumos para reconstrução.
+    # Com atomico=True (DELETE + INSERT de grupos), os comandos rodam numa transação: uma falha no
+    # INSERT não deixa os grupos apagados. Dentro de uma Transacao (a escrita que pediu a manutenção
+    # foi enfileirada numa), os comandos já estão na transação dela e rodam direto na mesma sessão.
+    # Os resumos não passam pelo cache de leituras
+    if atomico and _transacao_atual.get() is None:
+        unidade = Transacao(session, invalidar=False)
+        for sql, params in comandos:
+            unidade.adicionar(executar_snowpark_dml, sql, params)
+        ok = unidade.executar()
+    else:
+        ok = not any(isinstance(executar_snowpark_dml(session, sql, params), str) for sql, params in comandos)
+    if not ok:
+        _resumos["desatualizados"] = True
+    return ok
+
+def reconstruir_resumos(session: Session):
+    return manter_resumos(
+        session,
+        ("DELETE FROM RESUMO_ORGANIZADORES", None),
+        (f"INSERT INTO RESUMO_ORGANIZADORES (organizador_id, total_eventos, valor_total) {SQL_FONTE_RESUMO_ORGANIZADORES} GROUP BY E.organizador_id", None),
+        ("DELETE FROM RESUMO_STATUS_PAGAMENTO", None),
+        (f"INSERT INTO RESUMO_STATUS_PAGAMENTO ({COLUNAS_RESUMO_STATUS}) {SQL_FONTE_RESUMO_STATUS} GROUP BY status", None),
+        atomico=True,
+    )
+
+def preparar_resumos(session: Session):
+    # Uma vez por processo: cria as tabelas que faltam e, só se alguma foi criada agora, calcula os
+    # resumos do zero. Um RESUMO_STATUS_PAGAMENTO do layout antigo (sem total_valores) é
+    # descartado e recriado: é só um agregado de PAGAMENTOS
+    with _resumos_lock:
+        if _resumos["preparados"]:
+            return
+        _, dados = executar_snowpark_select(session, SQL_COLUNAS_RESUMOS, alertar=False)
+        colunas = {tuple(linha) for linha in dados}
+        if ('RESUMO_STATUS_PAGAMENTO', 'STATUS') in colunas and ('RESUMO_STATUS_PAGAMENTO', 'TOTAL_VALORES') not in colunas:
+            executar_snowpark_dml(session, "DROP TABLE RESUMO_STATUS_PAGAMENTO")
+            colunas = {c for c in colunas if c[0] != 'RESUMO_STATUS_PAGAMENTO'}
+        criadas = {'RESUMO_ORGANIZADORES', 'RESUMO_STATUS_PAGAMENTO'} - {tabela for tabela, _ in colunas}
+        for sql in SQL_CRIAR_RESUMOS:
+            executar_snowpark_dml(session, sql)
+        _resumos["desatualizados"] = False
+        if criadas:
+            reconstruir_resumos(session)
+        _resumos["preparados"] = True
+
+def grupos_afetados(session: Session, tabela, id_registro):
+    # Antes de alterar/excluir: (organizadores, status) cujos resumos dependem do registro
+    tabela = tabela.upper()
+    if tabela == 'PAGAMENTOS':
+        sql = "SELECT E.organizador_id, PG.status FROM PAGAMENTOS PG JOIN EVENTOS E ON PG.evento_id = E.id WHERE PG.id = %s"
+    elif tabela == 'EVENTOS':
+        sql = "SELECT organizador_id, NULL FROM EVENTOS WHERE id = %s"
+    elif tabela == 'PESSOAS':
+        sql = "SELECT id, NULL FROM PESSOAS WHERE id = %s"
+    else:
+        return set(), set()
+    _, dados = executar_snowpark_select(session, sql, (id_registro,))
+    return {linha[0] for linha in dados if linha[0] is not None}, {linha[1] for linha in dados if linha[1] is not None}
+
+def recalcular_resumos(session: Session, organizadores=(), status=()):
+    comandos = []
+    organizadores = list(organizadores)
+    status = list(status)
+    if organizadores:
+        binds = ", ".join(["%s"] * len(organizadores))
+        comandos += [
+            (f"DELETE FROM RESUMO_ORGANIZADORES WHERE organizador_id IN ({binds})", organizadores),
+            (f"INSERT INTO RESUMO_ORGANIZADORES (organizador_id, total_eventos, valor_total) {SQL_FONTE_RESUMO_ORGANIZADORES} "
+             f"WHERE E.organizador_id IN ({binds}) GROUP BY E.organizador_id", organizadores),
+        ]
+    if status:
+        binds = ", ".join(["%s"] * len(status))
+        comandos += [
+            (f"DELETE FROM RESUMO_STATUS_PAGAMENTO WHERE status IN ({binds})", status),
+            (f"INSERT INTO RESUMO_STATUS_PAGAMENTO ({COLUNAS_RESUMO_STATUS}) {SQL_FONTE_RESUMO_STATUS} "
+             f"WHERE status IN ({binds}) GROUP BY status", status),
+        ]
+    manter_resumos(session, *comandos, atomico=True)
+
+def garantir_resumos_atualizados(session: Session):
+    preparar_resumos(session)
+    with _resumos_lock:
+        if _resumos["desatualizados"]:
+            _resumos["desatualizados"] = False
+            reconstruir_resumos(session)
+
+SQL_PARTICIPANTES_PALESTRA = """
     SELECT
         P.nome AS participante,
         L.titulo AS palestra,
@@ -225,79 +1921,129 @@ def consulta_participantes_palestra(session: Session):
     JOIN EVENTOS E ON L.evento_id = E.id
     ORDER BY E.nome, L.titulo
     """
-    return executar_snowpark_select(session, sql)
 
-def consulta_aninhada_1_nao_inscritos_em_evento_x(session: Session, evento_id_ref):
-    sql = """
+def consulta_participantes_palestra(session: Session, formato='listas', alertar=True):
+    return executar_snowpark_select(session, SQL_PARTICIPANTES_PALESTRA, formato=formato, alertar=alertar)
+
+SQL_NAO_INSCRITOS_EM_EVENTO = """
     SELECT
-        nome, email
+        P.nome, P.email
     FROM
-        PESSOAS
+        PESSOAS P
     WHERE
-        tipo_pessoa = 'Participante'
-        AND id NOT IN (
-            SELECT DISTINCT
-                participante_id
+        P.tipo_pessoa = 'Participante'
+        AND NOT EXISTS (
+            SELECT 1
             FROM
                 INSCRICOES I
             JOIN PALESTRAS L ON I.palestra_id = L.id
             WHERE
                 L.evento_id = %s
+                AND I.participante_id = P.id
         );
     """
-    return executar_snowpark_select(session, sql, (evento_id_ref,))
 
-def consulta_aninhada_2_palestras_acima_media(session: Session):
-    sql = """
+def consulta_aninhada_1_nao_inscritos_em_evento_x(session: Session, evento_id_ref, formato='listas', alertar=True):
+    # NOT EXISTS correlacionado vira um anti-join no plano e não tem a armadilha do
+    # NOT IN (um participante_id nulo na subconsulta esvaziaria o resultado inteiro)
+    return executar_snowpark_select(session, SQL_NAO_INSCRITOS_EM_EVENTO, (evento_id_ref,), formato=formato, alertar=alertar)
+
+def sql_nao_inscritos_por_evento(eventos_ids=None):
+    # Versão em lote (lembretes por e-mail): participantes sem inscrição em cada evento,
+    # para todos os eventos (ou os de `eventos_ids`) numa única consulta
+    filtro_eventos, params = "", None
+    if eventos_ids:
+        params = tuple(eventos_ids)
+        filtro_eventos = f"AND E.id IN ({', '.join(['%s'] * len(params))})"
+    sql = f"""
+    SELECT
+        E.id AS evento_id, E.nome AS evento, P.id AS participante_id, P.nome, P.email
+    FROM
+        EVENTOS E
+    CROSS JOIN PESSOAS P
+    WHERE
+        P.tipo_pessoa = 'Participante'
+        {filtro_eventos}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM
+                INSCRICOES I
+            JOIN PALESTRAS L ON I.palestra_id = L.id
+            WHERE
+                L.evento_id = E.id
+                AND I.participante_id = P.id
+        )
+    ORDER BY E.id, P.nome;
+    """
+    return sql, params
+
+def consulta_aninhada_1_nao_inscritos_por_evento(session: Session, eventos_ids=None, formato='listas', alertar=True):
+    sql, params = sql_nao_inscritos_por_evento(eventos_ids)
+    return executar_snowpark_select(session, sql, params, formato=formato, alertar=alertar)
+
+SQL_PALESTRAS_ACIMA_MEDIA = """
     SELECT
-        titulo,
-        (SELECT AVG(nota) FROM FEEDBACK_PALESTRAS F2 WHERE F2.palestra_id = P.id) AS media_palestra
+        P.titulo,
+        M.media_palestra
     FROM
         PALESTRAS P
+    JOIN (
+        SELECT palestra_id, AVG(nota) AS media_palestra
+        FROM FEEDBACK_PALESTRAS
+        GROUP BY palestra_id
+    ) M ON M.palestra_id = P.id
     WHERE
-        (SELECT AVG(nota) FROM FEEDBACK_PALESTRAS F WHERE F.palestra_id = P.id) > (
+        M.media_palestra > (
             SELECT AVG(nota) FROM FEEDBACK_PALESTRAS
         )
     ORDER BY media_palestra DESC;
     """
-    return executar_snowpark_select(session, sql)
 
-def consulta_grupo_1_total_eventos_por_organizador(session: Session):
-    sql = """
+def consulta_aninhada_2_palestras_acima_media(session: Session, formato='listas', alertar=True):
+    # Médias por palestra num único GROUP BY (em vez de duas subconsultas correlacionadas
+    # por linha) e a média geral numa subconsulta não correlacionada, calculada uma vez
+    return executar_snowpark_select(session, SQL_PALESTRAS_ACIMA_MEDIA, formato=formato, alertar=alertar)
+
+SQL_TOTAL_EVENTOS_POR_ORGANIZADOR = """
     SELECT
         O.nome AS organizador,
-        COUNT(DISTINCT E.id) AS total_eventos_organizados,
-        COALESCE(SUM(P.valor), 0.00) AS valor_total_arrecadado
+        SUM(R.total_eventos) AS total_eventos_organizados,
+        SUM(R.valor_total) AS valor_total_arrecadado
     FROM
-        PESSOAS O
-    LEFT JOIN EVENTOS E ON O.id = E.organizador_id
-    LEFT JOIN PAGAMENTOS P ON E.id = P.evento_id
+        RESUMO_ORGANIZADORES R
+    JOIN PESSOAS O ON O.id = R.organizador_id
     WHERE
         O.tipo_pessoa = 'Organizador'
     GROUP BY
         O.nome
     HAVING
-        COUNT(DISTINCT E.id) > 0;
+        SUM(R.total_eventos) > 0;
     """
-    return executar_snowpark_select(session, sql)
 
-def consulta_grupo_2_estatisticas_por_status_pagamento(session: Session):
-    sql = """
+def consulta_grupo_1_total_eventos_por_organizador(session: Session, formato='listas', alertar=True):
+    # Lê o resumo materializado: O(organizadores) em vez de PESSOAS x EVENTOS x PAGAMENTOS
+    garantir_resumos_atualizados(session)
+    return executar_snowpark_select(session, SQL_TOTAL_EVENTOS_POR_ORGANIZADOR, formato=formato, alertar=alertar)
+
+SQL_ESTATISTICAS_POR_STATUS_PAGAMENTO = """
     SELECT
         status,
-        COUNT(*) AS total_pagamentos,
-        AVG(valor) AS valor_medio,
-        MAX(valor) AS maior_valor,
-        MIN(valor) AS menor_valor
+        total_pagamentos,
+        soma_valor / NULLIF(total_valores, 0) AS valor_medio,
+        maior_valor,
+        menor_valor
     FROM
-        PAGAMENTOS
-    GROUP BY
-        status;
+        RESUMO_STATUS_PAGAMENTO
+    WHERE
+        total_pagamentos > 0;
     """
-    return executar_snowpark_select(session, sql)
 
-def consulta_conjunto_1_atores_financeiros(session: Session):
-    sql = """
+def consulta_grupo_2_estatisticas_por_status_pagamento(session: Session, formato='listas', alertar=True):
+    # Lê o resumo materializado: O(status) em vez de varrer PAGAMENTOS
+    garantir_resumos_atualizados(session)
+    return executar_snowpark_select(session, SQL_ESTATISTICAS_POR_STATUS_PAGAMENTO, formato=formato, alertar=alertar)
+
+SQL_ATORES_FINANCEIROS = """
     SELECT nome, email, 'ORGANIZADOR' AS tipo_financeiro
     FROM PESSOAS WHERE tipo_pessoa = 'Organizador'
     
@@ -308,10 +2054,11 @@ def consulta_conjunto_1_atores_financeiros(session: Session):
     JOIN PAGAMENTOS PG ON P.id = PG.participante_id
     WHERE P.tipo_pessoa = 'Participante';
     """
-    return executar_snowpark_select(session, sql)
 
-def consulta_conjunto_2_palestras_sem_feedback(session: Session):
-    sql = """
+def consulta_conjunto_1_atores_financeiros(session: Session, formato='listas', alertar=True):
+    return executar_snowpark_select(session, SQL_ATORES_FINANCEIROS, formato=formato, alertar=alertar)
+
+SQL_PALESTRAS_SEM_FEEDBACK = """
     SELECT DISTINCT L.id, L.titulo
     FROM PALESTRAS L
     JOIN INSCRICOES I ON L.id = I.palestra_id
@@ -322,4 +2069,181 @@ def consulta_conjunto_2_palestras_sem_feedback(session: Session):
     FROM PALESTRAS L
     JOIN FEEDBACK_PALESTRAS F ON L.id = F.palestra_id;
     """
-    return executar_snowpark_select(session, sql)
\ No newline at end of file
+
+def consulta_conjunto_2_palestras_sem_feedback(session: Session, formato='listas', alertar=True):
+    return executar_snowpark_select(session, SQL_PALESTRAS_SEM_FEEDBACK, formato=formato, alertar=alertar)
+
+# --- EXPORTAÇÃO EM LOTES ---
+# Extrações completas e relatórios gravados direto em CSV ou Parquet, lote a lote: a memória
+# usada fica limitada a um lote, e não à tabela inteira em pandas e em listas.
+# Cada item: (função, argumentos fixos); a função recebe a sessão, os argumentos e formato='lotes'.
+EXPORTACOES = {
+    'pessoas': (executar_snowpark_select, (SQL_LER_PESSOAS,)),
+    'eventos': (executar_snowpark_select, (SQL_LER_EVENTOS,)),
+    'palestras': (executar_snowpark_select, (SQL_LER_PALESTRAS,)),
+    'inscricoes': (executar_snowpark_select, (SQL_LER_INSCRICOES,)),
+    'pagamentos': (executar_snowpark_select, (SQL_LER_PAGAMENTOS,)),
+    'tipos_pagamento': (executar_snowpark_select, (SQL_LER_TIPOS_PAGAMENTO,)),
+    'feedback': (executar_snowpark_select, (SQL_LER_FEEDBACK,)),
+    'participantes_palestra': (consulta_participantes_palestra, ()),
+    'aninhada_1': (consulta_aninhada_1_nao_inscritos_em_evento_x, ()),  # recebe o ID do evento
+    'aninhada_2': (consulta_aninhada_2_palestras_acima_media, ()),
+    'grupo_1': (consulta_grupo_1_total_eventos_por_organizador, ()),
+    'grupo_2': (consulta_grupo_2_estatisticas_por_status_pagamento, ()),
+    'conjunto_1': (consulta_conjunto_1_atores_financeiros, ()),
+    'conjunto_2': (consulta_conjunto_2_palestras_sem_feedback, ()),
+}
+
+FORMATOS_EXPORTACAO = {'csv': 'text/csv', 'parquet': 'application/octet-stream'}
+
+def abrir_destino(destino):
+    # Caminho (abre e fecha aqui) ou arquivo binário já aberto (ex.: temporário do download)
+    if isinstance(destino, (str, os.PathLike)):
+        return open(destino, "wb")
+    return nullcontext(destino)
+
+def escrever_csv(lotes, destino):
+    total, cabecalho = 0, True
+    with abrir_destino(destino) as f:
+        for lote in lotes:
+            lote.to_csv(f, header=cabecalho, index=False, encoding="utf-8")
+            total += len(lote)
+            cabecalho = False
+    return total
+
+def escrever_parquet(lotes, destino):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("A exportação em Parquet precisa do pacote pyarrow: pip install pyarrow") from e
+
+    total, escritor = 0, None
+    with abrir_destino(destino) as f:
+        try:
+            for lote in lotes:
+                tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(f, tabela.schema)
+                else:
+                    # Um lote só com nulos numa coluna pode inferir outro tipo; o esquema é o do primeiro
+                    tabela = tabela.cast(escritor.schema)
+                escritor.write_table(tabela)
+                total += len(lote)
+        finally:
+            if escritor is not None:
+                escritor.close()
+    return total
+
+def exportar(session: Session, nome, destino, formato_arquivo='csv', args=()):
+    # Grava a exportação `nome` em `destino` e devolve o número de linhas
+    funcao, fixos = EXPORTACOES[nome]
+    lotes = funcao(session, *fixos, *args, formato='lotes')
+    if formato_arquivo == 'csv':
+        return escrever_csv(lotes, destino)
+    if formato_arquivo == 'parquet':
+        return escrever_parquet(lotes, destino)
+    raise ValueError(f"Formato de exportação inválido: {formato_arquivo!r}")
+
+# --- DESCARGA EM STAGE (COPY INTO) ---
+# Para extrações de vários GB (ex.: histórico de PAGAMENTOS) até a exportação em lotes esbarra
+# na banda do servidor do app. O COPY INTO grava os arquivos no stage direto do warehouse, em
+# paralelo e comprimidos; roda de forma assíncrona (collect_nowait) e a sessão volta ao pool na
+# hora. O caminho no stage identifica a descarga e basta para buscar os arquivos depois.
+DESCARGAS = {
+    'pessoas': SQL_LER_PESSOAS,
+    'eventos': SQL_LER_EVENTOS,
+    'palestras': SQL_LER_PALESTRAS,
+    'inscricoes': SQL_LER_INSCRICOES,
+    'pagamentos': SQL_LER_PAGAMENTOS,
+    'tipos_pagamento': SQL_LER_TIPOS_PAGAMENTO,
+    'feedback': SQL_LER_FEEDBACK,
+    'participantes_palestra': SQL_PARTICIPANTES_PALESTRA,
+}
+
+FORMATOS_DESCARGA = {
+    'csv': "TYPE = CSV COMPRESSION = GZIP FIELD_OPTIONALLY_ENCLOSED_BY = '\"' NULL_IF = ()",
+    'parquet': "TYPE = PARQUET COMPRESSION = SNAPPY",
+}
+
+# Caminho no stage -> andamento da descarga (campos com "_" ficam só aqui dentro)
+_descargas = OrderedDict()
+_descargas_lock = threading.Lock()
+_stage_pronto = {"ok": False}
+
+def preparar_stage(session: Session):
+    if not _stage_pronto["ok"]:
+        executar_comando(session, f"CREATE STAGE IF NOT EXISTS {STAGE_DESCARGAS}", tipo="stage")
+        _stage_pronto["ok"] = True
+
+def sql_descarga(caminho, sql, formato):
+    # Sem SINGLE = TRUE: cada thread do warehouse grava os seus arquivos em paralelo
+    return (
+        f"COPY INTO @{caminho}/ FROM ({sql}) FILE_FORMAT = ({FORMATOS_DESCARGA[formato]}) "
+        f"HEADER = TRUE MAX_FILE_SIZE = {DESCARGA_MAX_ARQUIVO_BYTES} OVERWRITE = TRUE"
+    )
+
+def iniciar_descarga(session: Session, nome, formato='csv'):
+    # Dispara o COPY INTO e devolve o caminho no stage, sem esperar a descarga terminar
+    if formato not in FORMATOS_DESCARGA:
+        raise ValueError(f"Formato de descarga inválido: {formato!r}")
+    preparar_stage(session)
+    caminho = f"{STAGE_DESCARGAS}/{nome}/{datetime.now():%Y%m%d_%H%M%S_%f}"
+    sql = sql_descarga(caminho, DESCARGAS[nome], formato)
+    inicio = time.perf_counter()
+    registrar_round_trip()
+    with sessao_emprestada(session) as sessao:
+        trabalho = sessao.sql(sql).collect_nowait()
+    with _descargas_lock:
+        _descargas[caminho] = {
+            "caminho": caminho, "nome": nome, "formato": formato, "status": "executando",
+            "query_id": trabalho.query_id, "iniciada_em": datetime.now(), "segundos": None,
+            "linhas": None, "bytes": None, "erro": None,
+            "_trabalho": trabalho, "_sql": sql, "_inicio": inicio,
+        }
+    return caminho
+
+def status_descarga(caminho):
+    # Consulta o andamento sem bloquear; ao terminar, a descarga entra na instrumentação
+    with _descargas_lock:
+        descarga = _descargas[caminho]
+        trabalho = descarga["_trabalho"]
+        if descarga["status"] == "executando" and trabalho.is_done():
+            try:
+                resultado = trabalho.result()
+                # rows_unloaded, input_bytes, output_bytes (sem linhas quando nada foi descarregado)
+                descarga["linhas"], _, descarga["bytes"] = resultado[0][:3] if resultado else (0, 0, 0)
+                descarga["status"] = "concluida"
+            except Exception as e:
+                descarga["status"], descarga["erro"] = "erro", str(e)
+            descarga["segundos"] = time.perf_counter() - descarga["_inicio"]
+            registrar_consulta("descarga", descarga["_sql"], descarga["_inicio"], linhas=descarga["linhas"],
+                               bytes_=descarga["bytes"], query_id=descarga["query_id"], erro=descarga["erro"])
+        return {campo: valor for campo, valor in descarga.items() if not campo.startswith("_")}
+
+def listar_descargas(nome=None):
+    # Descargas iniciadas por este processo, das mais recentes para as mais antigas
+    with _descargas_lock:
+        caminhos = [c for c, d in reversed(_descargas.items()) if nome is None or d["nome"] == nome]
+    return [status_descarga(caminho) for caminho in caminhos]
+
+def aguardar_descarga(caminho, intervalo=2, timeout=None):
+    limite = None if timeout is None else time.monotonic() + timeout
+    descarga = status_descarga(caminho)
+    while descarga["status"] == "executando" and (limite is None or time.monotonic() < limite):
+        time.sleep(intervalo)
+        descarga = status_descarga(caminho)
+    return descarga
+
+def arquivos_da_descarga(session: Session, caminho):
+    # (nome no stage, bytes) de cada arquivo gerado; funciona também para descargas de outros processos
+    return [(linha[0], linha[1]) for linha in executar_comando(session, f"LIST @{caminho}/", tipo="stage")]
+
+def baixar_descarga(session: Session, caminho, pasta):
+    # GET dos arquivos do stage para uma pasta local (ex.: numa rotina agendada fora do servidor do app)
+    inicio = time.perf_counter()
+    registrar_round_trip()
+    with sessao_emprestada(session) as sessao:
+        resultados = sessao.file.get(f"@{caminho}/", pasta)
+    registrar_consulta("stage", f"GET @{caminho}/", inicio, linhas=len(resultados), bytes_=sum(r.size for r in resultados))
+    return [os.path.join(pasta, r.file) for r in resultados]
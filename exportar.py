@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import time
+
+import db_utils as db
+
+# Exportação agendável (cron, tarefa do Windows...) das tabelas e relatórios para CSV ou Parquet,
+# gravados lote a lote pelo db_utils.exportar:
+#
+#   python exportar.py pagamentos inscricoes --formato parquet --pasta extracoes/
+#   python exportar.py --todas --pasta extracoes/
+#   python exportar.py aninhada_1 --evento 3 --saida nao_inscritos_evento_3.csv
+#
+# Sem --saida, cada arquivo se chama <nome>_<AAAAMMDD>.<formato> dentro de --pasta.
+#
+# Extrações de vários GB: --stage faz a descarga com COPY INTO direto para o stage (arquivos
+# comprimidos, em paralelo) e --baixar busca depois os arquivos de uma descarga:
+#
+#   python exportar.py pagamentos --stage --formato parquet
+#   python exportar.py --baixar BD2_DESCARGAS/pagamentos/20260101_020000_000000 --pasta extracoes/
+
+def descarregar(parser, args):
+    nomes = list(db.DESCARGAS) if args.todas else args.nomes
+    desconhecidas = [n for n in nomes if n not in db.DESCARGAS]
+    if not nomes or desconhecidas:
+        parser.error(f"--stage aceita: {', '.join(db.DESCARGAS)}")
+
+    session = db.get_snowpark_session()
+    caminhos = [db.iniciar_descarga(session, nome, args.formato) for nome in nomes]
+    falhas = 0
+    for caminho in caminhos:
+        descarga = db.aguardar_descarga(caminho)
+        if descarga["status"] == "concluida":
+            print(f"{descarga['nome']}: {descarga['linhas']} linhas, {descarga['bytes']} bytes em @{caminho}/ ({descarga['segundos']:.1f}s)")
+        else:
+            falhas += 1
+            print(f"ERRO {descarga['nome']}: {descarga['erro']}", file=sys.stderr)
+    sys.exit(1 if falhas else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta tabelas e relatórios em lotes para CSV ou Parquet")
+    parser.add_argument("nomes", nargs="*", metavar="nome", help=f"exportações: {', '.join(db.EXPORTACOES)}")
+    parser.add_argument("--todas", action="store_true", help="exporta tudo (aninhada_1 só com --evento)")
+    parser.add_argument("--formato", choices=list(db.FORMATOS_EXPORTACAO), default="csv")
+    parser.add_argument("--pasta", default=".")
+    parser.add_argument("--saida", help="caminho do arquivo (apenas com uma exportação)")
+    parser.add_argument("--evento", type=int, help="ID do evento de referência de aninhada_1")
+    parser.add_argument("--stage", action="store_true", help=f"descarrega com COPY INTO no stage ({', '.join(db.DESCARGAS)})")
+    parser.add_argument("--baixar", metavar="CAMINHO", help="baixa para --pasta os arquivos de uma descarga no stage")
+    args = parser.parse_args()
+
+    if args.baixar:
+        arquivos = db.baixar_descarga(db.get_snowpark_session(), args.baixar, args.pasta)
+        print("\n".join(arquivos) or "Nenhum arquivo encontrado.")
+        sys.exit(0 if arquivos else 1)
+    if args.stage:
+        descarregar(parser, args)
+
+    nomes = list(db.EXPORTACOES) if args.todas else args.nomes
+    if args.todas and args.evento is None:
+        nomes.remove('aninhada_1')
+    if not nomes:
+        parser.error("informe ao menos uma exportação ou --todas")
+    desconhecidas = [n for n in nomes if n not in db.EXPORTACOES]
+    if desconhecidas:
+        parser.error(f"exportação desconhecida: {', '.join(desconhecidas)}")
+    if args.saida and len(nomes) > 1:
+        parser.error("--saida só pode ser usado com uma exportação")
+    if 'aninhada_1' in nomes and args.evento is None:
+        parser.error("aninhada_1 precisa de --evento")
+
+    session = db.get_snowpark_session()
+    os.makedirs(args.pasta, exist_ok=True)
+    falhas = 0
+    for nome in nomes:
+        destino = args.saida or os.path.join(args.pasta, f"{nome}_{time.strftime('%Y%m%d')}.{args.formato}")
+        inicio = time.perf_counter()
+        try:
+            linhas = db.exportar(session, nome, destino, args.formato, (args.evento,) if nome == 'aninhada_1' else ())
+        except Exception as e:
+            falhas += 1
+            print(f"ERRO {nome}: {e}", file=sys.stderr)
+            continue
+        print(f"{nome}: {linhas} linhas em {destino} ({time.perf_counter() - inicio:.1f}s)")
+    sys.exit(1 if falhas else 0)
+
+if __name__ == "__main__":
+    main()
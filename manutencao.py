@@ -0,0 +1,32 @@
+import argparse
+import sys
+import time
+
+import db_utils as db
+
+# Tarefas administrativas, fora do app (deploy, cron, depois de cargas feitas direto no banco):
+#
+#   python manutencao.py reconstruir-resumos
+#
+# O app não reconstrói os resumos materializados ao subir (só quando cria as tabelas): escritas
+# feitas fora dele (scripts, cargas no Snowflake) só aparecem nos relatórios depois disto.
+
+# Nome -> função(session) que devolve True se deu certo (get_snowpark_session já criou as tabelas)
+TAREFAS = {
+    'reconstruir-resumos': db.reconstruir_resumos,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarefas administrativas do banco do bd2_sistema")
+    parser.add_argument("tarefa", choices=list(TAREFAS))
+    args = parser.parse_args()
+
+    session = db.get_snowpark_session()
+    inicio = time.perf_counter()
+    if not TAREFAS[args.tarefa](session):
+        print(f"ERRO {args.tarefa}: veja o log de consultas", file=sys.stderr)
+        sys.exit(1)
+    print(f"{args.tarefa}: concluída ({time.perf_counter() - inicio:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+
+# Os testes rodam só no backend local (DuckDB em memória): nunca tocam no Snowflake
+os.environ["BD2_BACKEND"] = "local"
+os.environ["BD2_BANCO_LOCAL"] = ":memory:"
+os.environ["BD2_AQUECIMENTO"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import benchmark
+import db_utils as db
+
+@pytest.fixture(scope="session")
+def session():
+    return db.get_snowpark_session()
+
+@pytest.fixture(scope="session")
+def ids(session):
+    # Dados sintéticos do benchmark, gerados uma vez para todos os testes
+    benchmark.limpar_tabelas(session)
+    return benchmark.gerar_dados(session, 2000, 4000)
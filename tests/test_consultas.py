@@ -0,0 +1,37 @@
+import benchmark
+import db_utils as db
+
+def linhas(resultado, casas=6):
+    # Linhas ordenadas, com floats arredondados (a ordem de soma muda a última casa da média)
+    _, dados = resultado
+    return sorted(tuple(round(v, casas) if isinstance(v, float) else v for v in linha) for linha in dados)
+
+def test_aninhada_2_igual_a_original(session, ids):
+    original = db.executar_snowpark_select(session, benchmark.SQL_ANINHADA_2_ORIGINAL)
+    atual = db.consulta_aninhada_2_palestras_acima_media(session)
+    assert linhas(original)
+    assert linhas(atual) == linhas(original)
+
+def test_aninhada_1_not_exists_igual_a_not_in(session, ids):
+    for evento_id in ids["eventos"]:
+        original = db.executar_snowpark_select(session, benchmark.SQL_ANINHADA_1_ORIGINAL, (evento_id,))
+        atual = db.consulta_aninhada_1_nao_inscritos_em_evento_x(session, evento_id)
+        assert linhas(atual) == linhas(original)
+
+def test_aninhada_1_em_lote_igual_a_evento_a_evento(session, ids):
+    # O CROSS JOIN da versão em lote devolve as mesmas linhas da consulta feita evento a evento
+    _, dados = db.consulta_aninhada_1_nao_inscritos_por_evento(session, ids["eventos"])
+    em_lote = sorted((evento_id, nome, email) for evento_id, _, _, nome, email in dados)
+    assert em_lote
+    assert em_lote == sorted(benchmark.nao_inscritos_evento_a_evento(session, ids["eventos"]))
+
+def test_aninhada_1_em_lote_sem_filtro_cobre_todos_os_eventos(session, ids):
+    _, eventos = db.executar_snowpark_select(session, "SELECT id FROM EVENTOS")
+    _, dados = db.consulta_aninhada_1_nao_inscritos_por_evento(session)
+    em_lote = sorted((evento_id, nome, email) for evento_id, _, _, nome, email in dados)
+    assert em_lote == sorted(benchmark.nao_inscritos_evento_a_evento(session, [e for e, in eventos]))
+
+def test_pessoas_por_tipo_igual_a_pessoa_a_pessoa(session, ids):
+    _, dados = db.buscar_pessoas_por_tipo(session, "Organizador")
+    assert dados
+    assert sorted(map(tuple, dados)) == sorted(benchmark.pessoas_por_tipo_pessoa_a_pessoa(session, "Organizador"))
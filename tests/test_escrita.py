@@ -0,0 +1,22 @@
+import db_utils as db
+
+def visao_no_banco(session, visao):
+    _, dados = db.executar_snowpark_select(session, db.VISOES_PAGINADAS[visao]["sql"])
+    return sorted(map(tuple, dados))
+
+def test_escrita_fora_do_repositorio_mescla_na_visao_em_cache(session, ids):
+    # PAGAMENTOS não tem cópia em memória: a linha escrita é trocada na visão em cache, sem relê-la inteira
+    db.ler_pagamentos(session)
+    criado = db.criar_pagamento(session, ids["participante"], ids["eventos"][0], 12.5, 'Confirmado', ids["tipo_pagamento"])
+    assert criado.registro['VALOR'] == 12.5
+    db.atualizar_pagamento(session, criado.registro['ID'], 13.0, 'Pendente', ids["tipo_pagamento"])
+    with db.coleta_parcial() as registros:
+        _, dados = db.ler_pagamentos(session)
+    assert registros == []
+    assert sorted(map(tuple, dados)) == visao_no_banco(session, 'PAGAMENTOS')
+
+    db.deletar_registro_por_id(session, 'PAGAMENTOS', criado.registro['ID'])
+    with db.coleta_parcial() as registros:
+        _, dados = db.ler_pagamentos(session)
+    assert registros == []
+    assert sorted(map(tuple, dados)) == visao_no_banco(session, 'PAGAMENTOS')
@@ -0,0 +1,27 @@
+import threading
+
+import db_utils as db
+
+class SessaoFalsa:
+    def close(self):
+        pass
+
+def test_contadores_do_pool_com_varias_threads():
+    # Toda sessão emprestada falha (e é descartada): cada empréstimo cria uma e descarta uma
+    pool = db.PoolSessoes(SessaoFalsa, tamanho=4, timeout=30)
+    def usar(vezes):
+        for _ in range(vezes):
+            try:
+                with pool.emprestar():
+                    raise RuntimeError("sessão quebrada")
+            except RuntimeError:
+                pass
+
+    threads = [threading.Thread(target=usar, args=(500,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    metricas = pool.metricas()
+    assert metricas["emprestimos"] == metricas["criadas"] == metricas["descartadas"] == 4000
+    assert metricas["abertas"] == metricas["em_uso"] == 0
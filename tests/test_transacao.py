@@ -0,0 +1,104 @@
+import db_utils as db
+
+def consultar(session, sql, params=None):
+    _, dados = db.executar_snowpark_select(session, sql, params)
+    return dados
+
+def resumos_conferem(session):
+    # Os resumos materializados batem com a agregação feita agora sobre as tabelas base
+    status = consultar(session, "SELECT status, total_pagamentos, total_valores, soma_valor, maior_valor, menor_valor "
+                                "FROM RESUMO_STATUS_PAGAMENTO ORDER BY status")
+    status_base = consultar(session, f"{db.SQL_FONTE_RESUMO_STATUS} GROUP BY status ORDER BY status")
+    organizadores = consultar(session, "SELECT organizador_id, total_eventos, valor_total FROM RESUMO_ORGANIZADORES ORDER BY 1")
+    organizadores_base = consultar(session, f"{db.SQL_FONTE_RESUMO_ORGANIZADORES} GROUP BY E.organizador_id ORDER BY 1")
+    return status == status_base and organizadores == organizadores_base
+
+def test_atualizar_pagamento_em_transacao_mantem_resumos(session, ids):
+    id_pagamento = consultar(session, "SELECT MIN(id) FROM PAGAMENTOS")[0][0]
+    t = db.Transacao(session)
+    t.adicionar(db.atualizar_pagamento, id_pagamento, 1.0, 'Pendente', ids["tipo_pagamento"])
+    t.adicionar(db.criar_pessoa, "Depois do pagamento", "depois.pagamento@exemplo.com", None, "Participante")
+    assert t.executar(), t.erro
+    assert consultar(session, "SELECT valor, status FROM PAGAMENTOS WHERE id = %s", (id_pagamento,)) == [[1.0, 'Pendente']]
+    assert consultar(session, "SELECT COUNT(*) FROM PESSOAS WHERE email = 'depois.pagamento@exemplo.com'") == [[1]]
+    assert resumos_conferem(session)
+
+def test_escritas_enfileiradas_juntas(session, ids):
+    # Cadastro encadeado (Adiado) de organizador, evento, pagamento e troca de organizador, numa unidade só
+    email = "organizador.transacao@exemplo.com"
+    organizador_id = db.Adiado(db.buscar_id_por_coluna, 'PESSOAS', 'EMAIL', email)
+    evento_id = db.Adiado(db.buscar_id_por_coluna, 'EVENTOS', 'NOME', "Evento da transação")
+    t = db.Transacao(session)
+    t.adicionar(db.criar_pessoa, "Organizador da transação", email, None, "Organizador")
+    t.adicionar(db.criar_evento, "Evento da transação", "2025-03-01", "2025-03-02", "Online", organizador_id)
+    t.adicionar(db.criar_pagamento, ids["participante"], evento_id, 75.5, 'Confirmado', ids["tipo_pagamento"])
+    t.adicionar(db.atualizar_evento, evento_id, "Evento da transação", "2025-03-01", "2025-03-03", "Online", ids["organizador"])
+    assert t.executar(), t.erro
+
+    evento = consultar(session, "SELECT id, organizador_id FROM EVENTOS WHERE nome = 'Evento da transação'")
+    assert len(evento) == 1 and evento[0][1] == ids["organizador"]
+    assert consultar(session, "SELECT valor FROM PAGAMENTOS WHERE evento_id = %s", (evento[0][0],)) == [[75.5]]
+    assert resumos_conferem(session)
+
+def test_unidade_aninhada_entra_na_de_fora(session):
+    def cadastrar_dois(sessao):
+        interna = db.Transacao(sessao)
+        interna.adicionar(db.criar_pessoa, "Aninhada 1", "aninhada1@exemplo.com", None, "Participante")
+        interna.adicionar(db.criar_pessoa, "Aninhada 2", "aninhada2@exemplo.com", None, "Participante")
+        return interna.executar()
+
+    t = db.Transacao(session)
+    t.adicionar(cadastrar_dois)
+    t.adicionar(db.criar_tipo_pagamento, "Aninhado")
+    with db.coleta_parcial() as registros:
+        assert t.executar(), t.erro
+    assert [r["sql"] for r in registros].count("BEGIN TRANSACTION") == 1
+    assert consultar(session, "SELECT COUNT(*) FROM PESSOAS WHERE email LIKE 'aninhada_@exemplo.com'") == [[2]]
+
+def test_falha_na_unidade_aninhada_desfaz_a_de_fora(session):
+    def falhar(sessao):
+        raise ValueError("falha de propósito")
+
+    def cadastrar_e_falhar(sessao):
+        interna = db.Transacao(sessao)
+        interna.adicionar(db.criar_pessoa, "Desfeita", "desfeita@exemplo.com", None, "Participante")
+        interna.adicionar(falhar)
+        interna.executar()
+        return 1  # ignora o resultado da unidade interna: a de fora precisa perceber a falha mesmo assim
+
+    t = db.Transacao(session)
+    t.adicionar(db.criar_tipo_pagamento, "Desfeito")
+    t.adicionar(cadastrar_e_falhar)
+    assert not t.executar()
+    assert "falha de propósito" in t.erro
+    assert consultar(session, "SELECT COUNT(*) FROM PESSOAS WHERE email = 'desfeita@exemplo.com'") == [[0]]
+    assert consultar(session, "SELECT COUNT(*) FROM TIPOS_PAGAMENTO WHERE nome = 'Desfeito'") == [[0]]
+
+def nomes_em_memoria(session, tabela):
+    copia = db.tabela_em_memoria(session, tabela)
+    return {nome for _, nome in copia.linhas(sorted(copia.posicoes.values()), ['ID', 'NOME'])}
+
+def test_copia_em_memoria_so_recebe_a_linha_depois_do_commit(session):
+    vistos = []
+    def espiar(sessao):
+        # Outra sessão lendo a cópia compartilhada durante a transação não vê a linha ainda sem COMMIT
+        vistos.append("Em memória" in nomes_em_memoria(session, 'TIPOS_PAGAMENTO'))
+
+    nomes_em_memoria(session, 'TIPOS_PAGAMENTO')
+    t = db.Transacao(session)
+    t.adicionar(db.criar_tipo_pagamento, "Em memória")
+    t.adicionar(espiar)
+    assert t.executar(), t.erro
+    assert vistos == [False]
+    assert "Em memória" in nomes_em_memoria(session, 'TIPOS_PAGAMENTO')
+
+def test_copia_em_memoria_ignora_escrita_desfeita(session):
+    def falhar(sessao):
+        raise ValueError("falha de propósito")
+
+    nomes_em_memoria(session, 'TIPOS_PAGAMENTO')
+    t = db.Transacao(session)
+    t.adicionar(db.criar_tipo_pagamento, "Nunca confirmado")
+    t.adicionar(falhar)
+    assert not t.executar()
+    assert "Nunca confirmado" not in nomes_em_memoria(session, 'TIPOS_PAGAMENTO')